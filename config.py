@@ -14,6 +14,11 @@ EM_SIMULATION_CONFIG = {
     'max_reflections': 3,       # 最大反射次数
     'max_diffractions': 1,      # 最大衍射次数
     'ray_resolution': 1.0,      # 射线角度分辨率 (度)
+    'los_2d': False,            # 视距判断只检测墙面XY投影（平面布局场景加速）
+    'los_early_exit': False,    # 多径追踪时存在直达路径则只计直达路径，跳过多径扫描
+    'rx_cone_pruning': False,   # 多径追踪时剪除不朝向接收点的反射射线（近似，减少求交次数）
+    'n_workers': 1,             # 多径扫描并行线程数（需Embree后端，trimesh原生求交不支持并发）
+    'intersector': 'cpu',       # 多径扫描射线求交后端: 'cpu' 或 'cupy'（GPU，需安装cupy）
 
     # 材料属性 (相对介电常数, 电导率)
     'materials': {
@@ -27,6 +32,8 @@ EM_SIMULATION_CONFIG = {
     # 路径损耗模型参数
     'path_loss_exponent': 2.0,  # 自由空间路径损耗指数
     'shadow_fading_std': 4.0,   # 阴影衰落标准差 (dB)
+    'seed': None,               # 阴影衰落随机种子（None为不固定，设为整数可复现仿真结果）
+    'signal_cache_resolution': None,  # 接收功率缓存的接收点量化分辨率 (m)，如0.1；None为不缓存
 }
 
 # 指纹库构建参数
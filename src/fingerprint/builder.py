@@ -11,12 +11,94 @@ import os
 
 
 class FingerprintDatabase:
-    """指纹库类"""
+    """
+    指纹库类
+
+    指纹按列存储为两个数组：位置 (N,3) 与 RSSI矩阵 (N, num_aps)，行号由位置键索引。
+    新增的指纹先暂存，首次读取时一次性合并进数组；fingerprints 属性提供
+    {(x,y,z): rssi} 形式的字典视图，兼容按字典访问的旧代码和已保存的指纹库文件。
+    """
 
     def __init__(self):
-        self.fingerprints = {}  # {(x,y,z): [rssi1, rssi2, ...]}
         self.ap_positions = []  # AP位置列表
         self.metadata = {}      # 元数据
+        self.version = 0        # 修改计数，供外部缓存判断是否失效
+
+        self._positions = np.empty((0, 3))  # 位置数组 (N, 3)
+        self._rssi = None                   # RSSI矩阵 (N, num_aps)，首次写入时确定列数
+        self._index = {}                    # {(x,y,z): 行号}
+        self._pending = []                  # 待合并的 (位置键列表, RSSI矩阵)
+        self._dict_view = None              # (version, fingerprints字典)
+
+    @property
+    def fingerprints(self) -> Dict[Tuple[float, float, float], np.ndarray]:
+        """指纹字典视图 {(x,y,z): rssi}，值为RSSI矩阵的行视图"""
+        if self._dict_view is None or self._dict_view[0] != self.version:
+            self._flush()
+            rows = self._rssi if self._rssi is not None else ()
+            self._dict_view = (self.version, dict(zip(self._index, rows)))
+        return self._dict_view[1]
+
+    @fingerprints.setter
+    def fingerprints(self, fingerprints: Dict):
+        """用 {(x,y,z): rssi} 字典整体替换指纹数据"""
+        self._positions = np.empty((0, 3))
+        self._rssi = None
+        self._index = {}
+        self._pending = []
+        self._dict_view = None
+        if fingerprints:
+            self._pending.append((list(fingerprints.keys()), np.array(list(fingerprints.values()))))
+        self.version += 1
+
+    @property
+    def num_fingerprints(self) -> int:
+        """指纹数量"""
+        self._flush()
+        return len(self._index)
+
+    @property
+    def positions(self) -> np.ndarray:
+        """位置数组 (N,3) 的只读视图"""
+        self._flush()
+        view = self._positions.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def rssi_matrix(self) -> np.ndarray:
+        """RSSI矩阵 (N, num_aps) 的只读视图"""
+        self._flush()
+        view = (self._rssi if self._rssi is not None else np.empty((0, 0))).view()
+        view.flags.writeable = False
+        return view
+
+    def _flush(self):
+        """将暂存的指纹合并进位置数组和RSSI矩阵（已有位置覆盖原行，新位置追加到末尾）"""
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, []
+        pos_keys = [k for keys, _ in pending for k in keys]
+        rssi_rows = np.concatenate([rows for _, rows in pending])
+
+        num_old = len(self._index)
+        rows = np.fromiter((self._index.setdefault(k, len(self._index)) for k in pos_keys),
+                           dtype=np.intp, count=len(pos_keys))
+        num_new = len(self._index)
+
+        # 同一位置多次写入时以最后一次为准
+        _, last = np.unique(rows[::-1], return_index=True)
+        sel = len(rows) - 1 - last
+
+        if self._rssi is None:
+            self._rssi = np.empty((0, rssi_rows.shape[1]))
+        if num_new > num_old:
+            self._positions = np.concatenate([self._positions, np.empty((num_new - num_old, 3))])
+            self._rssi = np.concatenate([self._rssi, np.empty((num_new - num_old, self._rssi.shape[1]))])
+
+        self._positions[rows[sel]] = np.array(pos_keys)[sel]
+        self._rssi[rows[sel]] = rssi_rows[sel]
 
     def add_fingerprint(self, position: Tuple[float, float, float], rssi_values: np.ndarray):
         """
@@ -28,7 +110,20 @@ class FingerprintDatabase:
         """
         # 将位置转换为可哈希的元组
         pos_key = tuple(np.round(position, 2))
-        self.fingerprints[pos_key] = rssi_values
+        self._pending.append(([pos_key], np.asarray(rssi_values, dtype=np.float64)[None, :]))
+        self.version += 1
+
+    def add_fingerprints_bulk(self, positions: np.ndarray, rssi_matrix: np.ndarray):
+        """
+        批量添加指纹数据（位置取整与键转换一次完成，等价于逐条调用 add_fingerprint）
+
+        Args:
+            positions: 位置坐标 shape=(N, 3)
+            rssi_matrix: RSSI矩阵 shape=(N, num_aps)
+        """
+        pos_keys = list(map(tuple, np.round(np.asarray(positions, dtype=np.float64), 2).tolist()))
+        self._pending.append((pos_keys, np.array(rssi_matrix, dtype=np.float64, ndmin=2)))
+        self.version += 1
 
     def get_fingerprint(self, position: Tuple[float, float, float]) -> np.ndarray:
         """
@@ -40,24 +135,19 @@ class FingerprintDatabase:
         Returns:
             RSSI值数组
         """
+        self._flush()
         pos_key = tuple(np.round(position, 2))
-        return self.fingerprints.get(pos_key, None)
+        row = self._index.get(pos_key)
+        return None if row is None else self._rssi[row]
 
     def get_all_fingerprints(self) -> Tuple[np.ndarray, np.ndarray]:
         """
         获取所有指纹数据
 
         Returns:
-            (positions, rssi_matrix): 位置数组 (N,3), RSSI矩阵 (N, num_aps)
+            (positions, rssi_matrix): 位置数组 (N,3), RSSI矩阵 (N, num_aps)，均为副本
         """
-        positions = []
-        rssi_values = []
-
-        for pos, rssi in self.fingerprints.items():
-            positions.append(pos)
-            rssi_values.append(rssi)
-
-        return np.array(positions), np.array(rssi_values)
+        return self.positions.copy(), self.rssi_matrix.copy()
 
     def save(self, filepath: str):
         """
@@ -71,7 +161,7 @@ class FingerprintDatabase:
 
         # 添加元数据
         self.metadata['created_at'] = datetime.now().isoformat()
-        self.metadata['num_fingerprints'] = len(self.fingerprints)
+        self.metadata['num_fingerprints'] = self.num_fingerprints
         self.metadata['num_aps'] = len(self.ap_positions)
 
         data = {
@@ -84,7 +174,7 @@ class FingerprintDatabase:
             pickle.dump(data, f)
 
         print(f"指纹库已保存到: {filepath}")
-        print(f"  指纹数量: {len(self.fingerprints)}")
+        print(f"  指纹数量: {self.num_fingerprints}")
         print(f"  AP数量: {len(self.ap_positions)}")
 
     @staticmethod
@@ -107,7 +197,7 @@ class FingerprintDatabase:
         db.metadata = data.get('metadata', {})
 
         print(f"指纹库已加载: {filepath}")
-        print(f"  指纹数量: {len(db.fingerprints)}")
+        print(f"  指纹数量: {db.num_fingerprints}")
         print(f"  AP数量: {len(db.ap_positions)}")
 
         return db
@@ -202,8 +292,7 @@ class FingerprintBuilder:
             )
 
             # 添加到指纹库
-            for i, rx_pos in enumerate(batch_points):
-                self.database.add_fingerprint(tuple(rx_pos), rssi_matrix[i])
+            self.database.add_fingerprints_bulk(batch_points, rssi_matrix)
 
             # 更新进度
             current = end_idx
@@ -42,6 +42,22 @@ class FingerprintLocalization:
         """
         raise NotImplementedError
 
+    def localize_batch(self, measured_rssi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量定位（默认逐行调用localize，子类可覆盖为向量化实现）
+
+        Args:
+            measured_rssi: 测量的RSSI矩阵 shape=(M, num_aps)
+
+        Returns:
+            (estimated_positions, confidences): 估计位置 (M, 3), 置信度 (M,)
+        """
+        positions = np.empty((len(measured_rssi), 3))
+        confidences = np.empty(len(measured_rssi))
+        for i, rssi in enumerate(measured_rssi):
+            positions[i], confidences[i] = self.localize(rssi)
+        return positions, confidences
+
 
 class KNNLocalization(FingerprintLocalization):
     """K近邻定位算法"""
@@ -86,6 +102,23 @@ class KNNLocalization(FingerprintLocalization):
 
         return estimated_position, confidence
 
+    def localize_batch(self, measured_rssi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量K近邻定位（一次kneighbors查询所有测量值）
+
+        Args:
+            measured_rssi: 测量的RSSI矩阵 shape=(M, num_aps)
+
+        Returns:
+            (estimated_positions, confidences): 估计位置 (M, 3), 置信度 (M,)
+        """
+        distances, indices = self.knn_model.kneighbors(np.atleast_2d(measured_rssi))
+
+        estimated_positions = np.mean(self.ref_positions[indices], axis=1)
+        confidences = 1.0 / (1.0 + np.mean(distances, axis=1))
+
+        return estimated_positions, confidences
+
 
 class WKNNLocalization(FingerprintLocalization):
     """加权K近邻定位算法"""
@@ -137,6 +170,28 @@ class WKNNLocalization(FingerprintLocalization):
 
         return estimated_position, confidence
 
+    def localize_batch(self, measured_rssi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量加权K近邻定位（一次kneighbors查询所有测量值）
+
+        Args:
+            measured_rssi: 测量的RSSI矩阵 shape=(M, num_aps)
+
+        Returns:
+            (estimated_positions, confidences): 估计位置 (M, 3), 置信度 (M,)
+        """
+        distances, indices = self.knn_model.kneighbors(np.atleast_2d(measured_rssi))
+
+        # 权重为距离的倒数，按行归一化
+        distances = np.maximum(distances, 1e-6)
+        weights = 1.0 / distances
+        weights /= np.sum(weights, axis=1, keepdims=True)
+
+        estimated_positions = np.einsum('mk,mkd->md', weights, self.ref_positions[indices])
+        confidences = 1.0 / (1.0 + np.mean(distances, axis=1))
+
+        return estimated_positions, confidences
+
 
 class ProbabilisticLocalization(FingerprintLocalization):
     """概率定位算法（基于高斯模型）"""
@@ -197,6 +252,28 @@ class ProbabilisticLocalization(FingerprintLocalization):
 
         return estimated_position, confidence
 
+    def localize_batch(self, measured_rssi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量概率定位
+
+        Args:
+            measured_rssi: 测量的RSSI矩阵 shape=(M, num_aps)
+
+        Returns:
+            (estimated_positions, confidences): 估计位置 (M, 3), 置信度 (M,)
+        """
+        measured_rssi = np.atleast_2d(measured_rssi)
+
+        # (M, N) 高斯概率矩阵
+        diff = (measured_rssi[:, np.newaxis, :] - self.ref_rssi[np.newaxis, :, :]) / self.rssi_std
+        probabilities = np.exp(-0.5 * np.sum(diff ** 2, axis=2))
+        probabilities /= np.sum(probabilities, axis=1, keepdims=True)
+
+        estimated_positions = probabilities @ self.ref_positions
+        confidences = np.max(probabilities, axis=1)
+
+        return estimated_positions, confidences
+
 
 class LocalizationEngine:
     """定位引擎"""
@@ -247,6 +324,18 @@ class LocalizationEngine:
 
         return result
 
+    def locate_batch(self, measured_rssi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量定位
+
+        Args:
+            measured_rssi: 测量的RSSI矩阵 shape=(M, num_aps)
+
+        Returns:
+            (positions, confidences): 估计位置 (M, 3), 置信度 (M,)
+        """
+        return self.locator.localize_batch(measured_rssi)
+
     def evaluate_accuracy(self, test_positions: np.ndarray, test_rssi: np.ndarray, use_3d: bool = True) -> Dict:
         """
         评估定位精度
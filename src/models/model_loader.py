@@ -7,21 +7,75 @@ import numpy as np
 import trimesh
 from typing import Tuple, List, Dict
 import os
+import re
+
+# 可选依赖: Embree加速的射线求交 (pip install embreex)
+try:
+    from trimesh.ray.ray_pyembree import RayMeshIntersector as _EmbreeIntersector
+except ImportError:
+    _EmbreeIntersector = None
+
+# 可选依赖: Numba JIT加速墙面提取 (pip install numba)
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+# COLLADA <unit> 标签，例如 <unit name="millimeter" meter="0.001"/>
+_DAE_UNIT_RE = re.compile(rb'<unit\s+[^>]*meter="([0-9.eE+-]+)"')
+
+# 常见单位缩放系数对应的显示名称
+_DAE_UNIT_NAMES = {
+    0.0254: '英寸 (inch)',
+    0.01: '厘米 (cm)',
+    0.001: '毫米 (mm)',
+    1.0: '米 (m)',
+}
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _extract_walls_kernel(vertices, faces, normals_z, threshold):
+        """单次遍历面片：垂直判断 + 顶点收集，直接写入预分配输出"""
+        num_faces = faces.shape[0]
+        offsets = np.empty(num_faces, dtype=np.int64)
+        count = 0
+        for i in range(num_faces):
+            offsets[i] = count
+            if abs(normals_z[i]) < threshold:
+                count += 1
+
+        out = np.empty((count, 3, 3), dtype=vertices.dtype)
+        for i in prange(num_faces):
+            if abs(normals_z[i]) < threshold:
+                k = offsets[i]
+                for j in range(3):
+                    v = faces[i, j]
+                    out[k, j, 0] = vertices[v, 0]
+                    out[k, j, 1] = vertices[v, 1]
+                    out[k, j, 2] = vertices[v, 2]
+        return out
+else:
+    _extract_walls_kernel = None
 
 
 class IndoorModel:
     """室内环境模型类"""
 
-    def __init__(self, model_path: str, unit: str = 'auto'):
+    def __init__(self, model_path: str, unit: str = 'auto', lazy: bool = False):
         """
         初始化模型
 
         Args:
             model_path: 模型文件路径 (支持 .dae, .obj 格式)
             unit: 模型单位 ('mm' 毫米, 'm' 米, 'auto' 自动检测), 默认 'auto'
+            lazy: 是否延迟加载网格。为True时若存在边界缓存文件则只读取边界，
+                网格在首次访问 mesh（墙面提取、射线求交、可视化）时才解析
         """
         self.model_path = model_path
         self.unit = unit
+        self.lazy = lazy
         # 初始缩放系数（auto模式会在加载时动态设置）
         if unit == 'mm':
             self.scale_factor = 0.001
@@ -30,13 +84,205 @@ class IndoorModel:
         else:  # 'auto' 或其他
             self.scale_factor = 1.0  # 默认值，会在 _load_model 中更新
 
-        self.mesh = None
+        self._mesh = None
+        self._need_scale = False
+        self._ray = None        # 缓存的射线求交器
         self.walls = []
+        self._wall_xy = None    # 墙面三角形XY投影 shape=(W, 3, 2)
+        self._wall_grid = {}    # 2D网格哈希: (ix, iy) -> 墙面索引数组
+        self._wall_cell = 1.0
         self.bounds = None
         self.materials = {}
 
         self._load_model()
 
+    @property
+    def mesh(self):
+        """三角网格（延迟加载模式下首次访问时才解析模型文件）"""
+        if self._mesh is None and self.bounds is not None:
+            try:
+                self._read_mesh()
+                self._finish_mesh()
+            except Exception as e:
+                raise RuntimeError(f"加载模型失败: {str(e)}")
+            print(f"网格延迟加载完成: 顶点数 {len(self._mesh.vertices)}, 面数 {len(self._mesh.faces)}")
+        return self._mesh
+
+    @property
+    def ray_intersect_thread_safe(self) -> bool:
+        """射线求交能否多线程并发调用（Embree后端可以；trimesh原生后端依赖的rtree索引不支持并发查询）"""
+        return _EmbreeIntersector is not None
+
+    @property
+    def _bounds_cache_path(self) -> str:
+        """边界缓存文件路径（未缩放的原始边界）"""
+        return self.model_path + '.bounds.npy'
+
+    def _load_cached_bounds(self):
+        """读取边界缓存，缓存不存在或早于模型文件时返回None"""
+        cache_path = self._bounds_cache_path
+        try:
+            if os.path.getmtime(cache_path) < os.path.getmtime(self.model_path):
+                return None
+            raw_bounds = np.load(cache_path)
+        except (OSError, ValueError):
+            return None
+        if raw_bounds.shape != (2, 3):
+            return None
+        return raw_bounds
+
+    def _save_cached_bounds(self, raw_bounds: np.ndarray):
+        """保存未缩放的原始边界，供延迟加载使用"""
+        try:
+            np.save(self._bounds_cache_path, np.asarray(raw_bounds, dtype=np.float64))
+        except OSError as e:
+            print(f"警告: 无法写入边界缓存: {e}")
+
+    @property
+    def _mesh_cache_path(self) -> str:
+        """网格缓存文件路径（未缩放的顶点、面片与面法向量）"""
+        return self.model_path + '.cache.npz'
+
+    def _load_cached_mesh(self):
+        """读取网格缓存，缓存不存在或早于模型文件时返回None"""
+        cache_path = self._mesh_cache_path
+        try:
+            if os.path.getmtime(cache_path) < os.path.getmtime(self.model_path):
+                return None
+            with np.load(cache_path) as data:
+                vertices, faces, face_normals = data['v'], data['f'], data['fn']
+        except (OSError, ValueError, KeyError):
+            return None
+        # 缓存内容已经过trimesh处理，跳过顶点合并等预处理
+        return trimesh.Trimesh(vertices=vertices, faces=faces,
+                               face_normals=face_normals, process=False)
+
+    def _save_cached_mesh(self):
+        """保存解析后的网格，下次加载时跳过COLLADA/OBJ文本解析"""
+        try:
+            np.savez(self._mesh_cache_path,
+                     v=self._mesh.vertices,
+                     f=self._mesh.faces.astype(np.int32),
+                     fn=self._mesh.face_normals)
+        except OSError as e:
+            print(f"警告: 无法写入网格缓存: {e}")
+
+    def _read_mesh(self):
+        """解析模型文件（未缩放），优先使用网格缓存"""
+        self._mesh = self._load_cached_mesh()
+        if self._mesh is not None:
+            return
+
+        # 使用trimesh加载模型
+        # 注意：trimesh会自动处理COLLADA文件中的单位信息
+        self._mesh = trimesh.load(self.model_path, force='mesh')
+
+        # 如果是场景，合并所有网格
+        if isinstance(self._mesh, trimesh.Scene):
+            geometries = []
+            for name, geom in self._mesh.geometry.items():
+                if isinstance(geom, trimesh.Trimesh):
+                    geometries.append(geom)
+            if geometries:
+                self._mesh = trimesh.util.concatenate(geometries)
+            else:
+                raise ValueError("场景中没有有效的网格数据")
+
+        self._save_cached_mesh()
+
+    def _finish_mesh(self):
+        """对已解析的网格执行单位缩放并构建射线求交器"""
+        if self._need_scale:
+            # 均匀缩放：直接原地缩放顶点，单位法向量不随缩放改变，无需重算
+            face_normals = self._mesh.face_normals
+            self._mesh.vertices *= self.scale_factor
+            self._mesh.face_normals = face_normals
+
+        # 计算边界
+        self.bounds = self._mesh.bounds
+
+        # 缓存射线求交器（优先使用Embree后端）
+        if _EmbreeIntersector is not None:
+            self._ray = _EmbreeIntersector(self._mesh)
+        else:
+            self._ray = self._mesh.ray
+
+    def _detect_scale(self, file_ext: str, initial_bounds: np.ndarray) -> bool:
+        """
+        根据文件单位信息或模型尺寸确定缩放系数
+
+        Args:
+            file_ext: 文件扩展名
+            initial_bounds: 未缩放的原始边界
+
+        Returns:
+            是否需要缩放
+        """
+        initial_size = np.max(initial_bounds[1] - initial_bounds[0])
+
+        # 单位转换逻辑
+        # trimesh 有时无法正确处理 COLLADA 的单位，需要智能检测
+        need_scale = False
+        detected_unit = None
+
+        if file_ext == '.dae':
+            # COLLADA文件：优先读取文件内的单位信息
+            # 先检查文件内容，而不是根据尺寸推测
+            detected_from_file = False
+            try:
+                # 以二进制读取文件头部，不依赖文件编码
+                with open(self.model_path, 'rb') as f:
+                    head = f.read(8192)
+                match = _DAE_UNIT_RE.search(head)
+                if match:
+                    self.scale_factor = float(match.group(1))
+                    need_scale = (self.scale_factor != 1.0)
+                    detected_unit = _DAE_UNIT_NAMES.get(
+                        self.scale_factor, f'{self.scale_factor} 米/单位')
+                    detected_from_file = True
+            except (OSError, ValueError) as e:
+                print(f"警告: 无法读取文件单位信息: {e}")
+                detected_from_file = False
+
+            # 如果文件中没找到单位信息，才根据尺寸推测
+            if not detected_from_file:
+                if 10 <= initial_size <= 300:
+                    # 10-300米范围，可能是米（正常）
+                    detected_unit = '米 (推测)'
+                    need_scale = False
+                elif 1000 <= initial_size <= 30000:
+                    # 1000-30000的数值，可能是毫米
+                    detected_unit = '毫米 (推测)'
+                    need_scale = True
+                    self.scale_factor = 0.001
+                elif 100 <= initial_size <= 3000:
+                    # 100-3000的数值，可能是厘米或英寸
+                    detected_unit = '厘米或英寸 (推测)'
+                    need_scale = True
+                    self.scale_factor = 0.01  # 默认假设厘米
+                elif initial_size < 10:
+                    # 小于10，可能已经是米但尺寸太小
+                    detected_unit = '米 (尺寸较小)'
+                    need_scale = False
+                else:
+                    # 其他情况
+                    detected_unit = '未知 (请手动检查)'
+                    need_scale = False
+
+            if need_scale:
+                print(f"检测到单位: {detected_unit}，尺寸: {initial_size:.2f}")
+                print(f"应用单位转换: {detected_unit} -> 米 (缩放系数: {self.scale_factor})")
+            else:
+                print(f"检测到单位: {detected_unit}，尺寸: {initial_size:.2f}米")
+                print(f"使用COLLADA文件内置单位（无需转换）")
+        else:
+            # OBJ/STL文件：总是应用用户指定的单位
+            need_scale = (self.scale_factor != 1.0)
+            if need_scale:
+                print(f"模型单位转换: {self.unit} -> m (缩放系数: {self.scale_factor})")
+
+        return need_scale and self.scale_factor != 1.0
+
     def _load_model(self):
         """加载3D模型"""
         if not os.path.exists(self.model_path):
@@ -48,109 +294,28 @@ class IndoorModel:
             raise ValueError(f"不支持的文件格式: {file_ext}. 请使用 .dae, .obj 或 .stl 格式")
 
         try:
-            # 使用trimesh加载模型
-            # 注意：trimesh会自动处理COLLADA文件中的单位信息
-            self.mesh = trimesh.load(self.model_path, force='mesh')
-
-            # 如果是场景，合并所有网格
-            if isinstance(self.mesh, trimesh.Scene):
-                geometries = []
-                for name, geom in self.mesh.geometry.items():
-                    if isinstance(geom, trimesh.Trimesh):
-                        geometries.append(geom)
-                if geometries:
-                    self.mesh = trimesh.util.concatenate(geometries)
-                else:
-                    raise ValueError("场景中没有有效的网格数据")
+            # 延迟加载：优先使用边界缓存，跳过网格解析
+            initial_bounds = self._load_cached_bounds() if self.lazy else None
+            if initial_bounds is None:
+                self._read_mesh()
+                initial_bounds = self._mesh.bounds.copy()
+                self._save_cached_bounds(initial_bounds)
 
-            # 检查初始边界，判断是否需要单位转换
-            initial_bounds = self.mesh.bounds
-            initial_size = np.max(initial_bounds[1] - initial_bounds[0])
+            self._need_scale = self._detect_scale(file_ext, initial_bounds)
 
-            # 单位转换逻辑
-            # trimesh 有时无法正确处理 COLLADA 的单位，需要智能检测
-            need_scale = False
-            detected_unit = None
-
-            if file_ext == '.dae':
-                # COLLADA文件：优先读取文件内的单位信息
-                # 先检查文件内容，而不是根据尺寸推测
-                detected_from_file = False
-                try:
-                    with open(self.model_path, 'r', encoding='utf-8') as f:
-                        content = f.read(5000)  # 读取文件头部
-                        if 'name="inch"' in content or 'meter="0.0254"' in content:
-                            detected_unit = '英寸 (inch)'
-                            need_scale = True
-                            self.scale_factor = 0.0254  # 英寸转米
-                            detected_from_file = True
-                        elif 'name="centimeter"' in content or 'meter="0.01"' in content:
-                            detected_unit = '厘米 (cm)'
-                            need_scale = True
-                            self.scale_factor = 0.01
-                            detected_from_file = True
-                        elif 'name="millimeter"' in content or 'meter="0.001"' in content:
-                            detected_unit = '毫米 (mm)'
-                            need_scale = True
-                            self.scale_factor = 0.001
-                            detected_from_file = True
-                        elif 'name="meter"' in content and 'meter="1"' in content:
-                            detected_unit = '米 (m)'
-                            need_scale = False
-                            detected_from_file = True
-                except Exception as e:
-                    print(f"警告: 无法读取文件单位信息: {e}")
-                    detected_from_file = False
-
-                # 如果文件中没找到单位信息，才根据尺寸推测
-                if not detected_from_file:
-                    if 10 <= initial_size <= 300:
-                        # 10-300米范围，可能是米（正常）
-                        detected_unit = '米 (推测)'
-                        need_scale = False
-                    elif 1000 <= initial_size <= 30000:
-                        # 1000-30000的数值，可能是毫米
-                        detected_unit = '毫米 (推测)'
-                        need_scale = True
-                        self.scale_factor = 0.001
-                    elif 100 <= initial_size <= 3000:
-                        # 100-3000的数值，可能是厘米或英寸
-                        detected_unit = '厘米或英寸 (推测)'
-                        need_scale = True
-                        self.scale_factor = 0.01  # 默认假设厘米
-                    elif initial_size < 10:
-                        # 小于10，可能已经是米但尺寸太小
-                        detected_unit = '米 (尺寸较小)'
-                        need_scale = False
-                    else:
-                        # 其他情况
-                        detected_unit = '未知 (请手动检查)'
-                        need_scale = False
-
-                if need_scale:
-                    print(f"检测到单位: {detected_unit}，尺寸: {initial_size:.2f}")
-                    print(f"应用单位转换: {detected_unit} -> 米 (缩放系数: {self.scale_factor})")
-                else:
-                    print(f"检测到单位: {detected_unit}，尺寸: {initial_size:.2f}米")
-                    print(f"使用COLLADA文件内置单位（无需转换）")
+            if self._mesh is not None:
+                self._finish_mesh()
             else:
-                # OBJ/STL文件：总是应用用户指定的单位
-                need_scale = (self.scale_factor != 1.0)
-
-            # 执行缩放
-            if need_scale and self.scale_factor != 1.0:
-                self.mesh.apply_scale(self.scale_factor)
-            elif file_ext != '.dae' and self.scale_factor != 1.0:
-                self.mesh.apply_scale(self.scale_factor)
-                print(f"模型单位转换: {self.unit} -> m (缩放系数: {self.scale_factor})")
-
-            # 计算边界
-            self.bounds = self.mesh.bounds
+                scale = self.scale_factor if self._need_scale else 1.0
+                self.bounds = initial_bounds * scale
 
             print(f"模型加载成功: {self.model_path}")
             print(f"  单位: {self.unit}")
-            print(f"  顶点数: {len(self.mesh.vertices)}")
-            print(f"  面数: {len(self.mesh.faces)}")
+            if self._mesh is not None:
+                print(f"  顶点数: {len(self._mesh.vertices)}")
+                print(f"  面数: {len(self._mesh.faces)}")
+            else:
+                print(f"  网格: 延迟加载（首次使用时解析）")
             print(f"  边界 (米): X[{self.bounds[0][0]:.2f}, {self.bounds[1][0]:.2f}], "
                   f"Y[{self.bounds[0][1]:.2f}, {self.bounds[1][1]:.2f}], "
                   f"Z[{self.bounds[0][2]:.2f}, {self.bounds[1][2]:.2f}]")
@@ -171,23 +336,108 @@ class IndoorModel:
         if self.mesh is None:
             raise RuntimeError("模型未加载")
 
-        walls = []
+        vertices = np.ascontiguousarray(self.mesh.vertices, dtype=np.float64)
+        faces = np.ascontiguousarray(self.mesh.faces, dtype=np.int64)
+        normals_z = np.ascontiguousarray(self.mesh.face_normals[:, 2])
 
-        # 获取所有面的法向量
-        face_normals = self.mesh.face_normals
+        # 筛选垂直面 (法向量Z分量接近0)，并收集其三个顶点
+        if _extract_walls_kernel is not None:
+            wall_tris = _extract_walls_kernel(vertices, faces, normals_z, vertical_threshold)
+        else:
+            wall_tris = vertices[faces[np.abs(normals_z) < vertical_threshold]]
 
-        # 筛选垂直面 (Z分量接近0)
-        for i, normal in enumerate(face_normals):
-            if abs(normal[2]) < vertical_threshold:  # 垂直墙面
-                # 获取该面的三个顶点
-                face_vertices = self.mesh.vertices[self.mesh.faces[i]]
-                walls.append(face_vertices)
+        walls = list(wall_tris)
 
         self.walls = walls
+        self._build_wall_grid()
         print(f"提取墙面数量: {len(walls)}")
 
         return walls
 
+    def _build_wall_grid(self):
+        """构建墙面XY投影的2D均匀网格哈希，供平面视距查询使用"""
+        self._wall_grid = {}
+        if len(self.walls) == 0:
+            self._wall_xy = np.empty((0, 3, 2))
+            return
+
+        self._wall_xy = np.asarray(self.walls, dtype=np.float64)[:, :, :2]
+        xy_min = self._wall_xy.min(axis=1)
+        xy_max = self._wall_xy.max(axis=1)
+
+        # 网格尺寸取墙面投影包围盒边长的中位数
+        self._wall_cell = max(float(np.median((xy_max - xy_min).max(axis=1))), 1e-3)
+
+        ix0, iy0 = np.floor(xy_min / self._wall_cell).astype(np.int64).T
+        ix1, iy1 = np.floor(xy_max / self._wall_cell).astype(np.int64).T
+        ny = iy1 - iy0 + 1
+        counts = (ix1 - ix0 + 1) * ny
+
+        # 展开每个墙面覆盖的全部网格
+        wall_idx = np.repeat(np.arange(len(counts)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = ix0[wall_idx] + local // ny[wall_idx]
+        cy = iy0[wall_idx] + local % ny[wall_idx]
+
+        order = np.lexsort((cy, cx))
+        cx, cy, wall_idx = cx[order], cy[order], wall_idx[order]
+        starts = np.flatnonzero(np.r_[True, (np.diff(cx) != 0) | (np.diff(cy) != 0)])
+        for start, indices in zip(starts, np.split(wall_idx, starts[1:])):
+            self._wall_grid[(int(cx[start]), int(cy[start]))] = indices
+
+    def segment_intersects_wall_2d(self, p0: np.ndarray, p1: np.ndarray) -> bool:
+        """
+        判断线段在XY平面投影上是否穿过墙面（忽略高度）
+
+        Args:
+            p0: 线段起点 (x, y[, z])
+            p1: 线段终点 (x, y[, z])
+
+        Returns:
+            是否与任一墙面投影相交
+        """
+        if self._wall_xy is None:
+            self.extract_walls()
+        if len(self._wall_xy) == 0:
+            return False
+
+        a = np.asarray(p0, dtype=np.float64)[:2]
+        b = np.asarray(p1, dtype=np.float64)[:2]
+
+        # 沿线段按半个网格步长采样，取采样点所在网格及其邻域作为候选
+        length = np.linalg.norm(b - a)
+        num = int(np.ceil(2.0 * length / self._wall_cell)) + 1
+        samples = a + np.linspace(0.0, 1.0, num)[:, None] * (b - a)
+        cells = np.unique(np.floor(samples / self._wall_cell).astype(np.int64), axis=0)
+
+        candidates = []
+        for cx, cy in cells:
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    indices = self._wall_grid.get((cx + dx, cy + dy))
+                    if indices is not None:
+                        candidates.append(indices)
+        if not candidates:
+            return False
+
+        tris = self._wall_xy[np.unique(np.concatenate(candidates))]
+
+        # 线段与三角形三条边的相交测试（跨立实验）
+        c = tris                            # 边起点 shape=(K, 3, 2)
+        d = np.roll(tris, -1, axis=1)       # 边终点
+
+        def cross(o, u, v):
+            return (u[..., 0] - o[..., 0]) * (v[..., 1] - o[..., 1]) - \
+                   (u[..., 1] - o[..., 1]) * (v[..., 0] - o[..., 0])
+
+        d1 = cross(a, b, c)
+        d2 = cross(a, b, d)
+        d3 = cross(c, d, a)
+        d4 = cross(c, d, b)
+        hits = (d1 * d2 < 0) & (d3 * d4 < 0)
+
+        return bool(hits.any())
+
     def get_floor_bounds(self) -> Tuple[float, float, float, float]:
         """
         获取地面边界
@@ -229,12 +479,8 @@ class IndoorModel:
 
         # 判断是2D还是3D网格
         if height is not None:
-            # 2D网格：固定高度
-            xx, yy = np.meshgrid(x_coords, y_coords)
-            zz = np.full_like(xx, height)
-            points = np.stack([xx.flatten(), yy.flatten(), zz.flatten()], axis=1)
-            print(f"生成2D采样网格: {len(points)} 个点 (XY间距 {spacing}m, 固定高度 {height}m)")
-
+            # 2D网格：固定高度，视为只有一层的3D网格
+            z_coords = np.array([height], dtype=float)
         else:
             # 3D网格：多层高度
             if z_min is None or z_max is None:
@@ -249,9 +495,17 @@ class IndoorModel:
             num_z = int(np.ceil((z_max - z_min) / z_spacing)) + 1
             z_coords = np.linspace(z_min, z_max, num_z)
 
-            # 生成3D网格
-            xx, yy, zz = np.meshgrid(x_coords, y_coords, z_coords)
-            points = np.stack([xx.flatten(), yy.flatten(), zz.flatten()], axis=1)
+        # 直接写入预分配的 (N, 3) 数组，避免meshgrid生成三个完整网格再flatten复制
+        num_z = len(z_coords)
+        grid_shape = (num_x, num_y, num_z)
+        points = np.empty((num_x * num_y * num_z, 3))
+        points[:, 0] = np.broadcast_to(x_coords[:, None, None], grid_shape).ravel()
+        points[:, 1] = np.broadcast_to(y_coords[None, :, None], grid_shape).ravel()
+        points[:, 2] = np.broadcast_to(z_coords[None, None, :], grid_shape).ravel()
+
+        if height is not None:
+            print(f"生成2D采样网格: {len(points)} 个点 (XY间距 {spacing}m, 固定高度 {height}m)")
+        else:
             print(f"生成3D采样网格: {len(points)} 个点")
             print(f"  XY间距: {spacing}m, Z间距: {z_spacing}m")
             print(f"  X: [{x_min:.2f}, {x_max:.2f}], Y: [{y_min:.2f}, {y_max:.2f}], Z: [{z_min:.2f}, {z_max:.2f}]")
@@ -259,13 +513,16 @@ class IndoorModel:
 
         return points
 
-    def ray_intersect(self, ray_origins: np.ndarray, ray_directions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    def ray_intersect(self, ray_origins: np.ndarray, ray_directions: np.ndarray,
+                      first_hit: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
         射线与模型求交
 
         Args:
             ray_origins: 射线起点 shape=(N, 3)
             ray_directions: 射线方向 shape=(N, 3)
+            first_hit: 是否只返回每条射线最近的交点 (默认True)。
+                遮挡/视距判断只需要第一个交点，求交可在首次命中时提前结束
 
         Returns:
             (locations, index_ray, index_tri): 交点位置, 射线索引, 三角形索引
@@ -273,9 +530,10 @@ class IndoorModel:
         if self.mesh is None:
             raise RuntimeError("模型未加载")
 
-        locations, index_ray, index_tri = self.mesh.ray.intersects_location(
-            ray_origins=ray_origins,
-            ray_directions=ray_directions
+        locations, index_ray, index_tri = self._ray.intersects_location(
+            ray_origins=np.ascontiguousarray(ray_origins, dtype=np.float64),
+            ray_directions=np.ascontiguousarray(ray_directions, dtype=np.float64),
+            multiple_hits=not first_hit
         )
 
         return locations, index_ray, index_tri
@@ -293,18 +551,19 @@ class IndoorModel:
         return scene
 
 
-def load_model(model_path: str, unit: str = 'auto') -> IndoorModel:
+def load_model(model_path: str, unit: str = 'auto', lazy: bool = False) -> IndoorModel:
     """
     便捷函数: 加载室内模型
 
     Args:
         model_path: 模型文件路径
         unit: 模型单位 ('mm' 毫米, 'm' 米, 'auto' 自动检测), 默认 'auto'
+        lazy: 是否延迟加载网格
 
     Returns:
         IndoorModel对象
     """
-    return IndoorModel(model_path, unit)
+    return IndoorModel(model_path, unit, lazy)
 
 
 if __name__ == "__main__":
@@ -11,42 +11,83 @@ import time
 import threading
 
 
+# 每个设备保留的最大轨迹点数
+TRAJECTORY_MAXLEN = 100
+
+# 活跃设备列表缓存有效期（秒）
+ACTIVE_CACHE_TTL = 0.1
+
+
+def _mono_to_datetime(mono_time: float) -> datetime:
+    """将 time.monotonic() 时间戳换算为本地墙上时间"""
+    return datetime.fromtimestamp(time.time() - (time.monotonic() - mono_time))
+
+
 @dataclass
 class TargetDevice:
     """目标设备信息"""
     mac: str                                    # 设备标识（MAC地址/IMEI/RFID标签ID等）
     name: str = ""                              # 设备名称（可选）
     signal_type: str = "WiFi"                   # 信号类型（WiFi/蓝牙/手机信号等）
-    last_seen: datetime = field(default_factory=datetime.now)  # 最后检测时间
+    last_seen_mono: float = field(default_factory=time.monotonic)  # 最后检测时间（单调时钟，秒）
     position: Optional[np.ndarray] = None       # 当前位置 (x,y,z)
     rssi: Optional[np.ndarray] = None           # 当前RSSI值
     confidence: float = 0.0                     # 定位置信度
-    trajectory: List[Tuple[datetime, np.ndarray]] = field(default_factory=list)  # 轨迹历史
     frequency: Optional[float] = None           # 工作频率（Hz）
     tx_power: Optional[float] = None            # 发射功率（dBm）
 
+    # 轨迹环形缓冲区（预分配，update时原地写入）
+    _traj_xyz: np.ndarray = field(init=False, repr=False)
+    _traj_t: np.ndarray = field(init=False, repr=False)
+    _traj_head: int = field(default=0, init=False, repr=False)
+    _traj_len: int = field(default=0, init=False, repr=False)
+
+    def __post_init__(self):
+        self._traj_xyz = np.empty((TRAJECTORY_MAXLEN, 3))
+        self._traj_t = np.empty(TRAJECTORY_MAXLEN)  # 单调时钟时间戳
+
+    @property
+    def last_seen(self) -> datetime:
+        """最后检测时间（墙上时间，仅在外部显示时换算）"""
+        return _mono_to_datetime(self.last_seen_mono)
+
     def update(self, position: np.ndarray, rssi: np.ndarray, confidence: float):
         """更新设备状态"""
         self.position = position
         self.rssi = rssi
         self.confidence = confidence
-        self.last_seen = datetime.now()
-
-        # 保存轨迹（限制最多100个点）
-        self.trajectory.append((self.last_seen, position.copy()))
-        if len(self.trajectory) > 100:
-            self.trajectory.pop(0)
+        self.last_seen_mono = time.monotonic()
+
+        # 保存轨迹（写入环形缓冲区，满后覆盖最旧的点）
+        self._traj_xyz[self._traj_head] = position
+        self._traj_t[self._traj_head] = self.last_seen_mono
+        self._traj_head = (self._traj_head + 1) % TRAJECTORY_MAXLEN
+        self._traj_len = min(self._traj_len + 1, TRAJECTORY_MAXLEN)
+
+    def _trajectory_order(self) -> np.ndarray:
+        """轨迹点在缓冲区中按时间先后的索引"""
+        if self._traj_len < TRAJECTORY_MAXLEN:
+            return np.arange(self._traj_len)
+        return (np.arange(TRAJECTORY_MAXLEN) + self._traj_head) % TRAJECTORY_MAXLEN
+
+    @property
+    def trajectory(self) -> List[Tuple[datetime, np.ndarray]]:
+        """轨迹历史 [(时间, 位置), ...]，按时间先后排列"""
+        order = self._trajectory_order()
+        return [(_mono_to_datetime(self._traj_t[i]), self._traj_xyz[i].copy()) for i in order]
 
     def get_trajectory_array(self) -> np.ndarray:
-        """获取轨迹数组"""
-        if not self.trajectory:
-            return np.array([])
-        return np.array([pos for _, pos in self.trajectory])
+        """获取轨迹数组 shape=(N, 3)"""
+        if self._traj_len == 0:
+            return np.empty((0, 3))
+        if self._traj_len < TRAJECTORY_MAXLEN:
+            return self._traj_xyz[:self._traj_len].copy()
+        return np.concatenate((self._traj_xyz[self._traj_head:],
+                               self._traj_xyz[:self._traj_head]))
 
     def is_active(self, timeout_seconds: float = 10.0) -> bool:
         """判断设备是否活跃"""
-        elapsed = (datetime.now() - self.last_seen).total_seconds()
-        return elapsed < timeout_seconds
+        return (time.monotonic() - self.last_seen_mono) < timeout_seconds
 
 
 class DeviceTracker:
@@ -69,8 +110,16 @@ class DeviceTracker:
         self.update_interval = update_interval
         self.device_timeout = device_timeout
 
-        # 设备字典 MAC -> TargetDevice
+        # 设备字典 MAC -> TargetDevice（仅在增删设备时加锁修改）
         self.devices: Dict[str, TargetDevice] = {}
+        # 设备快照（增删设备时重建，读取方无需加锁）
+        self._devices_snapshot: Tuple[TargetDevice, ...] = ()
+        # 与快照一一对应的SoA状态数组，供统计时向量化计算
+        # (mac->下标, 置信度, 最后检测时间, 是否有位置)，整体替换以保证读取一致
+        self._device_state: Tuple[Dict[str, int], np.ndarray, np.ndarray, np.ndarray] = (
+            {}, np.zeros(0), np.zeros(0), np.zeros(0, dtype=bool))
+        # 活跃设备列表缓存 (计算时刻, 列表)，增删设备或跟踪周期结束时失效
+        self._active_cache: Tuple[float, List[TargetDevice]] = (0.0, [])
 
         # 跟踪控制
         self.is_tracking = False
@@ -102,6 +151,7 @@ class DeviceTracker:
                     frequency=frequency,
                     tx_power=tx_power
                 )
+                self._rebuild_snapshot()
                 print(f"添加跟踪设备: {mac} ({name}) - {signal_type}")
 
     def remove_device(self, mac: str):
@@ -109,6 +159,7 @@ class DeviceTracker:
         with self.lock:
             if mac in self.devices:
                 del self.devices[mac]
+                self._rebuild_snapshot()
                 print(f"移除设备: {mac}")
 
     def get_device(self, mac: str) -> Optional[TargetDevice]:
@@ -116,16 +167,43 @@ class DeviceTracker:
         with self.lock:
             return self.devices.get(mac)
 
+    def _rebuild_snapshot(self):
+        """重建设备快照及SoA状态数组（调用方需持有 self.lock）"""
+        snapshot = tuple(self.devices.values())
+        self._device_state = (
+            {dev.mac: i for i, dev in enumerate(snapshot)},
+            np.array([dev.confidence for dev in snapshot], dtype=float),
+            np.array([dev.last_seen_mono for dev in snapshot], dtype=float),
+            np.array([dev.position is not None for dev in snapshot], dtype=bool),
+        )
+        self._devices_snapshot = snapshot
+        self._active_cache = (0.0, [])
+
+    def _sync_device_state(self, device: TargetDevice):
+        """将设备最新状态写入SoA数组（调用方需持有 self.lock）"""
+        index, conf, last_seen, has_pos = self._device_state
+        i = index.get(device.mac)
+        if i is None:
+            return
+        conf[i] = device.confidence
+        last_seen[i] = device.last_seen_mono
+        has_pos[i] = device.position is not None
+
     def get_all_devices(self) -> List[TargetDevice]:
         """获取所有设备"""
-        with self.lock:
-            return list(self.devices.values())
+        return list(self._devices_snapshot)
 
     def get_active_devices(self) -> List[TargetDevice]:
-        """获取活跃设备"""
-        with self.lock:
-            return [dev for dev in self.devices.values()
-                   if dev.is_active(self.device_timeout)]
+        """获取活跃设备（结果缓存 ACTIVE_CACHE_TTL 秒）"""
+        now = time.monotonic()
+        cached_time, cached = self._active_cache
+        if now - cached_time < ACTIVE_CACHE_TTL:
+            return list(cached)
+
+        active = [dev for dev in self._devices_snapshot
+                  if dev.is_active(self.device_timeout)]
+        self._active_cache = (now, active)
+        return list(active)
 
     def update_device_location(self, mac: str) -> bool:
         """
@@ -151,12 +229,16 @@ class DeviceTracker:
             # 更新设备信息
             with self.lock:
                 if mac in self.devices:
-                    self.devices[mac].update(position, rssi, confidence)
+                    device = self.devices[mac]
+                    device.update(position, rssi, confidence)
+                    self._sync_device_state(device)
+                    self._active_cache = (0.0, [])
                 else:
                     # 自动添加新设备
                     device = TargetDevice(mac=mac)
                     device.update(position, rssi, confidence)
                     self.devices[mac] = device
+                    self._rebuild_snapshot()
 
             return True
 
@@ -164,20 +246,59 @@ class DeviceTracker:
             print(f"定位设备 {mac} 失败: {e}")
             return False
 
+    def _tick_batch(self):
+        """
+        批量更新所有已知设备位置（一次采集、一次定位）
+
+        单设备更新请使用 update_device_location
+        """
+        macs = list(self.devices.keys())
+        if not macs:
+            return
+
+        # 批量采集RSSI（未检测到的设备被跳过）
+        rssi_by_mac = self.signal_collector.collect_rssi_batch(macs)
+        self._apply_batch(rssi_by_mac)
+
+    def _apply_batch(self, rssi_by_mac: Dict[str, np.ndarray]):
+        """对一批采集结果执行批量定位并写回设备状态"""
+        if not rssi_by_mac:
+            return
+
+        found_macs = list(rssi_by_mac.keys())
+        rssi_matrix = np.array([rssi_by_mac[mac] for mac in found_macs])
+
+        # 批量定位
+        try:
+            positions, confidences = self.localization_engine.locate_batch(rssi_matrix)
+        except Exception as e:
+            print(f"批量定位失败: {e}")
+            return
+
+        # 更新设备信息
+        with self.lock:
+            for i, mac in enumerate(found_macs):
+                device = self.devices.get(mac)
+                if device is None:
+                    continue  # 设备已在采集期间被移除
+                device.update(positions[i], rssi_matrix[i], float(confidences[i]))
+                self._sync_device_state(device)
+            self._active_cache = (0.0, [])
+
+    def _add_discovered(self, discovered_macs: List[str]):
+        """添加扫描到的新设备"""
+        for mac in discovered_macs:
+            if mac not in self.devices:
+                self.add_device(mac, f"Device_{mac[-5:]}")
+
     def auto_discover_and_track(self):
         """自动发现并跟踪所有设备"""
         try:
-            # 扫描设备
-            discovered_macs = self.signal_collector.scan_devices()
+            # 扫描设备并添加新设备
+            self._add_discovered(self.signal_collector.scan_devices())
 
-            # 添加新设备
-            for mac in discovered_macs:
-                if mac not in self.devices:
-                    self.add_device(mac, f"Device_{mac[-5:]}")
-
-            # 更新所有已知设备
-            for mac in list(self.devices.keys()):
-                self.update_device_location(mac)
+            # 批量更新所有已知设备
+            self._tick_batch()
 
         except Exception as e:
             print(f"自动发现设备失败: {e}")
@@ -203,8 +324,7 @@ class DeviceTracker:
                         self.auto_discover_and_track()
                     else:
                         # 只更新已知设备
-                        for mac in list(self.devices.keys()):
-                            self.update_device_location(mac)
+                        self._tick_batch()
 
                     time.sleep(self.update_interval)
 
@@ -225,27 +345,23 @@ class DeviceTracker:
 
     def get_statistics(self) -> Dict:
         """获取跟踪统计信息"""
-        with self.lock:
-            total_devices = len(self.devices)
-            active_devices = len([d for d in self.devices.values()
-                                 if d.is_active(self.device_timeout)])
-
-            positions = []
-            confidences = []
-            for device in self.devices.values():
-                if device.position is not None and device.is_active(self.device_timeout):
-                    positions.append(device.position)
-                    confidences.append(device.confidence)
-
-            avg_confidence = np.mean(confidences) if confidences else 0.0
-
-            return {
-                'total_devices': total_devices,
-                'active_devices': active_devices,
-                'inactive_devices': total_devices - active_devices,
-                'avg_confidence': avg_confidence,
-                'tracked_positions': len(positions)
-            }
+        _, conf, last_seen, has_pos = self._device_state
+
+        now = time.monotonic()
+        active = (now - last_seen) < self.device_timeout
+        tracked = active & has_pos
+
+        total_devices = len(conf)
+        active_devices = int(active.sum())
+        avg_confidence = float(conf[tracked].mean()) if tracked.any() else 0.0
+
+        return {
+            'total_devices': total_devices,
+            'active_devices': active_devices,
+            'inactive_devices': total_devices - active_devices,
+            'avg_confidence': avg_confidence,
+            'tracked_positions': int(tracked.sum())
+        }
 
     def export_trajectory(self, mac: str, format: str = 'numpy') -> Optional[np.ndarray]:
         """
@@ -272,12 +388,13 @@ class DeviceTracker:
     def clear_inactive_devices(self):
         """清除不活跃的设备"""
         with self.lock:
-            inactive = [mac for mac, dev in self.devices.items()
-                       if not dev.is_active(self.device_timeout)]
-            for mac in inactive:
-                del self.devices[mac]
-            if inactive:
-                print(f"清除 {len(inactive)} 个不活跃设备")
+            active = {mac: dev for mac, dev in self.devices.items()
+                      if dev.is_active(self.device_timeout)}
+            removed = len(self.devices) - len(active)
+            if removed > 0:
+                self.devices = active
+                self._rebuild_snapshot()
+                print(f"清除 {removed} 个不活跃设备")
 
 
 if __name__ == "__main__":
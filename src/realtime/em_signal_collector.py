@@ -7,6 +7,23 @@ import numpy as np
 from typing import Dict, List, Optional, Tuple
 from abc import ABC, abstractmethod
 import time
+import sys
+import math
+import socket
+import functools
+import selectors
+
+if __package__:
+    from .signal_collector import (_pathloss_rssi, _pathloss_batch, _NoiseBuffer, _FingerprintLookup,
+                                   _encode_json, _decode_json, _exchange)
+else:
+    # 作为脚本直接运行（python src/realtime/em_signal_collector.py）时没有包上下文，从同目录导入
+    from signal_collector import (_pathloss_rssi, _pathloss_batch, _NoiseBuffer, _FingerprintLookup,
+                                  _encode_json, _decode_json, _exchange)
+
+
+# 批量查询请求的最大负载（字节），保证单个UDP数据报不超过以太网MTU
+BATCH_PAYLOAD_LIMIT = 1400
 
 
 class SignalType:
@@ -78,6 +95,29 @@ class EMTarget:
             self.tx_power = tx_power if tx_power is not None else 20.0
             self.path_loss_exponent = path_loss_exponent if path_loss_exponent is not None else 2.0
 
+    @property
+    def frequency(self) -> float:
+        """工作频率（Hz）"""
+        return self._frequency
+
+    @frequency.setter
+    def frequency(self, value: float):
+        self._frequency = value
+        # 参考距离(1米)处的路径损耗，仅随频率变化
+        self._pl0 = 20.0 * math.log10(4 * math.pi * value / 3e8)
+
+    @property
+    def path_loss_exponent(self) -> float:
+        """路径损耗指数"""
+        return self._path_loss_exponent
+
+    @path_loss_exponent.setter
+    def path_loss_exponent(self, value: float):
+        self._path_loss_exponent = value
+        self._10n = 10.0 * value
+        # 阴影衰落标准差：环境越复杂，标准差越大
+        self._shadow_sigma = 4.0 + 2.0 * (value - 2.0)
+
     def __repr__(self):
         return f"EMTarget({self.identifier}, {self.signal_type}, freq={self.frequency/1e9:.2f}GHz)"
 
@@ -96,26 +136,66 @@ class UniversalEMSignalCollector:
             ray_tracer: 射线追踪器（可选）
         """
         self.receiver_positions = receiver_positions
-        self.num_receivers = len(receiver_positions)
         self.fingerprint_db = fingerprint_db
+        self._fingerprint_lookup = _FingerprintLookup()
+        self._noise = _NoiseBuffer()
         self.ray_tracer = ray_tracer
 
         # 电磁信号源列表
         self.em_targets: Dict[str, EMTarget] = {}
+        # 目标整数索引表：高频轮询时可用 collect_rssi_idx 按下标取目标，跳过字符串哈希
+        self._targets_by_idx: List[EMTarget] = []
+        self._id_to_idx: Dict[str, int] = {}
 
         print(f"通用电磁信号采集器初始化完成")
         print(f"  接收器数量: {self.num_receivers}")
         print(f"  支持信号类型: {', '.join([SignalType.WIFI, SignalType.BLUETOOTH, SignalType.CELLULAR, SignalType.RFID, SignalType.ZIGBEE, SignalType.LORA, SignalType.UWB])}")
 
+    @property
+    def receiver_positions(self) -> List[Tuple[float, float, float]]:
+        """接收器位置列表 [(x,y,z), ...]"""
+        return [tuple(pos) for pos in self._rx_array.tolist()]
+
+    @receiver_positions.setter
+    def receiver_positions(self, positions: List[Tuple[float, float, float]]):
+        # 以连续的 (num_receivers, 3) 数组保存，供向量化计算使用
+        self._rx_array = np.ascontiguousarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.num_receivers = len(self._rx_array)
+
     def add_em_target(self, target: EMTarget):
         """
         添加电磁信号源
 
         Args:
             target: EMTarget对象
+
+        Returns:
+            目标的整数索引，可用于 collect_rssi_idx
         """
-        self.em_targets[target.identifier] = target
+        identifier = sys.intern(target.identifier)
+        self.em_targets[identifier] = target
+        idx = self._id_to_idx.get(identifier)
+        if idx is None:
+            idx = len(self._targets_by_idx)
+            self._id_to_idx[identifier] = idx
+            self._targets_by_idx.append(target)
+        else:
+            # 同一标识重复添加时替换目标，索引保持不变
+            self._targets_by_idx[idx] = target
         print(f"添加电磁信号源: {target}")
+        return idx
+
+    def get_target_index(self, identifier: str) -> Optional[int]:
+        """
+        查询目标的整数索引
+
+        Args:
+            identifier: 目标标识
+
+        Returns:
+            整数索引，未添加过的目标返回None
+        """
+        return self._id_to_idx.get(identifier)
 
     def add_target(self, target: EMTarget):
         """
@@ -124,7 +204,7 @@ class UniversalEMSignalCollector:
         Args:
             target: EMTarget对象
         """
-        self.add_em_target(target)
+        return self.add_em_target(target)
 
     def add_target_simple(self, identifier: str, signal_type: str, position: np.ndarray):
         """
@@ -153,11 +233,25 @@ class UniversalEMSignalCollector:
         Returns:
             RSSI数组 shape=(num_receivers,) 或 None
         """
-        if identifier not in self.em_targets:
+        target = self.em_targets.get(identifier)
+        if target is None:
             return None
+        return self._collect_target(target)
 
-        target = self.em_targets[identifier]
+    def collect_rssi_idx(self, idx: int) -> Optional[np.ndarray]:
+        """
+        按整数索引采集信号强度（跳过标识字典查找，适合高频轮询固定目标集）
+
+        Args:
+            idx: add_em_target 返回的目标索引
+
+        Returns:
+            RSSI数组 shape=(num_receivers,) 或 None
+        """
+        return self._collect_target(self._targets_by_idx[idx])
 
+    def _collect_target(self, target: EMTarget) -> Optional[np.ndarray]:
+        """采集单个目标的信号强度"""
         if target.position is None:
             return None
 
@@ -166,7 +260,7 @@ class UniversalEMSignalCollector:
             rssi = self._get_rssi_from_fingerprint(target.position)
             if rssi is not None:
                 # 添加测量噪声
-                noise = np.random.normal(0, 2.0, size=rssi.shape)
+                noise = 2.0 * self._noise.draw(rssi.size).reshape(rssi.shape)
                 return rssi + noise
 
         # 方法2: 使用射线追踪仿真（如果可用）
@@ -178,25 +272,53 @@ class UniversalEMSignalCollector:
         # 方法3: 使用路径损耗模型（默认）
         return self._get_rssi_from_path_loss_model(target)
 
-    def _get_rssi_from_fingerprint(self, position: np.ndarray) -> Optional[np.ndarray]:
-        """从指纹库查询RSSI"""
-        positions, rssi_matrix = self.fingerprint_db.get_all_fingerprints()
-        distances = np.linalg.norm(positions - position, axis=1)
-        nearest_idx = np.argmin(distances)
+    def collect_rssi_batch(self, identifiers: List[str]) -> Dict[str, np.ndarray]:
+        """
+        批量采集多个目标的信号强度
 
-        # 如果距离太远（>2米），返回None
-        if distances[nearest_idx] > 2.0:
-            return None
+        Args:
+            identifiers: 目标标识列表
 
-        return rssi_matrix[nearest_idx].copy()
+        Returns:
+            {目标标识: RSSI数组}，无法采集的目标不包含在内
+        """
+        if self.fingerprint_db is not None or self.ray_tracer is not None:
+            result = {}
+            for identifier in identifiers:
+                rssi = self.collect_rssi(identifier)
+                if rssi is not None:
+                    result[identifier] = rssi
+            return result
+
+        # 仅路径损耗模型：一次计算所有目标 × 所有接收器的 (M, N) RSSI矩阵
+        targets = [self.em_targets[i] for i in identifiers
+                   if i in self.em_targets and self.em_targets[i].position is not None]
+        if not targets:
+            return {}
+
+        tgt_pos = np.array([t.position for t in targets], dtype=np.float64)
+        tx_power = np.array([t.tx_power for t in targets])
+        pl0 = np.array([t._pl0 for t in targets])
+        n10 = np.array([t._10n for t in targets])
+        sigma = np.array([t._shadow_sigma for t in targets])
+
+        noise = self._noise.draw(len(targets) * self.num_receivers).reshape(
+            len(targets), self.num_receivers)
+        rssi = _pathloss_batch(tgt_pos, self._rx_array, tx_power, pl0, n10, sigma, noise)
+
+        return dict(zip((t.identifier for t in targets), rssi))
+
+    def _get_rssi_from_fingerprint(self, position: np.ndarray) -> Optional[np.ndarray]:
+        """从指纹库查询RSSI（最近指纹点距离超过2米时返回None）"""
+        return self._fingerprint_lookup.query(self.fingerprint_db, position)
 
     def _get_rssi_from_simulation(self, target: EMTarget) -> Optional[np.ndarray]:
         """通过射线追踪仿真RSSI"""
-        rssi_values = []
-        for rx_pos in self.receiver_positions:
-            rssi = self.ray_tracer.compute_rssi(rx_pos, target.position)
-            rssi_values.append(rssi)
-        return np.array(rssi_values)
+        # 直接写入输出数组（调用方会保留结果，因此每次新分配而非复用缓冲区）
+        rssi = np.empty(self.num_receivers)
+        for i, rx_pos in enumerate(self._rx_array):
+            rssi[i] = self.ray_tracer.compute_rssi(rx_pos, target.position)
+        return rssi
 
     def _get_rssi_from_path_loss_model(self, target: EMTarget) -> np.ndarray:
         """
@@ -205,33 +327,12 @@ class UniversalEMSignalCollector:
         Friis公式: RSSI(dBm) = Pt - PL
         其中 PL = 20*log10(d) + 20*log10(f) + 20*log10(4π/c) + X_σ
         """
-        rssi_values = []
-
-        for rx_pos in self.receiver_positions:
-            distance = np.linalg.norm(np.array(rx_pos) - target.position)
-            distance = max(distance, 0.1)  # 避免除零
-
-            # 计算路径损耗
-            # 使用简化公式: PL(dB) = PL0 + 10*n*log10(d/d0) + X_σ
-            d0 = 1.0  # 参考距离 1米
-            frequency_ghz = target.frequency / 1e9
-
-            # 参考距离的路径损耗
-            pl0 = 20 * np.log10(4 * np.pi * d0 * frequency_ghz * 1e9 / 3e8)
+        # 使用简化公式: PL(dB) = PL0 + 10*n*log10(d/d0) + X_σ，参考距离 d0 = 1米
+        # PL0、10n 与阴影衰落标准差已缓存在目标上
+        noise = target._shadow_sigma * self._noise.draw(self.num_receivers)
 
-            # 总路径损耗
-            path_loss = pl0 + 10 * target.path_loss_exponent * np.log10(distance / d0)
-
-            # 计算RSSI
-            rssi = target.tx_power - path_loss
-
-            # 添加阴影衰落（对数正态分布）
-            shadow_fading_std = 4.0 + 2.0 * (target.path_loss_exponent - 2.0)  # 环境越复杂，标准差越大
-            rssi += np.random.normal(0, shadow_fading_std)
-
-            rssi_values.append(rssi)
-
-        return np.array(rssi_values)
+        return _pathloss_rssi(self._rx_array, np.asarray(target.position, dtype=np.float64),
+                              target.tx_power, target._pl0, target._10n, noise)
 
     def scan_targets(self, signal_type: Optional[str] = None) -> List[str]:
         """
@@ -294,7 +395,9 @@ class RealEMSignalCollector:
     def __init__(self, receiver_positions: List[Tuple[float, float, float]],
                  receiver_addresses: List[str],
                  receiver_port: int = 9999,
-                 protocol: str = 'udp'):
+                 protocol: str = 'udp',
+                 batch_protocol: bool = False,
+                 scan_ttl: float = 0.5):
         """
         初始化
 
@@ -303,20 +406,27 @@ class RealEMSignalCollector:
             receiver_addresses: 接收器IP地址列表
             receiver_port: 通信端口
             protocol: 通信协议 ('udp' 或 'tcp')
+            batch_protocol: 接收器是否支持 get_rssi_batch 批量查询命令。
+                启用后批量采集时多个目标合并为一个请求发送
+            scan_ttl: 扫描结果缓存有效期（秒），有效期内重复扫描直接返回上次结果，
+                设为0禁用缓存
         """
         self.receiver_positions = receiver_positions
         self.receiver_addresses = receiver_addresses
         self.receiver_port = receiver_port
         self.protocol = protocol
+        self.batch_protocol = batch_protocol
+        # 扫描结果是否为 (标识, 信号类型) 对，由首次非空扫描响应确定
+        self._scan_returns_tuples: Optional[bool] = None
+        # 扫描结果缓存: (信号类型, 目标列表, 扫描时刻)
+        self.scan_ttl = scan_ttl
+        self._scan_cache: Tuple[Optional[str], Optional[list], float] = (None, None, 0.0)
         self.num_receivers = len(receiver_positions)
 
         if len(receiver_addresses) != len(receiver_positions):
             raise ValueError("接收器地址数量必须与位置数量一致")
 
         # 创建socket连接
-        import socket
-        import json
-
         self.sockets = []
         for i, addr in enumerate(receiver_addresses):
             try:
@@ -325,18 +435,52 @@ class RealEMSignalCollector:
                 else:
                     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                     sock.connect((addr, receiver_port))
+                # 响应由selector等待，超时只在创建时设置一次，用于限制发送阻塞
+                sock.settimeout(1.0)
                 self.sockets.append(sock)
                 print(f"已连接到接收器{i+1}: {addr}:{receiver_port}")
             except Exception as e:
                 print(f"警告: 无法连接到接收器{i+1} ({addr}): {e}")
                 self.sockets.append(None)
 
+        # 所有socket注册到同一selector，并发等待各接收器响应
+        self._selector = selectors.DefaultSelector()
+        for i, sock in enumerate(self.sockets):
+            if sock is not None:
+                self._selector.register(sock, selectors.EVENT_READ, data=i)
+
         print(f"真实电磁信号采集器初始化完成")
         print(f"  已连接接收器数量: {sum(1 for s in self.sockets if s is not None)}/{self.num_receivers}")
 
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _encode_request(command: str, identifier: Optional[str] = None,
+                        signal_type: Optional[str] = None) -> bytes:
+        """
+        编码查询请求（相同参数的请求字节串被缓存复用）
+
+        Args:
+            command: 命令名
+            identifier: 目标标识（可选）
+            signal_type: 信号类型
+
+        Returns:
+            请求字节串
+        """
+        request = {'command': command}
+        if identifier is not None:
+            request['target_id'] = identifier
+        request['signal_type'] = signal_type
+        return _encode_json(request)
+
+    def _exchange(self, payload: bytes, timeout: float) -> List[Optional[bytes]]:
+        """向所有接收器发送请求并并发收取响应"""
+        return _exchange(self._selector, self.sockets, self.receiver_addresses,
+                         self.receiver_port, self.protocol, payload, timeout, '接收器')
+
     def collect_rssi(self, identifier: str, signal_type: str = SignalType.WIFI) -> Optional[np.ndarray]:
         """
-        从真实接收器采集RSSI
+        从真实接收器采集RSSI（并发查询所有接收器）
 
         Args:
             identifier: 目标标识
@@ -345,42 +489,18 @@ class RealEMSignalCollector:
         Returns:
             RSSI数组或None
         """
-        import socket
-        import json
+        # 所有接收器收到相同的查询请求，只编码一次
+        payload = self._encode_request('get_rssi', identifier, signal_type)
 
         rssi_values = []
-
-        for i, sock in enumerate(self.sockets):
-            if sock is None:
+        for i, data in enumerate(self._exchange(payload, 1.0)):
+            if data is None:
                 rssi_values.append(-100.0)
                 continue
-
             try:
-                # 向接收器发送查询请求
-                request = {
-                    'command': 'get_rssi',
-                    'target_id': identifier,
-                    'signal_type': signal_type
-                }
-
-                if self.protocol == 'udp':
-                    sock.sendto(json.dumps(request).encode(),
-                               (self.receiver_addresses[i], self.receiver_port))
-                    sock.settimeout(1.0)
-                    data, _ = sock.recvfrom(1024)
-                else:
-                    sock.sendall(json.dumps(request).encode() + b'\n')
-                    sock.settimeout(1.0)
-                    data = sock.recv(1024)
-
                 # 解析响应
-                response = json.loads(data.decode())
-                rssi = response.get('rssi', -100.0)
-                rssi_values.append(rssi)
-
-            except socket.timeout:
-                print(f"警告: 接收器{i+1} 超时")
-                rssi_values.append(-100.0)
+                response = _decode_json(data)
+                rssi_values.append(response.get('rssi', -100.0))
             except Exception as e:
                 print(f"警告: 接收器{i+1} 采集失败: {e}")
                 rssi_values.append(-100.0)
@@ -393,6 +513,70 @@ class RealEMSignalCollector:
 
         return rssi_array
 
+    def collect_rssi_batch(self, identifiers: List[str],
+                           signal_type: str = SignalType.WIFI) -> Dict[str, np.ndarray]:
+        """
+        批量从真实接收器采集RSSI
+
+        Args:
+            identifiers: 目标标识列表
+            signal_type: 信号类型
+
+        Returns:
+            {目标标识: RSSI数组}，未检测到的目标不包含在内
+        """
+        if not self.batch_protocol:
+            result = {}
+            for identifier in identifiers:
+                rssi = self.collect_rssi(identifier, signal_type)
+                if rssi is not None:
+                    result[identifier] = rssi
+            return result
+
+        if not identifiers:
+            return {}
+
+        # 按负载上限把目标标识合并为若干批量请求
+        requests = []
+        header_size = len(_encode_json({'command': 'get_rssi_batch', 'target_ids': [],
+                                        'signal_type': signal_type}))
+        chunk, size = [], header_size
+        for identifier in identifiers:
+            item_size = len(_encode_json(identifier)) + 1
+            if chunk and size + item_size > BATCH_PAYLOAD_LIMIT:
+                requests.append({'command': 'get_rssi_batch', 'target_ids': chunk,
+                                 'signal_type': signal_type})
+                chunk, size = [], header_size
+            chunk.append(identifier)
+            size += item_size
+        requests.append({'command': 'get_rssi_batch', 'target_ids': chunk,
+                         'signal_type': signal_type})
+
+        # 每批请求只编码一次，同时发给所有接收器并发收取
+        rssi_matrix = np.full((len(identifiers), len(self.sockets)), -100.0)
+        offset = 0
+        for request in requests:
+            count = len(request['target_ids'])
+            responses = self._exchange(_encode_json(request), 1.0)
+            for i, data in enumerate(responses):
+                if data is None:
+                    continue
+                try:
+                    # 响应格式: {'rssi': [目标1的RSSI, 目标2的RSSI, ...]}
+                    rssi = _decode_json(data).get('rssi', [])
+                    if len(rssi) == count:
+                        rssi_matrix[offset:offset + count, i] = rssi
+                    else:
+                        print(f"警告: 接收器{i+1} 批量响应数量不匹配")
+                except Exception as e:
+                    print(f"警告: 接收器{i+1} 采集失败: {e}")
+            offset += count
+
+        # 所有接收器都是最弱信号的目标视为不存在
+        detected = ~np.all(rssi_matrix <= -99, axis=1)
+        return {identifier: rssi_matrix[k] for k, identifier in enumerate(identifiers)
+                if detected[k]}
+
     def scan_targets(self, signal_type: Optional[str] = None) -> List[Tuple[str, str]]:
         """
         扫描环境中的所有电磁信号源
@@ -403,40 +587,35 @@ class RealEMSignalCollector:
         Returns:
             (标识, 信号类型) 元组列表
         """
-        import socket
-        import json
+        cached_type, cached_targets, cached_at = self._scan_cache
+        if (cached_targets is not None and cached_type == signal_type
+                and time.monotonic() - cached_at < self.scan_ttl):
+            return list(cached_targets)
 
         targets_set = set()
 
-        for i, sock in enumerate(self.sockets):
-            if sock is None:
-                continue
+        # 向接收器请求设备列表（扫描响应较慢，超时放宽到2秒）
+        payload = self._encode_request('scan_targets', None, signal_type)
 
+        for i, data in enumerate(self._exchange(payload, 2.0)):
+            if data is None:
+                continue
             try:
-                # 向接收器请求设备列表
-                request = {
-                    'command': 'scan_targets',
-                    'signal_type': signal_type
-                }
-
-                if self.protocol == 'udp':
-                    sock.sendto(json.dumps(request).encode(),
-                               (self.receiver_addresses[i], self.receiver_port))
-                    sock.settimeout(2.0)
-                    data, _ = sock.recvfrom(4096)
-                else:
-                    sock.sendall(json.dumps(request).encode() + b'\n')
-                    sock.settimeout(2.0)
-                    data = sock.recv(4096)
-
-                response = json.loads(data.decode())
+                response = _decode_json(data)
                 targets = response.get('targets', [])  # [(id, signal_type), ...]
-                targets_set.update(targets)
-
+                if self._scan_returns_tuples is None and targets:
+                    self._scan_returns_tuples = isinstance(targets[0], (list, tuple))
+                if self._scan_returns_tuples:
+                    # JSON中的 [id, signal_type] 转为可哈希的元组
+                    targets_set.update(map(tuple, targets))
+                else:
+                    targets_set.update(targets)
             except Exception as e:
                 print(f"警告: 接收器{i+1} 扫描失败: {e}")
 
-        return list(targets_set)
+        targets = list(targets_set)
+        self._scan_cache = (signal_type, targets, time.monotonic())
+        return list(targets)
 
     def scan_devices(self) -> List[str]:
         """
@@ -447,12 +626,15 @@ class RealEMSignalCollector:
         """
         targets = self.scan_targets()
         # 从 [(id, signal_type), ...] 提取出 [id, ...]
-        if targets and isinstance(targets[0], tuple):
+        if self._scan_returns_tuples:
             return [t[0] for t in targets]
         return targets
 
     def __del__(self):
         """清理资源"""
+        selector = getattr(self, '_selector', None)
+        if selector is not None:
+            selector.close()
         for sock in self.sockets:
             if sock is not None:
                 try:
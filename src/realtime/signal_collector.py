@@ -7,8 +7,273 @@ import numpy as np
 from typing import Dict, List, Optional, Tuple
 from abc import ABC, abstractmethod
 import time
+import math
 import socket
 import json
+import functools
+import selectors
+import weakref
+from scipy.spatial import cKDTree
+
+# 可选依赖: orjson加速请求/响应的JSON编解码 (pip install orjson)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 可选依赖: Numba JIT加速路径损耗计算 (pip install numba)
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+if orjson is not None:
+    _encode_json = orjson.dumps
+    _decode_json = orjson.loads
+else:
+    def _encode_json(obj) -> bytes:
+        """JSON编码为字节串"""
+        return json.dumps(obj).encode()
+
+    def _decode_json(data: bytes):
+        """从字节串解码JSON"""
+        return json.loads(data)
+
+
+def _exchange(selector: selectors.BaseSelector, sockets: List, addresses: List[str],
+              port: int, protocol: str, payload: bytes, timeout: float,
+              label: str) -> List[Optional[bytes]]:
+    """
+    向所有接收端发送同一请求，再通过selector并发收取响应
+
+    先依次发送，再在同一截止时间内读取已就绪的socket，
+    总等待时间不随接收端数量叠加
+
+    Args:
+        selector: 已注册全部socket的selector（data为socket索引）
+        sockets: socket列表（未连接的为None）
+        addresses: 接收端地址列表
+        port: 通信端口
+        protocol: 'udp' 或 'tcp'
+        payload: 已编码的请求
+        timeout: 超时时间（秒）
+        label: 警告信息中的接收端名称
+
+    Returns:
+        各接收端的响应字节串，未连接、超时或失败的为None
+    """
+    responses: List[Optional[bytes]] = [None] * len(sockets)
+    pending = set()
+
+    for i, sock in enumerate(sockets):
+        if sock is None:
+            continue
+        try:
+            if protocol == 'udp':
+                sock.sendto(payload, (addresses[i], port))
+            else:
+                sock.sendall(payload + b'\n')
+            pending.add(i)
+        except Exception as e:
+            print(f"警告: {label}{i+1} 发送失败: {e}")
+
+    deadline = time.monotonic() + timeout
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        for key, _ in selector.select(timeout=remaining):
+            i = key.data
+            try:
+                data = key.fileobj.recv(65536)
+            except Exception as e:
+                print(f"警告: {label}{i+1} 接收失败: {e}")
+                pending.discard(i)
+                continue
+            if protocol != 'udp' and not data:
+                # TCP连接已关闭，注销避免反复就绪
+                print(f"警告: {label}{i+1} 连接已关闭")
+                selector.unregister(key.fileobj)
+                pending.discard(i)
+                continue
+            # 不在等待中的socket读到的是此前超时请求的迟到响应，直接丢弃
+            if i in pending:
+                responses[i] = data
+                pending.discard(i)
+
+    for i in sorted(pending):
+        print(f"警告: {label}{i+1} 超时")
+
+    return responses
+
+
+def _pathloss_rssi_numpy(rx_xyz: np.ndarray, tgt_xyz: np.ndarray, tx_power: float,
+                         pl0: float, n10: float, noise: np.ndarray) -> np.ndarray:
+    """
+    对数距离路径损耗模型: RSSI = Pt - PL0 - 10n*log10(d) + X_σ
+
+    Args:
+        rx_xyz: 接收器位置 shape=(N, 3)
+        tgt_xyz: 目标位置 shape=(3,)
+        tx_power: 发射功率 (dBm)
+        pl0: 参考距离(1米)处的路径损耗 (dB)
+        n10: 10 * 路径损耗指数
+        noise: 阴影衰落 shape=(N,)
+
+    Returns:
+        RSSI数组 shape=(N,)
+    """
+    distances = np.maximum(np.linalg.norm(rx_xyz - tgt_xyz, axis=1), 0.1)  # 避免除零
+    return tx_power - pl0 - n10 * np.log10(distances) + noise
+
+
+def _pathloss_batch_numpy(tgt_xyz: np.ndarray, rx_xyz: np.ndarray, tx_power: np.ndarray,
+                          pl0: np.ndarray, n10: np.ndarray, sigma: np.ndarray,
+                          noise: np.ndarray) -> np.ndarray:
+    """
+    多目标路径损耗模型，一次计算 (M, N) RSSI矩阵
+
+    Args:
+        tgt_xyz: 目标位置 shape=(M, 3)
+        rx_xyz: 接收器位置 shape=(N, 3)
+        tx_power: 各目标发射功率 shape=(M,)
+        pl0: 各目标参考距离处的路径损耗 shape=(M,)
+        n10: 各目标的 10 * 路径损耗指数 shape=(M,)
+        sigma: 各目标阴影衰落标准差 shape=(M,)
+        noise: 标准正态噪声 shape=(M, N)
+
+    Returns:
+        RSSI矩阵 shape=(M, N)
+    """
+    diff = tgt_xyz[:, None, :] - rx_xyz[None, :, :]
+    distances = np.maximum(np.linalg.norm(diff, axis=2), 0.1)  # 避免除零
+    return (tx_power[:, None] - pl0[:, None] - n10[:, None] * np.log10(distances)
+            + sigma[:, None] * noise)
+
+
+if njit is not None:
+    from numba import prange
+
+    @njit(cache=True, fastmath=True)
+    def _pathloss_rssi(rx_xyz, tgt_xyz, tx_power, pl0, n10, noise):
+        """路径损耗模型的Numba内核（参数同 _pathloss_rssi_numpy）"""
+        n = rx_xyz.shape[0]
+        out = np.empty(n)
+        for i in range(n):
+            dx = rx_xyz[i, 0] - tgt_xyz[0]
+            dy = rx_xyz[i, 1] - tgt_xyz[1]
+            dz = rx_xyz[i, 2] - tgt_xyz[2]
+            d = max(math.sqrt(dx * dx + dy * dy + dz * dz), 0.1)
+            out[i] = tx_power - pl0 - n10 * math.log10(d) + noise[i]
+        return out
+
+    @njit(parallel=True, cache=True, fastmath=True)
+    def _pathloss_batch(tgt_xyz, rx_xyz, tx_power, pl0, n10, sigma, noise):
+        """多目标路径损耗的Numba内核，按目标并行（参数同 _pathloss_batch_numpy）"""
+        m_count = tgt_xyz.shape[0]
+        n_count = rx_xyz.shape[0]
+        out = np.empty((m_count, n_count))
+        for m in prange(m_count):
+            for r in range(n_count):
+                dx = tgt_xyz[m, 0] - rx_xyz[r, 0]
+                dy = tgt_xyz[m, 1] - rx_xyz[r, 1]
+                dz = tgt_xyz[m, 2] - rx_xyz[r, 2]
+                d = max(math.sqrt(dx * dx + dy * dy + dz * dz), 0.1)
+                out[m, r] = tx_power[m] - pl0[m] - n10[m] * math.log10(d) + sigma[m] * noise[m, r]
+        return out
+else:
+    _pathloss_rssi = _pathloss_rssi_numpy
+    _pathloss_batch = _pathloss_batch_numpy
+
+
+class _NoiseBuffer:
+    """预生成的标准正态噪声环形缓冲区，减少高频采样时的随机数生成调用"""
+
+    def __init__(self, size: int = 65536, seed: Optional[int] = None):
+        """
+        初始化
+
+        Args:
+            size: 缓冲区长度
+            seed: 随机种子（可选）
+        """
+        self._rng = np.random.default_rng(seed)
+        self._buf = self._rng.standard_normal(size)
+        self._pos = 0
+
+    def draw(self, n: int) -> np.ndarray:
+        """
+        取出n个标准正态样本（只读视图，使用时需乘以标准差）
+
+        Args:
+            n: 样本数量
+
+        Returns:
+            样本数组 shape=(n,)
+        """
+        size = len(self._buf)
+        if n > size:
+            return self._rng.standard_normal(n)
+        if self._pos + n > size:
+            # 用尽后整体重新生成
+            self._rng.standard_normal(out=self._buf)
+            self._pos = 0
+        out = self._buf[self._pos:self._pos + n]
+        self._pos += n
+        return out
+
+
+class _FingerprintLookup:
+    """指纹库最近邻查询（KD树索引，指纹库对象或版本变化后自动重建）"""
+
+    def __init__(self, max_distance: float = 2.0):
+        """
+        初始化
+
+        Args:
+            max_distance: 最大匹配距离（米），超出则视为无指纹
+        """
+        self.max_distance = max_distance
+        # cKDTree 的 distance_upper_bound 为开区间，取略大于阈值的值使距离恰为阈值的点仍可匹配
+        self._search_radius = np.nextafter(max_distance, np.inf)
+        # 建立索引时的指纹库（弱引用，不延长其生命周期，也不会因id复用误用旧索引）及其版本
+        self._db_ref = None
+        self._version = None
+        self._tree = None
+        self._rssi_matrix = None
+
+    def query(self, fingerprint_db, position: np.ndarray) -> Optional[np.ndarray]:
+        """
+        查询最近指纹点的RSSI
+
+        Args:
+            fingerprint_db: 指纹库
+            position: 查询位置 (x,y,z)
+
+        Returns:
+            RSSI数组（只读视图，调用方叠加噪声时会生成新数组），
+            最近指纹点超出 max_distance 时返回None
+        """
+        version = getattr(fingerprint_db, 'version', None)
+        if self._db_ref is None or self._db_ref() is not fingerprint_db or self._version != version:
+            positions, rssi_matrix = fingerprint_db.get_all_fingerprints()
+            self._tree = cKDTree(positions) if len(positions) > 0 else None
+            # 查询返回的是矩阵行视图，置为只读防止调用方误改缓存
+            rssi_matrix.flags.writeable = False
+            self._rssi_matrix = rssi_matrix
+            self._db_ref = weakref.ref(fingerprint_db)
+            self._version = version
+
+        if self._tree is None:
+            return None
+
+        # 限定搜索半径，KD树可提前剪掉距离超过阈值的分支（超出时返回inf）
+        distance, index = self._tree.query(position, distance_upper_bound=self._search_radius)
+        if not np.isfinite(distance):
+            return None
+
+        return self._rssi_matrix[index]
 
 
 class SignalCollector(ABC):
@@ -22,7 +287,18 @@ class SignalCollector(ABC):
             ap_positions: AP位置列表 [(x,y,z), ...]
         """
         self.ap_positions = ap_positions
-        self.num_aps = len(ap_positions)
+        self._noise = _NoiseBuffer()
+
+    @property
+    def ap_positions(self) -> List[Tuple[float, float, float]]:
+        """AP位置列表 [(x,y,z), ...]"""
+        return [tuple(pos) for pos in self._rx_array.tolist()]
+
+    @ap_positions.setter
+    def ap_positions(self, positions: List[Tuple[float, float, float]]):
+        # 以连续的 (num_aps, 3) 数组保存，供向量化计算使用
+        self._rx_array = np.ascontiguousarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.num_aps = len(self._rx_array)
 
     @abstractmethod
     def collect_rssi(self, target_mac: str) -> Optional[np.ndarray]:
@@ -37,6 +313,23 @@ class SignalCollector(ABC):
         """
         pass
 
+    def collect_rssi_batch(self, target_macs: List[str]) -> Dict[str, np.ndarray]:
+        """
+        批量采集多个设备的RSSI
+
+        Args:
+            target_macs: 目标设备MAC地址列表
+
+        Returns:
+            {MAC地址: RSSI数组}，未检测到的设备不包含在内
+        """
+        result = {}
+        for mac in target_macs:
+            rssi = self.collect_rssi(mac)
+            if rssi is not None:
+                result[mac] = rssi
+        return result
+
     @abstractmethod
     def scan_devices(self) -> List[str]:
         """
@@ -64,6 +357,7 @@ class SimulatedSignalCollector(SignalCollector):
         super().__init__(ap_positions)
         self.fingerprint_db = fingerprint_db
         self.ray_tracer = ray_tracer
+        self._fingerprint_lookup = _FingerprintLookup()
 
         # 模拟设备列表（MAC地址 -> 位置）
         self.simulated_devices: Dict[str, np.ndarray] = {}
@@ -108,7 +402,7 @@ class SimulatedSignalCollector(SignalCollector):
             rssi = self._get_rssi_from_fingerprint(position)
             if rssi is not None:
                 # 添加测量噪声
-                noise = np.random.normal(0, 2.0, size=rssi.shape)
+                noise = 2.0 * self._noise.draw(rssi.size).reshape(rssi.shape)
                 return rssi + noise
 
         # 使用射线追踪实时仿真
@@ -121,48 +415,29 @@ class SimulatedSignalCollector(SignalCollector):
         return self._get_rssi_from_distance_model(position)
 
     def _get_rssi_from_fingerprint(self, position: np.ndarray) -> Optional[np.ndarray]:
-        """从指纹库查询RSSI"""
-        # 查找最近的指纹点
-        positions, rssi_matrix = self.fingerprint_db.get_all_fingerprints()
-        distances = np.linalg.norm(positions - position, axis=1)
-        nearest_idx = np.argmin(distances)
-
-        # 如果距离太远（>2米），返回None
-        if distances[nearest_idx] > 2.0:
-            return None
-
-        return rssi_matrix[nearest_idx].copy()
+        """从指纹库查询RSSI（最近指纹点距离超过2米时返回None）"""
+        return self._fingerprint_lookup.query(self.fingerprint_db, position)
 
     def _get_rssi_from_simulation(self, position: np.ndarray) -> Optional[np.ndarray]:
         """通过射线追踪仿真RSSI"""
-        rssi_values = []
-        for ap_pos in self.ap_positions:
-            rssi = self.ray_tracer.compute_rssi(ap_pos, position)
-            rssi_values.append(rssi)
-        return np.array(rssi_values)
+        # 直接写入输出数组（调用方会保留结果，因此每次新分配而非复用缓冲区）
+        rssi = np.empty(self.num_aps)
+        for i, ap_pos in enumerate(self._rx_array):
+            rssi[i] = self.ray_tracer.compute_rssi(ap_pos, position)
+        return rssi
 
     def _get_rssi_from_distance_model(self, position: np.ndarray) -> np.ndarray:
         """基于距离的简单路径损耗模型"""
-        rssi_values = []
-
         # 自由空间路径损耗: RSSI = Pt - 20*log10(d) - 20*log10(f) - 32.44
         tx_power = 20.0  # dBm
         frequency = 2.4  # GHz
 
-        for ap_pos in self.ap_positions:
-            distance = np.linalg.norm(np.array(ap_pos) - position)
-            distance = max(distance, 0.1)  # 避免除零
-
-            # 路径损耗
-            path_loss = 20 * np.log10(distance) + 20 * np.log10(frequency * 1000) + 32.44
-            rssi = tx_power - path_loss
+        # 路径损耗: 20*log10(d) + 20*log10(f) + 32.44，叠加阴影衰落
+        pl0 = 20 * math.log10(frequency * 1000) + 32.44
+        noise = 4.0 * self._noise.draw(self.num_aps)
 
-            # 添加阴影衰落
-            rssi += np.random.normal(0, 4.0)
-
-            rssi_values.append(rssi)
-
-        return np.array(rssi_values)
+        return _pathloss_rssi(self._rx_array, np.asarray(position, dtype=np.float64),
+                              tx_power, pl0, 20.0, noise)
 
     def scan_devices(self) -> List[str]:
         """扫描所有模拟设备"""
@@ -202,18 +477,49 @@ class RealAPSignalCollector(SignalCollector):
                 else:
                     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                     sock.connect((addr, ap_port))
+                # 响应由selector等待，超时只在创建时设置一次，用于限制发送阻塞
+                sock.settimeout(1.0)
                 self.sockets.append(sock)
                 print(f"已连接到 AP{i+1}: {addr}:{ap_port}")
             except Exception as e:
                 print(f"警告: 无法连接到 AP{i+1} ({addr}): {e}")
                 self.sockets.append(None)
 
+        # 所有socket注册到同一selector，并发等待各AP响应
+        self._selector = selectors.DefaultSelector()
+        for i, sock in enumerate(self.sockets):
+            if sock is not None:
+                self._selector.register(sock, selectors.EVENT_READ, data=i)
+
         print(f"真实AP信号采集器初始化完成")
         print(f"  已连接AP数量: {sum(1 for s in self.sockets if s is not None)}/{self.num_aps}")
 
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _encode_request(command: str, target_mac: Optional[str] = None) -> bytes:
+        """
+        编码查询请求（相同参数的请求字节串被缓存复用）
+
+        Args:
+            command: 命令名
+            target_mac: 目标MAC地址（可选）
+
+        Returns:
+            请求字节串
+        """
+        request = {'command': command}
+        if target_mac is not None:
+            request['target_mac'] = target_mac
+        return _encode_json(request)
+
+    def _exchange(self, payload: bytes, timeout: float) -> List[Optional[bytes]]:
+        """向所有AP发送请求并并发收取响应"""
+        return _exchange(self._selector, self.sockets, self.ap_addresses, self.ap_port,
+                         self.protocol, payload, timeout, 'AP')
+
     def collect_rssi(self, target_mac: str) -> Optional[np.ndarray]:
         """
-        从真实AP采集RSSI
+        从真实AP采集RSSI（并发查询所有AP）
 
         Args:
             target_mac: 目标设备MAC地址
@@ -221,38 +527,18 @@ class RealAPSignalCollector(SignalCollector):
         Returns:
             RSSI数组或None
         """
-        rssi_values = []
+        # 所有AP收到相同的查询请求，只编码一次
+        payload = self._encode_request('get_rssi', target_mac)
 
-        for i, sock in enumerate(self.sockets):
-            if sock is None:
-                rssi_values.append(-100.0)  # 未连接的AP使用最弱信号
+        rssi_values = []
+        for i, data in enumerate(self._exchange(payload, 1.0)):
+            if data is None:
+                rssi_values.append(-100.0)  # 未连接或超时的AP使用最弱信号
                 continue
-
             try:
-                # 向AP发送查询请求
-                request = {
-                    'command': 'get_rssi',
-                    'target_mac': target_mac
-                }
-
-                if self.protocol == 'udp':
-                    sock.sendto(json.dumps(request).encode(),
-                               (self.ap_addresses[i], self.ap_port))
-                    sock.settimeout(1.0)
-                    data, _ = sock.recvfrom(1024)
-                else:
-                    sock.sendall(json.dumps(request).encode() + b'\n')
-                    sock.settimeout(1.0)
-                    data = sock.recv(1024)
-
                 # 解析响应
-                response = json.loads(data.decode())
-                rssi = response.get('rssi', -100.0)
-                rssi_values.append(rssi)
-
-            except socket.timeout:
-                print(f"警告: AP{i+1} 超时")
-                rssi_values.append(-100.0)
+                response = _decode_json(data)
+                rssi_values.append(response.get('rssi', -100.0))
             except Exception as e:
                 print(f"警告: AP{i+1} 采集失败: {e}")
                 rssi_values.append(-100.0)
@@ -274,28 +560,16 @@ class RealAPSignalCollector(SignalCollector):
         """
         devices_set = set()
 
-        for i, sock in enumerate(self.sockets):
-            if sock is None:
-                continue
+        # 向AP请求设备列表（扫描响应较慢，超时放宽到2秒）
+        payload = self._encode_request('scan_devices')
 
+        for i, data in enumerate(self._exchange(payload, 2.0)):
+            if data is None:
+                continue
             try:
-                # 向AP请求设备列表
-                request = {'command': 'scan_devices'}
-
-                if self.protocol == 'udp':
-                    sock.sendto(json.dumps(request).encode(),
-                               (self.ap_addresses[i], self.ap_port))
-                    sock.settimeout(2.0)
-                    data, _ = sock.recvfrom(4096)
-                else:
-                    sock.sendall(json.dumps(request).encode() + b'\n')
-                    sock.settimeout(2.0)
-                    data = sock.recv(4096)
-
-                response = json.loads(data.decode())
+                response = _decode_json(data)
                 devices = response.get('devices', [])
                 devices_set.update(devices)
-
             except Exception as e:
                 print(f"警告: AP{i+1} 扫描失败: {e}")
 
@@ -303,6 +577,9 @@ class RealAPSignalCollector(SignalCollector):
 
     def __del__(self):
         """清理资源"""
+        selector = getattr(self, '_selector', None)
+        if selector is not None:
+            selector.close()
         for sock in self.sockets:
             if sock is not None:
                 try:
@@ -0,0 +1,125 @@
+"""
+GPU射线求交
+基于CuPy的最近交点求交器（Möller–Trumbore算法，每个CUDA线程处理一条射线）。
+接口与trimesh的射线求交器一致，未安装cupy时不可用。
+"""
+
+import numpy as np
+
+# 可选依赖: CuPy GPU加速射线求交 (pip install cupy-cuda12x)
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+
+
+_CLOSEST_HIT_SOURCE = r'''
+extern "C" __global__
+void closest_hit(const double* origins, const double* dirs,
+                 const double* v0, const double* e1, const double* e2,
+                 const int n_rays, const int n_tris,
+                 double* t_out, long long* tri_out)
+{
+    int i = blockDim.x * blockIdx.x + threadIdx.x;
+    if (i >= n_rays) return;
+
+    double ox = origins[3 * i], oy = origins[3 * i + 1], oz = origins[3 * i + 2];
+    double dx = dirs[3 * i], dy = dirs[3 * i + 1], dz = dirs[3 * i + 2];
+
+    double best_t = 1e300;
+    long long best_tri = -1;
+
+    for (int k = 0; k < n_tris; ++k) {
+        double ax = e1[3 * k], ay = e1[3 * k + 1], az = e1[3 * k + 2];
+        double bx = e2[3 * k], by = e2[3 * k + 1], bz = e2[3 * k + 2];
+
+        // p = d x e2
+        double px = dy * bz - dz * by;
+        double py = dz * bx - dx * bz;
+        double pz = dx * by - dy * bx;
+        double det = ax * px + ay * py + az * pz;
+        if (fabs(det) < 1e-12) continue;
+        double inv_det = 1.0 / det;
+
+        double sx = ox - v0[3 * k], sy = oy - v0[3 * k + 1], sz = oz - v0[3 * k + 2];
+        double u = (sx * px + sy * py + sz * pz) * inv_det;
+        if (u < 0.0 || u > 1.0) continue;
+
+        // q = s x e1
+        double qx = sy * az - sz * ay;
+        double qy = sz * ax - sx * az;
+        double qz = sx * ay - sy * ax;
+        double v = (dx * qx + dy * qy + dz * qz) * inv_det;
+        if (v < 0.0 || u + v > 1.0) continue;
+
+        double t = (bx * qx + by * qy + bz * qz) * inv_det;
+        if (t > 1e-9 && t < best_t) {
+            best_t = t;
+            best_tri = k;
+        }
+    }
+
+    t_out[i] = best_t;
+    tri_out[i] = best_tri;
+}
+'''
+
+
+class CupyRayIntersector:
+    """GPU最近交点射线求交器"""
+
+    THREADS_PER_BLOCK = 128
+
+    def __init__(self, mesh):
+        """
+        初始化，三角形数据一次性上传到显存
+
+        Args:
+            mesh: trimesh.Trimesh对象
+        """
+        if cp is None:
+            raise ImportError("GPU射线求交需要安装cupy")
+
+        triangles = np.asarray(mesh.triangles, dtype=np.float64)
+        self.num_triangles = len(triangles)
+        self._v0 = cp.asarray(np.ascontiguousarray(triangles[:, 0]))
+        self._e1 = cp.asarray(np.ascontiguousarray(triangles[:, 1] - triangles[:, 0]))
+        self._e2 = cp.asarray(np.ascontiguousarray(triangles[:, 2] - triangles[:, 0]))
+        self._kernel = cp.RawKernel(_CLOSEST_HIT_SOURCE, 'closest_hit')
+
+    def intersects_location(self, ray_origins: np.ndarray, ray_directions: np.ndarray,
+                            multiple_hits: bool = False):
+        """
+        射线与网格求交（只返回每条射线的最近交点）
+
+        Args:
+            ray_origins: 射线起点 shape=(N, 3)
+            ray_directions: 射线方向 shape=(N, 3)
+            multiple_hits: 必须为False，GPU求交器只支持最近交点
+
+        Returns:
+            (locations, index_ray, index_tri): 交点位置, 射线索引, 三角形索引
+        """
+        if multiple_hits:
+            raise ValueError("GPU射线求交只支持最近交点")
+
+        origins = np.ascontiguousarray(ray_origins, dtype=np.float64)
+        directions = np.ascontiguousarray(ray_directions, dtype=np.float64)
+        n_rays = len(origins)
+        if n_rays == 0 or self.num_triangles == 0:
+            return np.empty((0, 3)), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        t_out = cp.empty(n_rays, dtype=cp.float64)
+        tri_out = cp.empty(n_rays, dtype=cp.int64)
+        blocks = (n_rays + self.THREADS_PER_BLOCK - 1) // self.THREADS_PER_BLOCK
+        self._kernel(
+            (blocks,), (self.THREADS_PER_BLOCK,),
+            (cp.asarray(origins), cp.asarray(directions), self._v0, self._e1, self._e2,
+             np.int32(n_rays), np.int32(self.num_triangles), t_out, tri_out)
+        )
+
+        t = cp.asnumpy(t_out)
+        tri = cp.asnumpy(tri_out)
+        index_ray = np.flatnonzero(tri >= 0)
+        locations = origins[index_ray] + directions[index_ray] * t[index_ray, None]
+        return locations, index_ray, tri[index_ray]
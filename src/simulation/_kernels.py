@@ -0,0 +1,155 @@
+"""
+射线追踪数值内核
+波前追踪中两次求交之间的纯数值步骤（反射方向、自由空间损耗、反射损耗累加）。
+安装 numba 时使用 JIT 编译的并行内核，否则使用等价的 NumPy 实现。
+"""
+
+import numpy as np
+
+# 可选依赖: Numba JIT加速反射计算 (pip install numba)
+try:
+    from numba import njit, prange, threading_layer
+except ImportError:
+    njit = None
+
+# 可被多个线程同时调用的Numba线程层（workqueue 并发启动并行内核时会中止进程）
+THREAD_SAFE_LAYERS = ('tbb', 'omp')
+
+
+def _reflect_batch_numpy(dirs, normals):
+    """
+    镜面反射方向
+
+    Args:
+        dirs: 入射方向 shape=(N, 3)
+        normals: 表面法向量 shape=(N, 3)
+
+    Returns:
+        反射方向 shape=(N, 3)
+    """
+    cos_in = np.einsum('ij,ij->i', dirs, normals)
+    return dirs - 2.0 * cos_in[:, None] * normals
+
+
+def _fspl_batch_numpy(d, log_f_term):
+    """
+    自由空间路径损耗（同 PathLossModel.free_space_loss）
+
+    Args:
+        d: 传播距离 shape=(N,)
+        log_f_term: 频率常数项 20*log10(f) - 147.55
+
+    Returns:
+        路径损耗 (dB) shape=(N,)
+    """
+    return np.where(d < 1e-6, 0.0, 20 * np.log10(np.maximum(d, 1e-12)) + log_f_term)
+
+
+def _process_bounce_numpy(hit_points, dirs, normals, hit_dist, mat_idx,
+                          total_loss, total_dist, coeff_lut, log_f_term):
+    """
+    处理一次反射：累加损耗与距离，计算反射后的射线
+
+    Args:
+        hit_points: 交点 shape=(N, 3)
+        dirs: 入射方向 shape=(N, 3)
+        normals: 交点处法向量 shape=(N, 3)
+        hit_dist: 本段传播距离 shape=(N,)
+        mat_idx: 材料下标 shape=(N,)
+        total_loss: 累计损耗 shape=(N,)
+        total_dist: 累计距离 shape=(N,)
+        coeff_lut: 材料反射系数查找表 shape=(K,)
+        log_f_term: 频率常数项
+
+    Returns:
+        (origins, dirs, total_loss, total_dist): 新射线起点、方向及更新后的累计量
+    """
+    cos_in = np.abs(np.einsum('ij,ij->i', dirs, normals))
+    effective_coeff = coeff_lut[mat_idx] * np.minimum(cos_in, 1.0)
+    positive = effective_coeff > 0
+    refl_loss = np.where(positive, -20 * np.log10(np.where(positive, effective_coeff, 1.0)), 20.0)
+
+    reflected = _reflect_batch_numpy(dirs, normals)
+    origins = hit_points + reflected * 1e-3  # 微小偏移避免自交
+    return (origins, reflected,
+            total_loss + _fspl_batch_numpy(hit_dist, log_f_term) + refl_loss,
+            total_dist + hit_dist)
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def reflect_batch(dirs, normals):
+        """镜面反射方向的Numba内核（参数同 _reflect_batch_numpy）"""
+        n = dirs.shape[0]
+        out = np.empty((n, 3))
+        for i in prange(n):
+            c = dirs[i, 0] * normals[i, 0] + dirs[i, 1] * normals[i, 1] + dirs[i, 2] * normals[i, 2]
+            for k in range(3):
+                out[i, k] = dirs[i, k] - 2.0 * c * normals[i, k]
+        return out
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def fspl_batch(d, log_f_term):
+        """自由空间路径损耗的Numba内核（参数同 _fspl_batch_numpy）"""
+        n = d.shape[0]
+        out = np.empty(n)
+        for i in prange(n):
+            out[i] = 0.0 if d[i] < 1e-6 else 20.0 * np.log10(d[i]) + log_f_term
+        return out
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def process_bounce(hit_points, dirs, normals, hit_dist, mat_idx,
+                       total_loss, total_dist, coeff_lut, log_f_term):
+        """一次反射处理的Numba内核（参数同 _process_bounce_numpy）"""
+        n = dirs.shape[0]
+        origins = np.empty((n, 3))
+        reflected = np.empty((n, 3))
+        new_loss = np.empty(n)
+        new_dist = np.empty(n)
+        for i in prange(n):
+            c = dirs[i, 0] * normals[i, 0] + dirs[i, 1] * normals[i, 1] + dirs[i, 2] * normals[i, 2]
+            for k in range(3):
+                r = dirs[i, k] - 2.0 * c * normals[i, k]
+                reflected[i, k] = r
+                origins[i, k] = hit_points[i, k] + r * 1e-3
+
+            effective_coeff = coeff_lut[mat_idx[i]] * min(abs(c), 1.0)
+            refl_loss = -20.0 * np.log10(effective_coeff) if effective_coeff > 0 else 20.0
+            d = hit_dist[i]
+            fspl = 0.0 if d < 1e-6 else 20.0 * np.log10(d) + log_f_term
+            new_loss[i] = total_loss[i] + fspl + refl_loss
+            new_dist[i] = total_dist[i] + d
+        return origins, reflected, new_loss, new_dist
+
+    def warmup():
+        """用长度为1的数组触发一次编译"""
+        v = np.zeros((1, 3))
+        v[0, 2] = 1.0
+        d = np.ones(1)
+        reflect_batch(v, v)
+        fspl_batch(d, 0.0)
+        process_bounce(v, v, v, d, np.zeros(1, dtype=np.int8), d, d, d, 0.0)
+
+    def parallel_thread_safe() -> bool:
+        """
+        并行内核能否在多个线程中同时调用
+
+        Returns:
+            当前Numba线程层为 tbb/omp 时返回True；线程层尚未初始化或为 workqueue 时返回False
+        """
+        try:
+            return threading_layer() in THREAD_SAFE_LAYERS
+        except ValueError:
+            return False
+else:
+    reflect_batch = _reflect_batch_numpy
+    fspl_batch = _fspl_batch_numpy
+    process_bounce = _process_bounce_numpy
+
+    def warmup():
+        """NumPy实现无需编译"""
+        pass
+
+    def parallel_thread_safe() -> bool:
+        """NumPy实现可在多个线程中同时调用"""
+        return True
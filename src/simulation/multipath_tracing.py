@@ -4,21 +4,116 @@
 """
 
 import numpy as np
-from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 from dataclasses import dataclass
-from .ray_tracing import Ray, ReflectionPath, RayTracer
+from .ray_tracing import Ray, ReflectionPath, RayTracer, PathLossModel, _norm3
+from . import _kernels
+from . import _gpu
 
 
-def db_to_linear(db_value: float) -> float:
-    """dB值转换为线性值"""
-    return 10 ** (db_value / 10.0)
+# 接收球锥形剪枝的余弦容差，补偿锥形判断对后续反射路径的低估
+RX_CONE_SLACK = 0.05
 
 
-def linear_to_db(linear_value: float) -> float:
-    """线性值转换为dB值"""
-    if linear_value <= 0:
-        return -float('inf')
-    return 10 * np.log10(linear_value)
+def db_to_linear(db_value):
+    """dB值转换为线性值（支持数组）"""
+    return np.power(10.0, np.asarray(db_value, dtype=np.float64) / 10.0)[()]
+
+
+def linear_to_db(linear_value):
+    """线性值转换为dB值（支持数组，非正值返回-inf）"""
+    x = np.asarray(linear_value, dtype=np.float64)
+    positive = x > 0
+    return np.where(positive, 10 * np.log10(np.where(positive, x, 1.0)), -np.inf)[()]
+
+
+class PathBuffer:
+    """
+    多径路径缓冲区（结构体数组形式）
+    同一批加入的路径反射次数相同，各字段按批以数组保存，只在需要时转换为 ReflectionPath 列表
+    """
+
+    def __init__(self, material_names: List[str]):
+        """
+        初始化
+
+        Args:
+            material_names: 材料下标 -> 材料名
+        """
+        self.material_names = material_names
+        self._distances = []
+        self._losses = []
+        self._bounces = []
+        self._points = []      # 每批 shape=(n, 反射次数+2, 3)
+        self._materials = []   # 每批 shape=(n, 反射次数)，材料下标
+
+    def append_batch(self, distances: np.ndarray, losses: np.ndarray, bounces: int,
+                     points: np.ndarray, materials: np.ndarray):
+        """
+        加入一批反射次数相同的路径
+
+        Args:
+            distances: 总传播距离 shape=(n,)
+            losses: 总损耗 shape=(n,)
+            bounces: 反射次数
+            points: 路径点 shape=(n, bounces+2, 3)
+            materials: 各反射点材料下标 shape=(n, bounces)
+        """
+        if len(distances) == 0:
+            return
+        self._distances.append(distances)
+        self._losses.append(losses)
+        self._bounces.append(np.full(len(distances), bounces, dtype=np.int8))
+        self._points.append(points)
+        self._materials.append(materials)
+
+    def extend(self, other: 'PathBuffer'):
+        """
+        并入另一个缓冲区的全部路径
+
+        Args:
+            other: 另一个路径缓冲区（材料表须相同）
+        """
+        self._distances.extend(other._distances)
+        self._losses.extend(other._losses)
+        self._bounces.extend(other._bounces)
+        self._points.extend(other._points)
+        self._materials.extend(other._materials)
+
+    def __len__(self) -> int:
+        return sum(len(d) for d in self._distances)
+
+    @property
+    def total_distance(self) -> np.ndarray:
+        """各路径总传播距离"""
+        return np.concatenate(self._distances) if self._distances else np.empty(0)
+
+    @property
+    def total_loss(self) -> np.ndarray:
+        """各路径总损耗"""
+        return np.concatenate(self._losses) if self._losses else np.empty(0)
+
+    @property
+    def num_bounces(self) -> np.ndarray:
+        """各路径反射次数"""
+        return np.concatenate(self._bounces) if self._bounces else np.empty(0, dtype=np.int8)
+
+    def to_reflection_paths(self) -> List[ReflectionPath]:
+        """转换为 ReflectionPath 列表"""
+        names = self.material_names
+        paths = []
+        for distances, losses, bounces, points, materials in zip(
+                self._distances, self._losses, self._bounces, self._points, self._materials):
+            for k in range(len(distances)):
+                paths.append(ReflectionPath(
+                    total_distance=float(distances[k]),
+                    total_loss=float(losses[k]),
+                    num_bounces=int(bounces[k]),
+                    path_points=list(points[k]),
+                    materials=[names[m] for m in materials[k]]
+                ))
+        return paths
 
 
 class MultipathRayTracer(RayTracer):
@@ -36,9 +131,17 @@ class MultipathRayTracer(RayTracer):
             config: 仿真配置
                 - 基础配置同RayTracer
                 - multipath_enabled: 是否启用多径追踪 (默认False)
+                - high_precision_mode: 高精度单路径模式，取最强单条路径 (默认False)
                 - num_rays: 发射射线数量 (默认360)
                 - rx_tolerance: 接收点容差距离 (默认0.3米)
                 - power_threshold_dbm: 功率阈值 (默认-100dBm)
+                - los_early_exit: 收发之间存在直达路径时只返回直达路径，跳过多径扫描 (默认False)
+                - rx_cone_pruning: 剪除反射后不朝向接收点或按直线距离估算功率已低于阈值的射线 (默认False)
+                - verbose: 每次多径追踪时打印射线数与路径数 (默认False)
+                - n_workers: 多径扫描的并行线程数，射线分块后并发追踪 (默认1)。
+                  仅在射线求交支持并发时生效（Embree后端）
+                - intersector: 波前追踪的射线求交后端，'cpu' 使用模型自带的求交器，
+                  'cupy' 使用GPU求交（需安装cupy，默认'cpu'）
         """
         super().__init__(model, config)
 
@@ -46,6 +149,25 @@ class MultipathRayTracer(RayTracer):
         self.num_rays = config.get('num_rays', 360)
         self.rx_tolerance = config.get('rx_tolerance', 0.3)
         self.power_threshold_dbm = config.get('power_threshold_dbm', -100.0)
+        self.high_precision_mode = config.get('high_precision_mode', False)
+        self.los_early_exit = config.get('los_early_exit', False)
+        self.rx_cone_pruning = config.get('rx_cone_pruning', False)
+        self._verbose = bool(config.get('verbose', False))
+        self.n_workers = max(1, int(config.get('n_workers', 1)))
+        self._executor = None   # 并行追踪的线程池，首次使用时创建
+
+        self.intersector = config.get('intersector', 'cpu')
+        if self.intersector == 'cupy' and _gpu.cp is None:
+            print("警告: 未安装cupy，射线求交使用CPU后端")
+            self.intersector = 'cpu'
+        self._gpu_intersector = None   # GPU求交器，首次使用时上传网格
+
+        # 仿真模式在对象生命周期内固定，初始化时绑定对应的接收功率实现，避免每次调用都做分支判断
+        # （简化模式沿用 RayTracer._received_power；阴影衰落与缓存由 simulate_signal 统一处理）
+        if self.multipath_enabled:
+            self._received_power = self._power_multipath
+        elif self.high_precision_mode:
+            self._received_power = self._power_high_precision
 
         if self.multipath_enabled:
             print(f"  多径追踪: 已启用")
@@ -53,6 +175,9 @@ class MultipathRayTracer(RayTracer):
             print(f"    接收容差: {self.rx_tolerance}m")
             print(f"    功率阈值: {self.power_threshold_dbm}dBm")
 
+        # 提前编译反射内核，避免首次追踪时的编译延迟
+        _kernels.warmup()
+
     def trace_all_paths_multipath(self, tx_position: np.ndarray,
                                    rx_position: np.ndarray) -> List[ReflectionPath]:
         """
@@ -65,30 +190,166 @@ class MultipathRayTracer(RayTracer):
         Returns:
             所有有效路径的列表
         """
-        valid_paths = []
+        return self.trace_paths_buffer(tx_position, rx_position).to_reflection_paths()
+
+    def trace_paths_buffer(self, tx_position: np.ndarray,
+                           rx_position: np.ndarray) -> PathBuffer:
+        """
+        多径传播追踪（同 trace_all_paths_multipath），结果以 PathBuffer 返回
+
+        Args:
+            tx_position: 发射机位置
+            rx_position: 接收机位置
+
+        Returns:
+            有效路径缓冲区
+        """
+        if self.los_early_exit:
+            direct = self._trace_direct_path(tx_position, rx_position)
+            if direct is not None:
+                return direct
 
         # 在球面上均匀生成射线方向（使用Fibonacci球面采样）
-        rays = self._generate_rays_fibonacci_sphere(tx_position, self.num_rays)
+        directions = self._fibonacci_sphere_directions(self.num_rays)
+        origins = np.broadcast_to(np.asarray(tx_position, dtype=np.float64), directions.shape)
 
-        print(f"发射 {len(rays)} 条射线进行多径追踪...")
+        if self._verbose:
+            print(f"发射 {len(directions)} 条射线进行多径追踪...")
 
-        for i, ray in enumerate(rays):
-            # 追踪这条射线的所有反射路径
-            paths = self._trace_single_ray_reflections(
-                ray,
+        if self.n_workers > 1 and self.intersector == 'cpu' and self.model.ray_intersect_thread_safe:
+            valid_paths = self._trace_rays_parallel(origins, directions, rx_position)
+        else:
+            valid_paths = self._trace_rays_wavefront(
+                origins,
+                directions,
                 rx_position,
                 self.rx_tolerance,
                 self.power_threshold_dbm
             )
-            valid_paths.extend(paths)
 
-            if (i + 1) % 100 == 0:
-                print(f"  已处理 {i+1}/{len(rays)} 条射线, 发现 {len(valid_paths)} 条有效路径")
+        if self._verbose:
+            print(f"多径追踪完成: 共发现 {len(valid_paths)} 条有效路径")
+
+        return valid_paths
+
+    def _ray_intersect(self, origins: np.ndarray, directions: np.ndarray):
+        """
+        波前追踪使用的批量射线求交（每条射线只返回最近交点）
 
-        print(f"多径追踪完成: 共发现 {len(valid_paths)} 条有效路径")
+        Args:
+            origins: 射线起点 shape=(N, 3)
+            directions: 射线方向 shape=(N, 3)
 
+        Returns:
+            (locations, index_ray, index_tri): 交点位置, 射线索引, 三角形索引
+        """
+        if self.intersector == 'cupy':
+            if self._gpu_intersector is None:
+                self._gpu_intersector = _gpu.CupyRayIntersector(self.model.mesh)
+            return self._gpu_intersector.intersects_location(origins, directions)
+        return self.model.ray_intersect(origins, directions)
+
+    def _trace_rays_parallel(self, origins: np.ndarray, directions: np.ndarray,
+                             rx_position: np.ndarray) -> PathBuffer:
+        """
+        射线分块后在线程池中并发做波前追踪（各射线相互独立）
+
+        Args:
+            origins: 射线起点 shape=(N, 3)
+            directions: 射线方向 shape=(N, 3)
+            rx_position: 接收点位置
+
+        Returns:
+            合并后的有效路径缓冲区
+        """
+        # 查找表在主线程中构建，避免多个线程重复构建
+        if self._tri_normals is None:
+            self._build_triangle_tables()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.n_workers)
+
+        # Numba并行内核只有在线程安全的线程层(tbb/omp)下才能被多个线程同时调用，
+        # 否则各线程改用NumPy实现，避免 workqueue 线程层并发启动时中止进程
+        if _kernels.parallel_thread_safe():
+            process_bounce = _kernels.process_bounce
+        else:
+            process_bounce = _kernels._process_bounce_numpy
+
+        chunks = np.array_split(np.arange(len(directions)), self.n_workers)
+        futures = [
+            self._executor.submit(self._trace_rays_wavefront, origins[chunk], directions[chunk],
+                                  rx_position, self.rx_tolerance, self.power_threshold_dbm,
+                                  process_bounce)
+            for chunk in chunks if len(chunk) > 0
+        ]
+
+        valid_paths = PathBuffer(self._mat_names)
+        for future in futures:
+            valid_paths.extend(future.result())
         return valid_paths
 
+    def _trace_direct_path(self, tx_position: np.ndarray,
+                           rx_position: np.ndarray) -> Optional[PathBuffer]:
+        """
+        检查收发之间的直达路径（直达路径功率通常远高于反射路径之和）
+
+        Args:
+            tx_position: 发射机位置
+            rx_position: 接收机位置
+
+        Returns:
+            只含直达路径的缓冲区，被遮挡时返回None
+        """
+        tx_position = np.asarray(tx_position, dtype=np.float64)
+        rx_position = np.asarray(rx_position, dtype=np.float64)
+        distance = _norm3(rx_position - tx_position)
+        if distance < 1e-6:
+            return None
+
+        if self.los_2d:
+            if self.model.segment_intersects_wall_2d(tx_position, rx_position):
+                return None
+        else:
+            direction = (rx_position - tx_position) / distance
+            _, hit_distance, is_hit = self.trace_ray(
+                Ray(tx_position, direction, self.config['tx_power'], 0.0, 0),
+                max_distance=distance + 1e-3
+            )
+            if is_hit and hit_distance < distance - 1e-3:
+                return None
+
+        buffer = PathBuffer(self._mat_names or list(PathLossModel.REFLECTION_COEFFICIENTS))
+        buffer.append_batch(
+            np.array([distance]),
+            np.array([self.path_loss_model.free_space_loss(distance)]),
+            0,
+            np.stack([tx_position, rx_position])[None],
+            np.empty((1, 0), dtype=np.int8)
+        )
+        return buffer
+
+    @staticmethod
+    def _fibonacci_sphere_directions(num_rays: int) -> np.ndarray:
+        """
+        使用Fibonacci球面算法生成均匀分布的射线方向
+
+        Args:
+            num_rays: 射线数量
+
+        Returns:
+            单位方向向量 shape=(num_rays, 3)
+        """
+        golden_ratio = (1 + np.sqrt(5)) / 2
+        i = np.arange(num_rays, dtype=np.float64)
+
+        # Fibonacci球面采样
+        theta = 2 * np.pi * i / golden_ratio
+        phi = np.arccos(1 - 2 * (i + 0.5) / num_rays)
+
+        # 转换为笛卡尔坐标
+        sin_phi = np.sin(phi)
+        return np.stack([np.cos(theta) * sin_phi, np.sin(theta) * sin_phi, np.cos(phi)], axis=1)
+
     def _generate_rays_fibonacci_sphere(self, origin: np.ndarray, num_rays: int) -> List[Ray]:
         """
         使用Fibonacci球面算法生成均匀分布的射线
@@ -100,31 +361,11 @@ class MultipathRayTracer(RayTracer):
         Returns:
             射线列表
         """
-        rays = []
-        golden_ratio = (1 + np.sqrt(5)) / 2
-
-        for i in range(num_rays):
-            # Fibonacci球面采样
-            theta = 2 * np.pi * i / golden_ratio
-            phi = np.arccos(1 - 2 * (i + 0.5) / num_rays)
-
-            # 转换为笛卡尔坐标
-            direction = np.array([
-                np.cos(theta) * np.sin(phi),
-                np.sin(theta) * np.sin(phi),
-                np.cos(phi)
-            ])
-
-            ray = Ray(
-                origin=origin,
-                direction=direction,
-                power=self.config['tx_power'],
-                distance=0.0,
-                bounces=0
-            )
-            rays.append(ray)
-
-        return rays
+        return [
+            Ray(origin=origin, direction=direction, power=self.config['tx_power'],
+                distance=0.0, bounces=0)
+            for direction in self._fibonacci_sphere_directions(num_rays)
+        ]
 
     def _trace_single_ray_reflections(self, ray: Ray, rx_position: np.ndarray,
                                       rx_tolerance: float,
@@ -141,180 +382,192 @@ class MultipathRayTracer(RayTracer):
         Returns:
             有效路径列表
         """
-        valid_paths = []
-
-        # 递归追踪（使用栈避免真正的递归）
-        stack = [(ray, [ray.origin.copy()], [], 0.0, 0.0)]  # (current_ray, path_points, materials, total_distance, total_loss)
-
-        while stack:
-            current_ray, path_points, materials, total_distance, total_loss = stack.pop()
-
-            # 计算当前功率
-            current_power = self.config['tx_power'] - total_loss
-            if current_power < power_threshold_dbm:
-                continue  # 功率太弱，剪枝
-
-            # 检查是否接近接收点
-            distance_to_rx = np.linalg.norm(rx_position - current_ray.origin)
-
-            # 检查方向是否大致指向接收点
-            if distance_to_rx > 1e-6:
-                direction_to_rx = (rx_position - current_ray.origin) / distance_to_rx
-                dot_product = np.dot(current_ray.direction, direction_to_rx)
-
-                # 如果在接收点附近且方向大致正确
-                if distance_to_rx <= rx_tolerance and dot_product > 0.5:
-                    # 到达接收点！
-                    final_path_points = path_points + [rx_position.copy()]
-                    final_distance = total_distance + distance_to_rx
-                    final_fspl = self.path_loss_model.free_space_loss(distance_to_rx)
-                    final_loss = total_loss + final_fspl
-
-                    valid_paths.append(ReflectionPath(
-                        total_distance=final_distance,
-                        total_loss=final_loss,
-                        num_bounces=len(materials),
-                        path_points=final_path_points,
-                        materials=materials.copy()
-                    ))
-                    continue
-
-            # 如果已经达到最大反射次数
-            if current_ray.bounces >= self.max_reflections:
-                continue
-
-            # 追踪射线，寻找下一个交点
-            hit_point, hit_distance, is_hit, tri_index = self.trace_ray(
-                current_ray,
-                max_distance=100.0
-            )
+        return self._trace_rays_wavefront(
+            np.asarray(ray.origin, dtype=np.float64).reshape(1, 3),
+            np.asarray(ray.direction, dtype=np.float64).reshape(1, 3),
+            rx_position, rx_tolerance, power_threshold_dbm
+        ).to_reflection_paths()
+
+    def _trace_rays_wavefront(self, origins: np.ndarray, directions: np.ndarray,
+                              rx_position: np.ndarray, rx_tolerance: float,
+                              power_threshold_dbm: float, process_bounce=None) -> PathBuffer:
+        """
+        波前式批量追踪：每一反射深度上所有存活射线合并为一次求交调用
 
-            if not is_hit:
-                # 没有击中任何东西，检查是否能直接到达接收点
-                if distance_to_rx < 100.0:
-                    direction_to_rx = (rx_position - current_ray.origin) / distance_to_rx
-                    dot_product = np.dot(current_ray.direction, direction_to_rx)
-
-                    # 如果方向大致正确（夹角<30度）
-                    if dot_product > 0.866:  # cos(30°)
-                        final_path_points = path_points + [rx_position.copy()]
-                        final_distance = total_distance + distance_to_rx
-                        final_fspl = self.path_loss_model.free_space_loss(distance_to_rx)
-                        final_loss = total_loss + final_fspl
-
-                        valid_paths.append(ReflectionPath(
-                            total_distance=final_distance,
-                            total_loss=final_loss,
-                            num_bounces=len(materials),
-                            path_points=final_path_points,
-                            materials=materials.copy()
-                        ))
-                continue
-
-            # 击中墙壁，准备反射
-            new_distance = total_distance + hit_distance
-            new_path_points = path_points + [hit_point.copy()]
-
-            # 获取材料和法向量
-            material = self.get_material_at_triangle(tri_index)
-            new_materials = materials + [material]
-            normal = self.get_surface_normal(tri_index)
-
-            # 计算反射系数和损耗
-            reflection_coeff = self.path_loss_model.material_props.get_reflection_coefficient(material)
-            incident_angle = np.arccos(np.abs(np.dot(-current_ray.direction, normal)))
-            refl_loss = self.path_loss_model.reflection_loss(material, incident_angle)
-            absorption_loss = self.path_loss_model.material_props.get_absorption_loss(material)
-
-            # 总损耗：传播损耗 + 反射损耗 + 吸收损耗的一部分
-            segment_fspl = self.path_loss_model.free_space_loss(hit_distance)
-            new_total_loss = total_loss + segment_fspl + refl_loss + absorption_loss * 0.2  # 吸收损耗权重
-
-            # 计算反射方向
-            reflected_direction = self.calculate_reflection_direction(
-                current_ray.direction, normal
-            )
+        Args:
+            origins: 射线起点 shape=(N, 3)
+            directions: 射线方向（单位向量） shape=(N, 3)
+            rx_position: 接收点位置
+            rx_tolerance: 到达接收点的容差
+            power_threshold_dbm: 功率阈值
+            process_bounce: 反射处理内核，默认为 _kernels.process_bounce
 
-            # 创建反射后的新射线
-            new_ray = Ray(
-                origin=hit_point + reflected_direction * 1e-3,  # 微小偏移避免自交
-                direction=reflected_direction,
-                power=self.config['tx_power'] - new_total_loss,
-                distance=new_distance,
-                bounces=current_ray.bounces + 1
+        Returns:
+            有效路径缓冲区
+        """
+        if process_bounce is None:
+            process_bounce = _kernels.process_bounce
+        tx_power = self.config['tx_power']
+        rx_position = np.asarray(rx_position, dtype=np.float64)
+        num_rays = len(origins)
+        if self._tri_normals is None:
+            self._build_triangle_tables()
+
+        # 射线状态以 SoA 形式保存
+        origins = np.array(origins, dtype=np.float64)
+        directions = np.array(directions, dtype=np.float64)
+        total_loss = np.zeros(num_rays)
+        total_distance = np.zeros(num_rays)
+        active = np.ones(num_rays, dtype=bool)
+        # 各深度的路径点与反射材料，第k个深度存活的射线恰好反射过k次
+        point_history = np.empty((self.max_reflections + 1, num_rays, 3))
+        point_history[0] = origins
+        material_history = np.zeros((self.max_reflections, num_rays), dtype=np.int8)
+
+        valid_paths = PathBuffer(self._mat_names)
+
+        def add_paths(indices, distance_to_rx, depth):
+            points = np.empty((len(indices), depth + 2, 3))
+            points[:, :depth + 1] = point_history[:depth + 1, indices].transpose(1, 0, 2)
+            points[:, depth + 1] = rx_position
+            valid_paths.append_batch(
+                total_distance[indices] + distance_to_rx,
+                total_loss[indices] + self.path_loss_model.free_space_loss(distance_to_rx),
+                depth,
+                points,
+                material_history[:depth, indices].T
             )
 
-            # 压入栈继续追踪
-            stack.append((new_ray, new_path_points, new_materials, new_distance, new_total_loss))
+        for depth in range(self.max_reflections + 1):
+            # 功率太弱的射线剪枝
+            active &= (tx_power - total_loss) >= power_threshold_dbm
+            idx = np.flatnonzero(active)
+            if len(idx) == 0:
+                break
+
+            # 检查是否接近接收点且方向大致指向接收点
+            to_rx = rx_position - origins[idx]
+            distance_to_rx = np.sqrt(np.einsum('ij,ij->i', to_rx, to_rx))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                dot_rx = np.einsum('ij,ij->i', directions[idx], to_rx) / distance_to_rx
+            reached = (distance_to_rx > 1e-6) & (distance_to_rx <= rx_tolerance) & (dot_rx > 0.5)
+            add_paths(idx[reached], distance_to_rx[reached], depth)
+            active[idx[reached]] = False
+
+            # 已经达到最大反射次数
+            if depth >= self.max_reflections:
+                break
+
+            keep = ~reached
+            idx, distance_to_rx, dot_rx = idx[keep], distance_to_rx[keep], dot_rx[keep]
+            if len(idx) == 0:
+                break
+
+            # 所有存活射线一次批量求交，每条射线只取最近交点
+            locations, index_ray, index_tri = self._ray_intersect(origins[idx], directions[idx])
+            hit_distance = np.full(len(idx), np.inf)
+            hit_point = np.zeros((len(idx), 3))
+            hit_tri = np.zeros(len(idx), dtype=np.int64)
+            if len(locations) > 0:
+                # ray_intersect 默认每条射线只返回最近交点，直接按射线索引写入
+                diff = locations - origins[idx[index_ray]]
+                hit_distance[index_ray] = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+                hit_point[index_ray] = locations
+                hit_tri[index_ray] = index_tri
+            is_hit = hit_distance < 100.0
+
+            # 没有击中任何东西：方向大致正确（夹角<30度）则直接到达接收点
+            direct = ~is_hit & (distance_to_rx < 100.0) & (dot_rx > 0.866)  # cos(30°)
+            add_paths(idx[direct], distance_to_rx[direct], depth)
+            active[idx[~is_hit]] = False
+
+            # 击中墙壁，计算损耗并反射
+            hit_idx = idx[is_hit]
+            if len(hit_idx) == 0:
+                break
+            hit_distance = hit_distance[is_hit]
+            hit_point = hit_point[is_hit]
+            hit_tri = hit_tri[is_hit]
+
+            # 法向量与材料均从三角形查找表按索引收集
+            normals = self._tri_normals[hit_tri]
+            mat_idx = self._tri_mat_idx[hit_tri]
+
+            # 损耗累加与反射方向计算（Numba内核或NumPy实现）
+            (origins[hit_idx], directions[hit_idx],
+             total_loss[hit_idx], total_distance[hit_idx]) = process_bounce(
+                hit_point, directions[hit_idx], normals, hit_distance, mat_idx,
+                total_loss[hit_idx], total_distance[hit_idx],
+                self._mat_coeff_lut, self.path_loss_model._log_f_term
+            )
+            point_history[depth + 1, hit_idx] = hit_point
+            material_history[depth, hit_idx] = mat_idx
+
+            # 近似剪枝：反射方向偏离接收球锥形范围、或直线到达接收点的功率已低于阈值的射线不再求交
+            if self.rx_cone_pruning and depth + 1 < self.max_reflections:
+                to_rx = rx_position - origins[hit_idx]
+                d_rx = np.sqrt(np.einsum('ij,ij->i', to_rx, to_rx))
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    cos_rx = np.einsum('ij,ij->i', directions[hit_idx], to_rx) / d_rx
+                    cos_needed = np.sqrt(np.maximum(0.0, 1.0 - (rx_tolerance / d_rx) ** 2))
+                towards_rx = (d_rx <= rx_tolerance) | (cos_rx >= cos_needed - RX_CONE_SLACK)
+                reachable = (tx_power - total_loss[hit_idx]
+                             - self.path_loss_model.free_space_loss(d_rx)) >= power_threshold_dbm
+                active[hit_idx[~(towards_rx & reachable)]] = False
 
         return valid_paths
 
-    def combine_multipath_power(self, paths: List[ReflectionPath]) -> float:
+    def combine_multipath_power(self, paths) -> float:
         """
         将多条路径的功率相加（功率叠加，非dB叠加）
 
         Args:
-            paths: 路径列表
+            paths: 路径列表（ReflectionPath列表或PathBuffer）
 
         Returns:
             总接收功率 (dBm)
         """
-        if not paths:
+        if not len(paths):
             return -float('inf')  # 没有路径，无信号
 
-        total_power_linear = 0.0
-
-        for path in paths:
-            # 计算这条路径的接收功率
-            path_power_dbm = self.config['tx_power'] - path.total_loss
-            # 转换为线性值并累加
-            path_power_linear = db_to_linear(path_power_dbm)
-            total_power_linear += path_power_linear
-
-        # 转换回dB
-        total_power_dbm = linear_to_db(total_power_linear)
+        # 各路径接收功率转换为线性值求和，再转换回dB
+        if isinstance(paths, PathBuffer):
+            losses = paths.total_loss
+        else:
+            losses = np.fromiter((path.total_loss for path in paths), dtype=np.float64, count=len(paths))
+        total_power_linear = np.sum(db_to_linear(self.config['tx_power'] - losses))
 
-        return total_power_dbm
+        return float(linear_to_db(total_power_linear))
 
-    def simulate_signal(self, tx_position: np.ndarray, rx_position: np.ndarray) -> float:
+    def _power_multipath(self, tx_position: np.ndarray, rx_position: np.ndarray) -> float:
         """
-        模拟两点间的信号强度（支持多径模式）
+        多径模式：追踪所有路径并功率叠加（不含阴影衰落）
 
         Args:
             tx_position: 发射机位置 (3,)
             rx_position: 接收机位置 (3,)
 
         Returns:
-            接收信号强度 (dBm)
+            接收功率 (dBm)
         """
-        if self.multipath_enabled:
-            # 多径模式：追踪所有路径并功率叠加
-            paths = self.trace_all_paths_multipath(tx_position, rx_position)
-            rx_power = self.combine_multipath_power(paths)
+        paths = self.trace_paths_buffer(tx_position, rx_position)
+        return self.combine_multipath_power(paths)
 
-        elif self.high_precision_mode:
-            # 高精度单路径模式
-            path = self.trace_ray_with_reflections(tx_position, rx_position)
-            rx_power = self.config['tx_power'] - path.total_loss
-
-        else:
-            # 简化模式
-            distance = np.linalg.norm(rx_position - tx_position)
-            direction = (rx_position - tx_position) / distance
-            hit_point, hit_distance, is_hit, _ = self.trace_ray(
-                Ray(tx_position, direction, self.config['tx_power'], 0.0, 0)
-            )
-
-            if not is_hit or hit_distance >= distance:
-                rx_power = self.path_loss_model.calculate_received_power(distance, 0)
-            else:
-                rx_power = self.path_loss_model.calculate_received_power(distance, 1)
+    def _power_high_precision(self, tx_position: np.ndarray, rx_position: np.ndarray) -> float:
+        """
+        高精度单路径模式：取追踪到的最强单条路径，未找到路径时按简化模式计算（不含阴影衰落）
 
-        # 添加阴影衰落
-        shadow_fading = np.random.normal(0, self.config.get('shadow_fading_std', 4.0))
-        rx_power += shadow_fading
+        Args:
+            tx_position: 发射机位置 (3,)
+            rx_position: 接收机位置 (3,)
 
-        return rx_power
+        Returns:
+            接收功率 (dBm)
+        """
+        paths = self.trace_paths_buffer(tx_position, rx_position)
+        if not len(paths):
+            return RayTracer._received_power(self, tx_position, rx_position)
+        return self.config['tx_power'] - paths.total_loss.min()
 
 
 def create_multipath_ray_tracer(model, config):
@@ -3,12 +3,19 @@
 基于几何光学原理模拟电磁波传播
 """
 
+import math
+import functools
 import numpy as np
 from typing import List, Tuple, Dict
 from dataclasses import dataclass
 from scipy.constants import speed_of_light
 
 
+def _norm3(v) -> float:
+    """三维向量长度（标量运算，比 np.linalg.norm 的调用开销小）"""
+    return math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+
+
 @dataclass
 class Ray:
     """射线类"""
@@ -19,9 +26,28 @@ class Ray:
     bounces: int          # 反射次数
 
 
+@dataclass
+class ReflectionPath:
+    """传播路径"""
+    total_distance: float   # 总传播距离 (m)
+    total_loss: float       # 总损耗 (dB)
+    num_bounces: int        # 反射次数
+    path_points: List[np.ndarray]  # 路径点（发射点、各反射点、接收点）
+    materials: List[str]    # 各反射点的材料
+
+
 class PathLossModel:
     """路径损耗模型"""
 
+    # 简化模型：不同材料的反射系数
+    REFLECTION_COEFFICIENTS = {
+        'concrete': 0.3,
+        'brick': 0.4,
+        'wood': 0.5,
+        'glass': 0.7,
+        'metal': 0.9,
+    }
+
     def __init__(self, frequency: float = 2.4e9, tx_power: float = 20.0):
         """
         初始化
@@ -32,11 +58,26 @@ class PathLossModel:
         """
         self.frequency = frequency
         self.tx_power = tx_power
-        self.wavelength = speed_of_light / frequency
 
-    def free_space_loss(self, distance: float) -> float:
+        # 材料名 -> 反射系数查找表，未知材料按混凝土处理
+        self._material_index = {m: i for i, m in enumerate(self.REFLECTION_COEFFICIENTS)}
+        self._coeff_arr = np.array(list(self.REFLECTION_COEFFICIENTS.values()))
+
+    @property
+    def frequency(self) -> float:
+        """工作频率 (Hz)"""
+        return self._frequency
+
+    @frequency.setter
+    def frequency(self, value: float):
+        # 频率变化时同步更新波长和与距离无关的常数项 20*log10(f) - 147.55
+        self._frequency = value
+        self.wavelength = speed_of_light / value
+        self._log_f_term = 20 * math.log10(value) - 147.55
+
+    def free_space_loss(self, distance):
         """
-        自由空间路径损耗 (Friis公式)
+        自由空间路径损耗 (Friis公式)，支持标量或数组逐元素计算
 
         Args:
             distance: 传播距离 (m)
@@ -44,44 +85,49 @@ class PathLossModel:
         Returns:
             路径损耗 (dB)
         """
-        if distance < 1e-6:
-            return 0.0
+        # FSPL = 20*log10(d) + 20*log10(f) - 147.55，距离过近时损耗记为0
+        d = np.asarray(distance, dtype=np.float64)
+        loss = np.where(d < 1e-6, 0.0,
+                        20 * np.log10(np.maximum(d, 1e-12)) + self._log_f_term)
+        return loss[()]
 
-        # FSPL = 20*log10(d) + 20*log10(f) - 147.55
-        loss = 20 * np.log10(distance) + 20 * np.log10(self.frequency) - 147.55
+    def material_indices(self, materials) -> np.ndarray:
+        """
+        材料名转换为反射系数查找表的下标
+
+        Args:
+            materials: 材料名或材料名序列
 
-        return loss
+        Returns:
+            下标（标量或数组）
+        """
+        if isinstance(materials, str):
+            return np.intp(self._material_index.get(materials, 0))
+        return np.fromiter((self._material_index.get(m, 0) for m in materials),
+                           dtype=np.intp, count=len(materials))
 
-    def reflection_loss(self, material: str, angle: float) -> float:
+    def reflection_loss(self, material, angle):
         """
-        反射损耗
+        反射损耗，支持标量或数组逐元素计算
 
         Args:
-            material: 材料类型
+            material: 材料类型（材料名或材料名序列）
             angle: 入射角 (弧度)
 
         Returns:
             反射损耗 (dB)
         """
-        # 简化模型：不同材料的反射系数
-        reflection_coefficients = {
-            'concrete': 0.3,
-            'brick': 0.4,
-            'wood': 0.5,
-            'glass': 0.7,
-            'metal': 0.9,
-        }
-
-        coeff = reflection_coefficients.get(material, 0.3)
+        coeff = self._coeff_arr[self.material_indices(material)]
 
         # 考虑入射角影响 (Fresnel反射)
-        angle_factor = np.cos(angle)
-        effective_coeff = coeff * angle_factor
+        effective_coeff = coeff * np.cos(angle)
 
         # 转换为dB
-        loss = -20 * np.log10(effective_coeff) if effective_coeff > 0 else 20.0
-
-        return loss
+        positive = effective_coeff > 0
+        loss = np.where(positive,
+                        -20 * np.log10(np.where(positive, effective_coeff, 1.0)),
+                        20.0)
+        return loss[()]
 
     def calculate_received_power(self, distance: float, num_reflections: int = 0) -> float:
         """
@@ -127,6 +173,81 @@ class RayTracer:
 
         self.max_reflections = config.get('max_reflections', 3)
         self.ray_resolution = config.get('ray_resolution', 5.0)  # 角度分辨率
+        # 平面视距判断：只检测墙面XY投影，忽略高度（适合平面布局场景）
+        self.los_2d = config.get('los_2d', False)
+        # 阴影衰落随机数生成器，配置 seed 可复现仿真结果
+        self._rng = np.random.default_rng(config.get('seed'))
+        # 接收功率缓存：接收点按该分辨率 (m) 量化后缓存确定性部分，None为不缓存
+        self.cache_resolution = config.get('signal_cache_resolution')
+        self._power_cache = None
+        if self.cache_resolution:
+            self._power_cache = functools.lru_cache(maxsize=65536)(self._power_at_cell)
+
+        # 按三角形索引的 SoA 查找表，首次使用时构建（懒加载模型不会因此提前读取网格）
+        self._tri_normals = None     # 法向量 shape=(T, 3)
+        self._tri_mat_idx = None     # 材料下标 shape=(T,) int8
+        self._mat_names = None       # 材料下标 -> 材料名
+        self._mat_coeff_lut = None   # 材料下标 -> 反射系数
+
+    def _build_triangle_tables(self):
+        """构建三角形法向量、材料下标与材料反射系数查找表"""
+        coefficients = dict(PathLossModel.REFLECTION_COEFFICIENTS)
+        # 模型中出现的未知材料追加到表尾，反射系数按混凝土处理
+        for material in self.model.materials.values():
+            coefficients.setdefault(material, coefficients['concrete'])
+        names = list(coefficients)
+        index = {m: i for i, m in enumerate(names)}
+
+        mesh = self.model.mesh
+        tri_mat_idx = np.full(len(mesh.faces), index['concrete'], dtype=np.int8)
+        for tri, material in self.model.materials.items():
+            tri_mat_idx[tri] = index[material]
+
+        self._tri_normals = np.ascontiguousarray(mesh.face_normals, dtype=np.float64)
+        self._tri_mat_idx = tri_mat_idx
+        self._mat_names = names
+        self._mat_coeff_lut = np.array(list(coefficients.values()))
+
+    def get_surface_normal(self, tri_index):
+        """
+        获取三角形法向量
+
+        Args:
+            tri_index: 三角形索引（标量或数组）
+
+        Returns:
+            法向量 shape=(3,) 或 (N, 3)
+        """
+        if self._tri_normals is None:
+            self._build_triangle_tables()
+        return self._tri_normals[tri_index]
+
+    def get_material_at_triangle(self, tri_index) -> str:
+        """
+        获取三角形材料
+
+        Args:
+            tri_index: 三角形索引
+
+        Returns:
+            材料名（未指定材料的三角形为 'concrete'）
+        """
+        if self._tri_mat_idx is None:
+            self._build_triangle_tables()
+        return self._mat_names[self._tri_mat_idx[tri_index]]
+
+    def generate_ray_directions(self, num_rays: int = 360) -> np.ndarray:
+        """
+        生成水平面内均匀分布的射线方向
+
+        Args:
+            num_rays: 射线数量
+
+        Returns:
+            单位方向向量 shape=(num_rays, 3)
+        """
+        angles = np.linspace(0, 2 * np.pi, num_rays, endpoint=False)
+        return np.stack([np.cos(angles), np.sin(angles), np.zeros(num_rays)], axis=1)
 
     def generate_rays(self, tx_position: np.ndarray, num_rays: int = 360) -> List[Ray]:
         """
@@ -139,29 +260,12 @@ class RayTracer:
         Returns:
             初始射线列表
         """
-        rays = []
-
         # 在水平面生成均匀分布的射线
-        angles = np.linspace(0, 2 * np.pi, num_rays, endpoint=False)
-
-        for angle in angles:
-            direction = np.array([
-                np.cos(angle),
-                np.sin(angle),
-                0.0
-            ])
-
-            ray = Ray(
-                origin=tx_position,
-                direction=direction,
-                power=self.config['tx_power'],
-                distance=0.0,
-                bounces=0
-            )
-
-            rays.append(ray)
-
-        return rays
+        return [
+            Ray(origin=tx_position, direction=direction, power=self.config['tx_power'],
+                distance=0.0, bounces=0)
+            for direction in self.generate_ray_directions(num_rays)
+        ]
 
     def trace_ray(self, ray: Ray, max_distance: float = 50.0) -> Tuple[np.ndarray, float, bool]:
         """
@@ -184,7 +288,8 @@ class RayTracer:
 
         if len(locations) > 0:
             # 找到最近的交点
-            distances = np.linalg.norm(locations - ray.origin, axis=1)
+            diff = locations - ray.origin
+            distances = np.sqrt(np.einsum('ij,ij->i', diff, diff))
             min_idx = np.argmin(distances)
 
             hit_point = locations[min_idx]
@@ -206,28 +311,56 @@ class RayTracer:
         Returns:
             接收信号强度 (dBm)
         """
-        # 计算直线距离
-        distance = np.linalg.norm(rx_position - tx_position)
-
-        # 检查是否有直达路径 (LOS)
-        direction = (rx_position - tx_position) / distance
-        hit_point, hit_distance, is_hit = self.trace_ray(
-            Ray(tx_position, direction, self.config['tx_power'], 0.0, 0)
-        )
-
-        if not is_hit or hit_distance >= distance:
-            # 直达路径，使用自由空间损耗
-            rx_power = self.path_loss_model.calculate_received_power(distance, 0)
+        if self._power_cache is not None:
+            # 接收点量化到网格，确定性部分按 (发射点, 网格) 缓存
+            tx_key = tuple(np.asarray(tx_position, dtype=np.float64).tolist())
+            rx_key = tuple(np.round(np.asarray(rx_position, dtype=np.float64)
+                                    / self.cache_resolution).astype(int).tolist())
+            rx_power = self._power_cache(tx_key, rx_key)
         else:
-            # 非直达路径，使用简化的多径模型
-            rx_power = self.path_loss_model.calculate_received_power(distance, 1)
+            rx_power = self._received_power(tx_position, rx_position)
 
-        # 添加阴影衰落
-        shadow_fading = np.random.normal(0, self.config.get('shadow_fading_std', 4.0))
+        # 添加阴影衰落（随机部分不缓存）
+        shadow_fading = self._rng.normal(0, self.config.get('shadow_fading_std', 4.0))
         rx_power += shadow_fading
 
         return rx_power
 
+    def _power_at_cell(self, tx_key: Tuple[float, ...], rx_key: Tuple[int, ...]) -> float:
+        """按网格中心计算接收功率（供 lru_cache 包装，结果与查询顺序无关）"""
+        rx_position = np.array(rx_key, dtype=np.float64) * self.cache_resolution
+        return self._received_power(np.array(tx_key), rx_position)
+
+    def _received_power(self, tx_position: np.ndarray, rx_position: np.ndarray) -> float:
+        """
+        两点间接收功率的确定性部分（不含阴影衰落）
+
+        Args:
+            tx_position: 发射机位置 (3,)
+            rx_position: 接收机位置 (3,)
+
+        Returns:
+            接收功率 (dBm)
+        """
+        # 计算直线距离
+        distance = _norm3(rx_position - tx_position)
+
+        # 检查是否有直达路径 (LOS)
+        if self.los_2d:
+            is_los = not self.model.segment_intersects_wall_2d(tx_position, rx_position)
+        else:
+            direction = (rx_position - tx_position) / distance
+            hit_point, hit_distance, is_hit = self.trace_ray(
+                Ray(tx_position, direction, self.config['tx_power'], 0.0, 0)
+            )
+            is_los = not is_hit or hit_distance >= distance
+
+        if is_los:
+            # 直达路径，使用自由空间损耗
+            return self.path_loss_model.calculate_received_power(distance, 0)
+        # 非直达路径，使用简化的多径模型
+        return self.path_loss_model.calculate_received_power(distance, 1)
+
     def simulate_multi_ap(self, ap_positions: List[Tuple], rx_position: np.ndarray) -> np.ndarray:
         """
         模拟多个AP的信号强度
@@ -259,63 +392,40 @@ class RayTracer:
         Returns:
             信号强度矩阵 shape=(N, M) - 每行对应一个采样点，每列对应一个AP
         """
+        rx_positions = np.asarray(rx_positions, dtype=np.float64)
+        tx_positions = np.asarray(tx_positions, dtype=np.float64)
         num_rx = rx_positions.shape[0]
         num_tx = tx_positions.shape[0]
 
-        # 准备批量射线数据
-        # 对于每个rx点，需要向所有tx点发射射线
-        ray_origins = []
-        ray_directions = []
-        ray_pairs = []  # 记录每条射线对应的(rx_idx, tx_idx)
-
-        for rx_idx in range(num_rx):
-            rx_pos = rx_positions[rx_idx]
-            for tx_idx in range(num_tx):
-                tx_pos = tx_positions[tx_idx]
-
-                # 计算方向
-                direction = tx_pos - rx_pos
-                distance = np.linalg.norm(direction)
-                if distance > 1e-6:
-                    direction = direction / distance
-                    ray_origins.append(rx_pos)
-                    ray_directions.append(direction)
-                    ray_pairs.append((rx_idx, tx_idx, distance))
-
-        # 转换为numpy数组
-        ray_origins = np.array(ray_origins)
-        ray_directions = np.array(ray_directions)
+        # 每个rx点向所有tx点发射射线：广播得到 (N, M, 3) 的方向与 (N, M) 的距离
+        diffs = tx_positions[None, :, :] - rx_positions[:, None, :]
+        distances = np.sqrt(np.einsum('ijk,ijk->ij', diffs, diffs))
+        valid = distances > 1e-6
+
+        # 重合的点对不发射射线
+        ray_distances = distances[valid]
+        ray_origins = np.broadcast_to(rx_positions[:, None, :], diffs.shape)[valid]
+        ray_directions = diffs[valid] / ray_distances[:, None]
 
         # 批量射线求交
         locations, index_ray, index_tri = self.model.ray_intersect(
             ray_origins, ray_directions
         )
 
-        # 为每条射线标记是否被遮挡
-        is_blocked = np.zeros(len(ray_pairs), dtype=bool)
+        # 交点距离小于原始距离的射线被遮挡（1mm容差）
+        hit_distances = np.full(len(ray_distances), np.inf)
         if len(locations) > 0:
-            # 计算每个交点到射线起点的距离
-            for i, ray_idx in enumerate(index_ray):
-                hit_distance = np.linalg.norm(locations[i] - ray_origins[ray_idx])
-                original_distance = ray_pairs[ray_idx][2]
+            diff = locations - ray_origins[index_ray]
+            np.minimum.at(hit_distances, index_ray, np.sqrt(np.einsum('ij,ij->i', diff, diff)))
+        is_blocked = hit_distances < ray_distances - 1e-3
 
-                # 如果交点距离小于原始距离，说明被遮挡
-                if hit_distance < original_distance - 1e-3:  # 1mm容差
-                    is_blocked[ray_idx] = True
+        # 根据是否遮挡选择反射次数，并添加阴影衰落
+        rx_power = self.path_loss_model.calculate_received_power(ray_distances, is_blocked.astype(int))
+        rx_power = rx_power + self._rng.normal(0, self.config.get('shadow_fading_std', 4.0),
+                                               len(ray_distances))
 
-        # 计算所有信号强度
         rssi_matrix = np.zeros((num_rx, num_tx))
-
-        for i, (rx_idx, tx_idx, distance) in enumerate(ray_pairs):
-            # 根据是否遮挡选择反射次数
-            num_reflections = 1 if is_blocked[i] else 0
-            rx_power = self.path_loss_model.calculate_received_power(distance, num_reflections)
-
-            # 添加阴影衰落
-            shadow_fading = np.random.normal(0, self.config.get('shadow_fading_std', 4.0))
-            rx_power += shadow_fading
-
-            rssi_matrix[rx_idx, tx_idx] = rx_power
+        rssi_matrix[valid] = rx_power
 
         return rssi_matrix
 
@@ -3,26 +3,271 @@
 提供3D模型、信号分布、定位结果的可视化功能
 """
 
+import os
+import weakref
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+import matplotlib
+
+# 设置环境变量 INDOORLOC_HEADLESS=1 时使用非交互的Agg后端（批量出图、无显示环境）
+if os.environ.get('INDOORLOC_HEADLESS') == '1':
+    matplotlib.use('Agg')
+
 import matplotlib.pyplot as plt
 from matplotlib import cm
+from matplotlib.collections import LineCollection
+from mpl_toolkits.mplot3d import Axes3D  # noqa: F401 注册3d投影
+from scipy.interpolate import CloughTocher2DInterpolator
+from scipy.spatial import Delaunay
 from typing import List, Dict, Tuple
-import os
+
+
+# 热图色表：模块加载时解析一次，各次绘图共用（plt.get_cmap 每次调用都会复制色表）
+_RSSI_CMAP = plt.get_cmap('viridis')
+
+# 进程内共享的绘图网格缓存 {fingerprint_db: {grid_n: entry}}，
+# 指纹库被回收时条目自动释放，指纹库修改计数(version)变化时重建
+_GRID_CACHE = weakref.WeakKeyDictionary()
+
+# AP位置数组缓存 {fingerprint_db: (ap_positions列表, 列表长度, 数组)}
+_AP_CACHE = weakref.WeakKeyDictionary()
+
+
+def _get_plot_grid(fingerprint_db, grid_n: int = 100) -> Dict:
+    """
+    获取指纹库的绘图网格（位置、边界、插值网格、三角剖分）
+
+    Args:
+        fingerprint_db: FingerprintDatabase对象
+        grid_n: 插值网格每个方向的点数
+
+    Returns:
+        dict: positions, rssi_matrix 为只读数组；bounds 为
+        (x_min, x_max, y_min, y_max, z_min, z_max)；xi, yi 为网格；
+        tri 为 (x, y) 的Delaunay三角剖分（首次需要时构建）
+    """
+    version = getattr(fingerprint_db, 'version', None)
+    per_db = _GRID_CACHE.get(fingerprint_db)
+    if per_db is None:
+        per_db = {}
+        _GRID_CACHE[fingerprint_db] = per_db
+
+    entry = per_db.get(grid_n)
+    if entry is not None and version is not None and entry['version'] == version:
+        return entry
+
+    positions, rssi_matrix = fingerprint_db.get_all_fingerprints()
+    # 缓存数组在多次绘图间共享，置为只读防止调用方误改
+    positions.flags.writeable = False
+    rssi_matrix.flags.writeable = False
+
+    mins = positions.min(axis=0)
+    maxs = positions.max(axis=0)
+    xi, yi = np.meshgrid(np.linspace(mins[0], maxs[0], grid_n),
+                         np.linspace(mins[1], maxs[1], grid_n))
+
+    entry = {
+        'version': version,
+        'positions': positions,
+        'rssi_matrix': rssi_matrix,
+        'bounds': (mins[0], maxs[0], mins[1], maxs[1], mins[2], maxs[2]),
+        'xi': xi,
+        'yi': yi,
+        'tri': None,
+    }
+    per_db[grid_n] = entry
+    return entry
+
+
+def _get_ap_array(fingerprint_db):
+    """
+    获取指纹库AP位置的只读数组，AP列表对象或长度不变时复用上次的转换结果
+
+    Args:
+        fingerprint_db: FingerprintDatabase对象
+
+    Returns:
+        AP位置数组 shape=(num_aps, 3)，指纹库没有AP位置时返回None
+    """
+    ap_list = getattr(fingerprint_db, 'ap_positions', None)
+    if ap_list is None or len(ap_list) == 0:
+        return None
+
+    cached = _AP_CACHE.get(fingerprint_db)
+    if cached is not None and cached[0] is ap_list and cached[1] == len(ap_list):
+        return cached[2]
+
+    ap_array = np.ascontiguousarray(ap_list, dtype=np.float64)
+    ap_array.flags.writeable = False
+    _AP_CACHE[fingerprint_db] = (ap_list, len(ap_list), ap_array)
+    return ap_array
+
+
+def _set_equal_3d_limits(ax, grid: Dict):
+    """
+    按指纹点包围盒设置3D坐标轴范围，使三个轴比例相等
+
+    Args:
+        ax: 3D坐标轴
+        grid: _get_plot_grid 返回的缓存条目
+    """
+    bounds = np.asarray(grid['bounds']).reshape(3, 2)
+    mids = bounds.mean(axis=1)
+    half_range = np.ptp(bounds, axis=1).max() * 0.5
+
+    ax.set_xlim(mids[0] - half_range, mids[0] + half_range)
+    ax.set_ylim(mids[1] - half_range, mids[1] + half_range)
+    ax.set_zlim(mids[2] - half_range, mids[2] + half_range)
+
+
+def _subsample_positions(positions: np.ndarray, downsample_factor: int) -> np.ndarray:
+    """
+    按固定种子随机抽取约 1/downsample_factor 的指纹点
+
+    与 positions[::k] 的等间隔抽取不同，随机抽取不会因网格按行存储而整行缺失，
+    固定种子保证同一指纹库每次绘图结果一致。
+
+    Args:
+        positions: 指纹点位置 shape=(N, 3)
+        downsample_factor: 下采样因子
+
+    Returns:
+        抽取后的位置（保持原有顺序）
+    """
+    n = len(positions)
+    target = max(1, -(-n // max(1, downsample_factor)))
+    if target >= n:
+        return positions
+    idx = np.random.default_rng(0).choice(n, size=target, replace=False)
+    idx.sort()
+    return positions[idx]
+
+
+def _get_triangulation(grid: Dict):
+    """
+    获取网格缓存中 (x, y) 采样点的Delaunay三角剖分，首次调用时构建
+
+    Args:
+        grid: _get_plot_grid 返回的缓存条目
+
+    Returns:
+        scipy.spatial.Delaunay对象
+    """
+    if grid['tri'] is None:
+        grid['tri'] = Delaunay(grid['positions'][:, :2])
+    return grid['tri']
+
+
+def _run_plot_task(figsize, dpi: int, method: str, args: tuple, kwargs: dict) -> str:
+    """
+    在子进程中执行一次绘图并保存（供 Visualizer.save_batch 使用）
+
+    Args:
+        figsize: 图形尺寸
+        dpi: 保存分辨率
+        method: Visualizer 的绘图方法名
+        args: 位置参数
+        kwargs: 关键字参数（须包含 save_path）
+
+    Returns:
+        保存路径
+    """
+    # 子进程只负责保存，使用非交互后端
+    plt.switch_backend('Agg')
+    getattr(Visualizer(figsize=figsize, dpi=dpi), method)(*args, **kwargs)
+    return kwargs['save_path']
 
 
 class Visualizer:
     """可视化工具类"""
 
-    def __init__(self, model=None, figsize=(12, 8)):
+    def __init__(self, model=None, figsize=(12, 8), dpi: int = 150):
         """
         初始化
 
         Args:
             model: IndoorModel对象
             figsize: 图形尺寸
+            dpi: 保存图片的分辨率（栅格化耗时与文件大小随 dpi 平方增长）
         """
         self.model = model
         self.figsize = figsize
+        self.dpi = dpi
+        # 最近一次热图插值结果 (网格缓存条目, 全部AP的插值网格)
+        self._heatmap_cache = None
+
+    def _get_heatmap_values(self, fingerprint_db) -> Tuple[Dict, np.ndarray]:
+        """
+        获取全部AP在插值网格上的三次插值结果，指纹库未变化时直接复用
+
+        Args:
+            fingerprint_db: FingerprintDatabase对象
+
+        Returns:
+            (grid, zi_all): 网格缓存条目, 插值结果 shape=(grid_n, grid_n, num_aps)
+        """
+        grid = _get_plot_grid(fingerprint_db)
+        # 指纹库修改后网格缓存条目会被重建，以条目本身判断插值结果是否过期
+        if self._heatmap_cache is not None and self._heatmap_cache[0] is grid:
+            return self._heatmap_cache
+
+        # 所有AP共用同一组采样点：只做一次Delaunay三角剖分，
+        # 再以多列值一次性完成全部AP的三次插值（等价于逐AP调用griddata cubic）
+        interp = CloughTocher2DInterpolator(_get_triangulation(grid),
+                                            np.asarray(grid['rssi_matrix'], dtype=np.float64))
+        zi_all = interp(grid['xi'], grid['yi'])
+        self._heatmap_cache = (grid, zi_all)
+        return self._heatmap_cache
+
+    def _save_or_show(self, fig, save_path: str, name: str):
+        """
+        输出图形：指定保存路径时只保存并关闭图形，否则交互显示
+
+        Args:
+            fig: matplotlib Figure对象
+            save_path: 保存路径，为空时调用 plt.show()
+            name: 日志中的图形名称
+        """
+        if not save_path:
+            plt.show()
+            return
+
+        save_dir = os.path.dirname(save_path)
+        if save_dir:
+            os.makedirs(save_dir, exist_ok=True)
+        fig.savefig(save_path, dpi=self.dpi)
+        print(f"{name}已保存到: {save_path}")
+        # 批量出图时及时释放图形，不再进入交互窗口的事件循环
+        plt.close(fig)
+
+    def save_batch(self, tasks: List[Tuple[str, tuple, dict]], max_workers: int = None) -> List[str]:
+        """
+        多进程并行绘制并保存一批图形
+
+        matplotlib 的绘制是单线程的，批量出图时按图形分配到多个进程可近似线性加速。
+        子进程以 spawn 方式启动，参数（如指纹库）需可被 pickle。
+
+        Args:
+            tasks: 任务列表 [(方法名, 位置参数, 关键字参数), ...]，
+                例如 ('plot_error_cdf', (errors,), {'save_path': 'results/cdf.png'})，
+                关键字参数中必须指定 save_path
+            max_workers: 进程数，默认为CPU核数
+
+        Returns:
+            按任务顺序排列的保存路径列表
+        """
+        for method, _, kwargs in tasks:
+            if not method.startswith('plot_') or not hasattr(self, method):
+                raise ValueError(f"未知的绘图方法: {method}")
+            if not kwargs.get('save_path'):
+                raise ValueError(f"批量保存的任务必须指定 save_path: {method}")
+
+        ctx = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as executor:
+            futures = [executor.submit(_run_plot_task, self.figsize, self.dpi, method, args, kwargs)
+                       for method, args, kwargs in tasks]
+            return [future.result() for future in futures]
 
     def plot_signal_heatmap(self, fingerprint_db, ap_index: int = 0, save_path: str = None):
         """
@@ -33,30 +278,20 @@ class Visualizer:
             ap_index: AP索引
             save_path: 保存路径
         """
-        positions, rssi_matrix = fingerprint_db.get_all_fingerprints()
-
-        # 提取X, Y坐标和RSSI值
-        x = positions[:, 0]
-        y = positions[:, 1]
-        rssi = rssi_matrix[:, ap_index]
-
-        # 创建网格
-        xi = np.linspace(x.min(), x.max(), 100)
-        yi = np.linspace(y.min(), y.max(), 100)
-        xi, yi = np.meshgrid(xi, yi)
-
-        # 插值
-        from scipy.interpolate import griddata
-        zi = griddata((x, y), rssi, (xi, yi), method='cubic')
+        # 三次插值结果按指纹库缓存，逐个AP调用时只需插值一次
+        grid, zi_all = self._get_heatmap_values(fingerprint_db)
+        xi, yi = grid['xi'], grid['yi']
+        zi = zi_all[..., ap_index]
 
         # 绘图
         fig, ax = plt.subplots(figsize=self.figsize)
-        contour = ax.contourf(xi, yi, zi, levels=20, cmap='viridis')
+        contour = ax.contourf(xi, yi, zi, levels=20, cmap=_RSSI_CMAP)
         plt.colorbar(contour, ax=ax, label='RSSI (dBm)')
 
         # 标记AP位置
-        if hasattr(fingerprint_db, 'ap_positions'):
-            ap_pos = fingerprint_db.ap_positions[ap_index]
+        ap_positions = _get_ap_array(fingerprint_db)
+        if ap_positions is not None:
+            ap_pos = ap_positions[ap_index]
             ax.plot(ap_pos[0], ap_pos[1], 'r*', markersize=20, label=f'AP {ap_index}')
 
         ax.set_xlabel('X (m)', fontsize=12)
@@ -66,13 +301,7 @@ class Visualizer:
         ax.grid(True, alpha=0.3)
 
         plt.tight_layout()
-
-        if save_path:
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            plt.savefig(save_path, dpi=300)
-            print(f"热图已保存到: {save_path}")
-
-        plt.show()
+        self._save_or_show(fig, save_path, '热图')
 
     def plot_all_aps_heatmap(self, fingerprint_db, save_path: str = None):
         """
@@ -82,39 +311,34 @@ class Visualizer:
             fingerprint_db: FingerprintDatabase对象
             save_path: 保存路径
         """
-        positions, rssi_matrix = fingerprint_db.get_all_fingerprints()
-        num_aps = rssi_matrix.shape[1]
+        grid, zi_all = self._get_heatmap_values(fingerprint_db)
+        xi, yi = grid['xi'], grid['yi']
+        num_aps = zi_all.shape[-1]
 
         # 创建子图
         cols = 2
         rows = (num_aps + 1) // 2
 
-        fig, axes = plt.subplots(rows, cols, figsize=(12, 6 * rows))
-        axes = axes.flatten() if num_aps > 1 else [axes]
+        # 各子图坐标范围相同，共享坐标轴只需计算一次刻度；constrained_layout 代替 tight_layout
+        fig, axes = plt.subplots(rows, cols, figsize=(12, 6 * rows),
+                                 sharex=True, sharey=True, constrained_layout=True)
+        axes = np.atleast_1d(axes).ravel()
 
-        for ap_idx in range(num_aps):
-            ax = axes[ap_idx]
+        ap_positions = _get_ap_array(fingerprint_db)
 
-            # 提取数据
-            x = positions[:, 0]
-            y = positions[:, 1]
-            rssi = rssi_matrix[:, ap_idx]
+        # 所有AP使用统一的色阶，只需绘制一个共享色条
+        levels = np.linspace(np.nanmin(zi_all), np.nanmax(zi_all), 16)
 
-            # 创建网格和插值
-            xi = np.linspace(x.min(), x.max(), 100)
-            yi = np.linspace(y.min(), y.max(), 100)
-            xi, yi = np.meshgrid(xi, yi)
-
-            from scipy.interpolate import griddata
-            zi = griddata((x, y), rssi, (xi, yi), method='cubic')
+        for ap_idx in range(num_aps):
+            ax = axes[ap_idx]
+            zi = zi_all[..., ap_idx]
 
             # 绘图
-            contour = ax.contourf(xi, yi, zi, levels=15, cmap='viridis')
-            plt.colorbar(contour, ax=ax, label='RSSI (dBm)')
+            contour = ax.contourf(xi, yi, zi, levels=levels, cmap=_RSSI_CMAP)
 
             # 标记AP位置
-            if hasattr(fingerprint_db, 'ap_positions'):
-                ap_pos = fingerprint_db.ap_positions[ap_idx]
+            if ap_positions is not None:
+                ap_pos = ap_positions[ap_idx]
                 ax.plot(ap_pos[0], ap_pos[1], 'r*', markersize=15)
 
             ax.set_xlabel('X (m)')
@@ -122,18 +346,19 @@ class Visualizer:
             ax.set_title(f'AP {ap_idx}')
             ax.grid(True, alpha=0.3)
 
-        # 隐藏多余的子图
+        # 共享坐标轴时只在外侧子图显示刻度和轴标签
+        for ax in axes[:num_aps]:
+            ax.label_outer()
+
+        # 隐藏多余的子图，其上方子图位于外侧，恢复X轴刻度和标签
         for i in range(num_aps, len(axes)):
             axes[i].axis('off')
+            if i >= cols:
+                axes[i - cols].xaxis.set_tick_params(labelbottom=True)
+                axes[i - cols].set_xlabel('X (m)')
 
-        plt.tight_layout()
-
-        if save_path:
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            plt.savefig(save_path, dpi=300)
-            print(f"所有AP热图已保存到: {save_path}")
-
-        plt.show()
+        fig.colorbar(contour, ax=axes[:num_aps].tolist(), label='RSSI (dBm)')
+        self._save_or_show(fig, save_path, '所有AP热图')
 
     def plot_localization_result(self, true_position: np.ndarray, estimated_position: np.ndarray,
                                   fingerprint_db=None, save_path: str = None, use_3d: bool = True,
@@ -163,15 +388,16 @@ class Visualizer:
 
         # 绘制指纹点
         if fingerprint_db:
-            positions, _ = fingerprint_db.get_all_fingerprints()
+            positions = _get_plot_grid(fingerprint_db)['positions']
+            # 指纹点栅格化为单个图层，矢量输出(PDF/SVG)不再为每个点生成路径
             ax.scatter(positions[:, 0], positions[:, 1], c='lightgray',
-                       s=10, alpha=0.5, label='Fingerprint Points')
+                       s=10, alpha=0.5, linewidths=0, rasterized=True,
+                       label='Fingerprint Points')
 
-            # 绘制AP位置
-            if hasattr(fingerprint_db, 'ap_positions'):
-                for i, ap_pos in enumerate(fingerprint_db.ap_positions):
-                    ax.plot(ap_pos[0], ap_pos[1], 'r^', markersize=15,
-                            label=f'AP {i}' if i == 0 else '')
+            # 绘制AP位置（所有AP合并为一个无连线的Line2D，图例只有一项）
+            ap_positions = _get_ap_array(fingerprint_db)
+            if ap_positions is not None:
+                ax.plot(ap_positions[:, 0], ap_positions[:, 1], 'r^', markersize=15, label='AP')
 
         # 绘制真实位置和估计位置
         ax.plot(true_position[0], true_position[1], 'go', markersize=12,
@@ -199,13 +425,7 @@ class Visualizer:
         ax.axis('equal')
 
         plt.tight_layout()
-
-        if save_path:
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            plt.savefig(save_path, dpi=300)
-            print(f"定位结果图已保存到: {save_path}")
-
-        plt.show()
+        self._save_or_show(fig, save_path, '定位结果图')
 
     def _plot_localization_result_3d(self, true_position: np.ndarray, estimated_position: np.ndarray,
                                       fingerprint_db=None, save_path: str = None,
@@ -221,26 +441,28 @@ class Visualizer:
             show_fingerprints: 是否显示指纹点（关闭可提升性能）
             downsample_factor: 指纹点下采样因子（每N个点显示1个，提升性能）
         """
-        from mpl_toolkits.mplot3d import Axes3D
-
         fig = plt.figure(figsize=self.figsize)
         ax = fig.add_subplot(111, projection='3d')
 
         # 绘制指纹点（优化版：下采样）
         if fingerprint_db and show_fingerprints:
-            positions, _ = fingerprint_db.get_all_fingerprints()
-            # 下采样以提升性能
-            if len(positions) > 100:  # 仅在点数较多时下采样
-                positions = positions[::downsample_factor]
-            ax.scatter(positions[:, 0], positions[:, 1], positions[:, 2],
-                      c='lightgray', s=2, alpha=0.15, label='Fingerprint Points')
+            positions = _get_plot_grid(fingerprint_db)['positions']
+            # 下采样以提升性能（仅在点数较多时）
+            if len(positions) > 100:
+                positions = _subsample_positions(positions, downsample_factor)
+            # 关闭深度着色：每次重绘（含交互旋转）不再按深度逐点重算颜色；
+            # 整个点云按平均高度参与图元间排序
+            fp_scatter = ax.scatter(positions[:, 0], positions[:, 1], positions[:, 2],
+                                    c='lightgray', s=2, alpha=0.15, linewidths=0, rasterized=True,
+                                    depthshade=False, label='Fingerprint Points')
+            fp_scatter.set_sort_zpos(float(positions[:, 2].mean()))
 
         # 绘制AP位置
-        if fingerprint_db and hasattr(fingerprint_db, 'ap_positions'):
-            ap_positions = np.array(fingerprint_db.ap_positions)
+        ap_positions = _get_ap_array(fingerprint_db) if fingerprint_db else None
+        if ap_positions is not None:
             ax.scatter(ap_positions[:, 0], ap_positions[:, 1], ap_positions[:, 2],
                       c='red', marker='^', s=200, edgecolors='black', linewidths=2,
-                      label='Access Points')
+                      depthshade=False, label='Access Points')
 
         # 绘制真实位置
         ax.scatter(true_position[0], true_position[1], true_position[2],
@@ -275,34 +497,15 @@ class Visualizer:
         ax.set_title('3D Indoor Localization Result', fontsize=14)
         ax.legend(loc='upper right', fontsize=10)
 
-        # 设置相等的坐标轴比例（优化版：使用已有数据计算边界）
+        # 设置相等的坐标轴比例（边界取自网格缓存，无需重新获取全部指纹）
         if fingerprint_db:
-            # 使用已下采样的数据或重新获取（但只计算边界，不渲染）
-            all_positions, _ = fingerprint_db.get_all_fingerprints()
-            x_min, x_max = all_positions[:, 0].min(), all_positions[:, 0].max()
-            y_min, y_max = all_positions[:, 1].min(), all_positions[:, 1].max()
-            z_min, z_max = all_positions[:, 2].min(), all_positions[:, 2].max()
-
-            max_range = max(x_max - x_min, y_max - y_min, z_max - z_min) / 2.0
-            mid_x = (x_max + x_min) * 0.5
-            mid_y = (y_max + y_min) * 0.5
-            mid_z = (z_max + z_min) * 0.5
-
-            ax.set_xlim(mid_x - max_range, mid_x + max_range)
-            ax.set_ylim(mid_y - max_range, mid_y + max_range)
-            ax.set_zlim(mid_z - max_range, mid_z + max_range)
+            _set_equal_3d_limits(ax, _get_plot_grid(fingerprint_db))
 
         # 设置视角
         ax.view_init(elev=20, azim=45)
 
         plt.tight_layout()
-
-        if save_path:
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            plt.savefig(save_path, dpi=300)
-            print(f"定位结果图已保存到: {save_path}")
-
-        plt.show()
+        self._save_or_show(fig, save_path, '定位结果图')
 
     def plot_trajectory(self, true_trajectory: np.ndarray, estimated_trajectory: np.ndarray,
                         fingerprint_db=None, save_path: str = None, use_3d: bool = True,
@@ -332,15 +535,15 @@ class Visualizer:
 
         # 绘制指纹点
         if fingerprint_db:
-            positions, _ = fingerprint_db.get_all_fingerprints()
+            positions = _get_plot_grid(fingerprint_db)['positions']
             ax.scatter(positions[:, 0], positions[:, 1], c='lightgray',
-                       s=5, alpha=0.3, label='Fingerprint Points')
+                       s=5, alpha=0.3, linewidths=0, rasterized=True,
+                       label='Fingerprint Points')
 
             # 绘制AP位置
-            if hasattr(fingerprint_db, 'ap_positions'):
-                for i, ap_pos in enumerate(fingerprint_db.ap_positions):
-                    ax.plot(ap_pos[0], ap_pos[1], 'r^', markersize=12,
-                            label='AP' if i == 0 else '')
+            ap_positions = _get_ap_array(fingerprint_db)
+            if ap_positions is not None:
+                ax.plot(ap_positions[:, 0], ap_positions[:, 1], 'r^', markersize=12, label='AP')
 
         # 绘制轨迹
         ax.plot(true_trajectory[:, 0], true_trajectory[:, 1], 'g-o',
@@ -355,7 +558,8 @@ class Visualizer:
                 markersize=20, label='End Point')
 
         # 计算平均误差
-        errors = np.linalg.norm(true_trajectory[:, :2] - estimated_trajectory[:, :2], axis=1)
+        diff = true_trajectory[:, :2] - estimated_trajectory[:, :2]
+        errors = np.sqrt(np.einsum('ij,ij->i', diff, diff))
         mean_error = np.mean(errors)
         ax.text(0.02, 0.98, f'Mean Location Error: {mean_error:.2f} m',
                 transform=ax.transAxes, fontsize=12,
@@ -370,13 +574,7 @@ class Visualizer:
         ax.axis('equal')
 
         plt.tight_layout()
-
-        if save_path:
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            plt.savefig(save_path, dpi=300)
-            print(f"轨迹图已保存到: {save_path}")
-
-        plt.show()
+        self._save_or_show(fig, save_path, '轨迹图')
 
     def _plot_trajectory_3d(self, true_trajectory: np.ndarray, estimated_trajectory: np.ndarray,
                             fingerprint_db=None, save_path: str = None,
@@ -392,26 +590,28 @@ class Visualizer:
             show_fingerprints: 是否显示指纹点（关闭可提升性能）
             downsample_factor: 指纹点下采样因子（每N个点显示1个，提升性能）
         """
-        from mpl_toolkits.mplot3d import Axes3D
-
         fig = plt.figure(figsize=self.figsize)
         ax = fig.add_subplot(111, projection='3d')
 
         # 绘制指纹点（优化版：下采样）
         if fingerprint_db and show_fingerprints:
-            positions, _ = fingerprint_db.get_all_fingerprints()
-            # 下采样以提升性能
+            positions = _get_plot_grid(fingerprint_db)['positions']
+            # 下采样以提升性能（仅在点数较多时）
             if len(positions) > 100:
-                positions = positions[::downsample_factor]
-            ax.scatter(positions[:, 0], positions[:, 1], positions[:, 2],
-                      c='lightgray', s=2, alpha=0.1, label='Fingerprint Points')
+                positions = _subsample_positions(positions, downsample_factor)
+            # 关闭深度着色：每次重绘（含交互旋转）不再按深度逐点重算颜色；
+            # 整个点云按平均高度参与图元间排序
+            fp_scatter = ax.scatter(positions[:, 0], positions[:, 1], positions[:, 2],
+                                    c='lightgray', s=2, alpha=0.1, linewidths=0, rasterized=True,
+                                    depthshade=False, label='Fingerprint Points')
+            fp_scatter.set_sort_zpos(float(positions[:, 2].mean()))
 
         # 绘制AP位置
-        if fingerprint_db and hasattr(fingerprint_db, 'ap_positions'):
-            ap_positions = np.array(fingerprint_db.ap_positions)
+        ap_positions = _get_ap_array(fingerprint_db) if fingerprint_db else None
+        if ap_positions is not None:
             ax.scatter(ap_positions[:, 0], ap_positions[:, 1], ap_positions[:, 2],
                       c='red', marker='^', s=150, edgecolors='black', linewidths=2,
-                      label='Access Points')
+                      depthshade=False, label='Access Points')
 
         # 绘制轨迹
         ax.plot(true_trajectory[:, 0], true_trajectory[:, 1], true_trajectory[:, 2],
@@ -428,8 +628,11 @@ class Visualizer:
                   label='End Point')
 
         # 计算平均误差
-        errors_3d = np.linalg.norm(true_trajectory - estimated_trajectory, axis=1)
-        errors_2d = np.linalg.norm(true_trajectory[:, :2] - estimated_trajectory[:, :2], axis=1)
+        # 一次相减得到差值，水平分量平方和复用于2D与3D误差
+        diff = true_trajectory - estimated_trajectory
+        sq_2d = np.einsum('ij,ij->i', diff[:, :2], diff[:, :2])
+        errors_3d = np.sqrt(sq_2d + diff[:, 2] ** 2)
+        errors_2d = np.sqrt(sq_2d)
         mean_error_3d = np.mean(errors_3d)
         mean_error_2d = np.mean(errors_2d)
 
@@ -446,33 +649,15 @@ class Visualizer:
         ax.set_title('3D Indoor Localization Trajectory', fontsize=14)
         ax.legend(loc='upper right', fontsize=10)
 
-        # 设置相等的坐标轴比例（优化版）
+        # 设置相等的坐标轴比例（边界取自网格缓存，无需重新获取全部指纹）
         if fingerprint_db:
-            all_positions, _ = fingerprint_db.get_all_fingerprints()
-            x_min, x_max = all_positions[:, 0].min(), all_positions[:, 0].max()
-            y_min, y_max = all_positions[:, 1].min(), all_positions[:, 1].max()
-            z_min, z_max = all_positions[:, 2].min(), all_positions[:, 2].max()
-
-            max_range = max(x_max - x_min, y_max - y_min, z_max - z_min) / 2.0
-            mid_x = (x_max + x_min) * 0.5
-            mid_y = (y_max + y_min) * 0.5
-            mid_z = (z_max + z_min) * 0.5
-
-            ax.set_xlim(mid_x - max_range, mid_x + max_range)
-            ax.set_ylim(mid_y - max_range, mid_y + max_range)
-            ax.set_zlim(mid_z - max_range, mid_z + max_range)
+            _set_equal_3d_limits(ax, _get_plot_grid(fingerprint_db))
 
         # 设置视角
         ax.view_init(elev=20, azim=45)
 
         plt.tight_layout()
-
-        if save_path:
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            plt.savefig(save_path, dpi=300)
-            print(f"轨迹图已保存到: {save_path}")
-
-        plt.show()
+        self._save_or_show(fig, save_path, '轨迹图')
 
     def plot_error_cdf(self, errors: np.ndarray, save_path: str = None):
         """
@@ -491,13 +676,18 @@ class Visualizer:
         # 绘制CDF
         ax.plot(sorted_errors, cdf, 'b-', linewidth=2)
 
-        # 标记关键点
-        percentiles = [50, 75, 90, 95]
-        for p in percentiles:
-            idx = int(len(sorted_errors) * p / 100)
-            error_at_p = sorted_errors[idx]
-            ax.plot([error_at_p, error_at_p], [0, p/100], 'r--', alpha=0.5)
-            ax.plot([0, error_at_p], [p/100, p/100], 'r--', alpha=0.5)
+        # 标记关键点：一次求出全部分位数，辅助线合并为一个LineCollection
+        percentiles = np.array([50, 75, 90, 95])
+        probs = percentiles / 100
+        errors_at_p = np.percentile(sorted_errors, percentiles)
+        zeros = np.zeros_like(errors_at_p)
+        vertical = np.stack([np.column_stack([errors_at_p, zeros]),
+                             np.column_stack([errors_at_p, probs])], axis=1)
+        horizontal = np.stack([np.column_stack([zeros, probs]),
+                               np.column_stack([errors_at_p, probs])], axis=1)
+        ax.add_collection(LineCollection(np.concatenate([vertical, horizontal]),
+                                         colors='r', linestyles='--', alpha=0.5))
+        for p, error_at_p in zip(percentiles, errors_at_p):
             ax.text(error_at_p, p/100 + 0.02, f'{p}%: {error_at_p:.2f}m',
                     fontsize=10, ha='center')
 
@@ -509,13 +699,7 @@ class Visualizer:
         ax.set_ylim([0, 1])
 
         plt.tight_layout()
-
-        if save_path:
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            plt.savefig(save_path, dpi=300)
-            print(f"CDF图已保存到: {save_path}")
-
-        plt.show()
+        self._save_or_show(fig, save_path, 'CDF图')
 
 
 if __name__ == "__main__":
@@ -3,59 +3,526 @@
 提供GPU加速的交互式3D可视化功能
 """
 
+import weakref
 import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from typing import List, Dict, Tuple
 import os
 
+# 可选依赖: tsdownsample 加速长曲线降采样 (pip install tsdownsample)
+try:
+    from tsdownsample import MinMaxLTTBDownsampler
+except ImportError:
+    MinMaxLTTBDownsampler = None
+
+# plotly.graph_objects 在首次绘图时才导入，只创建 VisualizerPlotly 而不绘图时不承担导入开销
+_GO = None
+
+
+def _get_go():
+    """
+    获取 plotly.graph_objects 模块（首次调用时导入）
+
+    Returns:
+        plotly.graph_objects 模块
+    """
+    global _GO
+    if _GO is None:
+        import plotly.graph_objects as go
+        _GO = go
+    return _GO
+
+
+def _as_f32(a) -> np.ndarray:
+    """
+    转为float32数组后交给Plotly（数组以二进制写入图形JSON，字节数减半，亚毫米精度对可视化已足够）
+
+    Args:
+        a: 坐标或数值数组
+
+    Returns:
+        float32数组
+    """
+    return np.asarray(a, dtype=np.float32)
+
+
+def _xyz(points) -> np.ndarray:
+    """
+    将 (N, 3) 点坐标转为 (3, N) 的连续float32数组（按坐标分量存储）
+
+    逐列切片 points[:, k] 是跨步视图，每个分量各自读一遍整个数组；
+    转置为连续行后 x、y、z 分别是一段连续内存
+
+    Args:
+        points: 点坐标 shape=(N, 3)
+
+    Returns:
+        连续数组 shape=(3, N)，按行取出即为 x, y, z
+    """
+    return np.ascontiguousarray(_as_f32(points).T)
+
+
+def _lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    LTTB (Largest-Triangle-Three-Buckets) 曲线降采样
+
+    首尾点保留，其余点均分为 n_out-2 个桶，每个桶选出与上一个选中点、
+    下一个桶均值点构成三角形面积最大的点，保留曲线的形状特征
+
+    Args:
+        x: 横坐标（单调递增） shape=(N,)
+        y: 纵坐标 shape=(N,)
+        n_out: 输出点数
+
+    Returns:
+        选中点的下标（递增） shape=(n_out,)
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    indices = np.empty(n_out, dtype=np.intp)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # 下一个桶的均值点；最后一个桶的下一个“桶”就是末点
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[nlo:nhi].mean()
+        avg_y = y[nlo:nhi].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        indices[i + 1] = a
+
+    return indices
+
+
+# 指纹数据缓存 {fingerprint_db: (version, positions, rssi_matrix)}，
+# 指纹库被回收时条目自动释放，指纹库修改计数(version)变化时重新读取
+_FP_CACHE = weakref.WeakKeyDictionary()
+
+
+def _get_fingerprints(fingerprint_db) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    获取指纹库的全部指纹（float32只读数组），同一指纹库未修改时在多次绘图间复用
+
+    Args:
+        fingerprint_db: FingerprintDatabase对象
+
+    Returns:
+        (positions, rssi_matrix): 位置数组 (N,3), RSSI矩阵 (N, num_aps)
+    """
+    version = getattr(fingerprint_db, 'version', None)
+    cached = _FP_CACHE.get(fingerprint_db)
+    if cached is not None and version is not None and cached[0] == version:
+        return cached[1], cached[2]
+
+    positions, rssi_matrix = fingerprint_db.get_all_fingerprints()
+    positions, rssi_matrix = _as_f32(positions), _as_f32(rssi_matrix)
+    # 缓存数组在多次绘图间共享，置为只读防止调用方误改
+    positions.flags.writeable = False
+    rssi_matrix.flags.writeable = False
+    if version is not None:
+        _FP_CACHE[fingerprint_db] = (version, positions, rssi_matrix)
+    return positions, rssi_matrix
+
+
+# 分箱热图缓存 {fingerprint_db: (version, max_bins, x_centers, y_centers, grids)}
+_HEATMAP_CACHE = weakref.WeakKeyDictionary()
+
+
+def _get_heatmap_grids(fingerprint_db, max_bins: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    获取所有AP的分箱RSSI热图，同一指纹库未修改时在多次绘图间复用
+
+    每个AP的RSSI按平面网格分箱取均值（多个高度层合并），数据量与指纹点数无关。
+    分箱数不超过坐标的不同取值数，规则网格采集的指纹点不会出现空洞。
+
+    Args:
+        fingerprint_db: FingerprintDatabase对象
+        max_bins: 每个方向的最大分箱数
+
+    Returns:
+        (x_centers, y_centers, grids): 分箱中心 (nx,), (ny,)；热图 shape=(num_aps, ny, nx)，空箱为NaN
+    """
+    from scipy.stats import binned_statistic_2d
+
+    version = getattr(fingerprint_db, 'version', None)
+    cached = _HEATMAP_CACHE.get(fingerprint_db)
+    if cached is not None and version is not None and cached[:2] == (version, max_bins):
+        return cached[2:]
+
+    positions, rssi_matrix = _get_fingerprints(fingerprint_db)
+    x, y, _ = _xyz(positions)
+    bins = [min(max_bins, len(np.unique(c))) for c in (x, y)]
+
+    # 所有AP共用同一组分箱，按AP转置为连续行后一次完成分箱统计
+    rssi_T = np.ascontiguousarray(rssi_matrix.T)
+    grids, x_edges, y_edges, _ = binned_statistic_2d(x, y, rssi_T, statistic='mean', bins=bins)
+    x_centers = _as_f32((x_edges[:-1] + x_edges[1:]) * 0.5)
+    y_centers = _as_f32((y_edges[:-1] + y_edges[1:]) * 0.5)
+    grids = np.ascontiguousarray(_as_f32(grids).transpose(0, 2, 1))
+
+    if version is not None:
+        _HEATMAP_CACHE[fingerprint_db] = (version, max_bins, x_centers, y_centers, grids)
+    return x_centers, y_centers, grids
+
+
+# 3D指纹点云下采样结果缓存 {fingerprint_db: (version, {目标点数: positions})}
+_CLOUD_CACHE = weakref.WeakKeyDictionary()
+
 
 class VisualizerPlotly:
     """高性能可视化工具类 (使用Plotly)"""
 
-    def __init__(self, model=None):
+    # 点数达到该值时2D散点改用WebGL渲染（Scattergl），点数较少时保留SVG以获得完整的标记样式
+    MIN_WEBGL_ROWS = 1000
+    # 3D指纹点云下采样后的点数上限
+    MAX_CLOUD_POINTS = 5000
+    # 全AP热图每个方向的最大分箱数
+    HEATMAP_BINS = 128
+    # 轨迹绘制的分桶数，轨迹点数超过其2倍时按桶保留各坐标的极值点
+    TRAJECTORY_BUCKETS = 500
+
+    def __init__(self, model=None, include_plotlyjs='cdn', persistent: bool = False, auto_show: bool = True):
         """
         初始化
 
         Args:
             model: IndoorModel对象
+            include_plotlyjs: 保存HTML时plotly.js的引入方式，默认'cdn'（从CDN加载，
+                每个文件只有几百KB）；离线查看时传 True 将约3.5MB的plotly.js内嵌到每个文件，
+                或传 'directory' 在输出目录共享一份 plotly.min.js
+            persistent: 是否复用3D定位结果图形。为True时连续调用只更新真实/估计位置和误差线，
+                模型、指纹点和AP等静态trace只构建一次（适合逐帧绘制）；调用 reset_figure() 重建
+            auto_show: 是否在绘图后自动显示图形。指定了保存路径时直接在浏览器中打开保存的HTML，
+                不再额外调用 fig.show() 重新序列化一遍图形；批量生成HTML时传 False 只写文件
+
+        安装可选依赖 orjson 后，Plotly 默认的 'auto' JSON 引擎会自动用它序列化图形
         """
         self.model = model
+        self.include_plotlyjs = include_plotlyjs
+        self.persistent = persistent
+        self.auto_show = auto_show
+        # 模型网格trace缓存 (mesh对象, go.Mesh3d)，同一网格多次绘图时复用
+        self._mesh_trace_cache = None
+        # persistent模式下复用的3D定位结果图形及其静态内容对应的参数
+        self._fig = None
+        self._fig_key = None
+
+    def reset_figure(self):
+        """丢弃persistent模式下复用的图形，下次绘图时重新构建"""
+        self._fig = None
+        self._fig_key = None
+
+    def save(self, fig, save_path, name: str = '图形'):
+        """
+        将图形保存为HTML
 
-    def _add_model_to_figure(self, fig):
+        Args:
+            fig: plotly Figure对象（各 plot_* 方法的返回值）
+            save_path: 保存路径，也可以是可写的文本文件对象（如 io.StringIO，用于单独测量序列化耗时）
+            name: 日志中的图形名称
         """
-        将3D模型添加到图形中
+        if isinstance(save_path, str):
+            save_dir = os.path.dirname(save_path)
+            if save_dir:
+                os.makedirs(save_dir, exist_ok=True)
+        fig.write_html(save_path, include_plotlyjs=self.include_plotlyjs, auto_open=self.auto_show)
+        if isinstance(save_path, str):
+            print(f"{name}已保存到: {save_path}")
+
+    @classmethod
+    def _scatter_type(cls, num_points: int) -> str:
+        """
+        按点数选择2D散点的trace类型
 
         Args:
-            fig: plotly Figure对象
+            num_points: 散点数量
+
+        Returns:
+            'scattergl'（点数较多时）或 'scatter'
+        """
+        return 'scattergl' if num_points >= cls.MIN_WEBGL_ROWS else 'scatter'
+
+    @classmethod
+    def _points_spec(cls, points, use_3d: bool, **kwargs) -> dict:
+        """
+        由点坐标构建散点trace的字典描述
+
+        各绘图方法把trace描述收集到列表中，最后一次性传给 go.Figure(data=...)，
+        比逐个创建trace对象再 add_trace 少了每个trace的单独校验
+
+        Args:
+            points: 点坐标 shape=(N, 3)，2D散点也可以是 (N, 2)
+            use_3d: 是否为3D散点
+            **kwargs: 其余trace属性（mode、marker、name等）
+
+        Returns:
+            trace属性字典
+        """
+        xyz = _xyz(points)
+        if use_3d:
+            return dict(type='scatter3d', x=xyz[0], y=xyz[1], z=xyz[2], **kwargs)
+        return dict(type=cls._scatter_type(xyz.shape[1]), x=xyz[0], y=xyz[1], **kwargs)
+
+    def _fingerprint_cloud(self, fingerprint_db, downsample_factor: int) -> np.ndarray:
+        """
+        获取3D显示用的指纹点云，同一指纹库未修改时按目标点数复用下采样结果
+
+        Args:
+            fingerprint_db: FingerprintDatabase对象
+            downsample_factor: 下采样因子
+
+        Returns:
+            下采样后的点坐标 shape=(M, 3)
+        """
+        positions, _ = _get_fingerprints(fingerprint_db)
+        if len(positions) <= 100:
+            return positions
+
+        max_points = self._cloud_budget(len(positions), downsample_factor)
+        version = getattr(fingerprint_db, 'version', None)
+        cached = _CLOUD_CACHE.get(fingerprint_db)
+        if cached is None or cached[0] != version:
+            cached = (version, {})
+            if version is not None:
+                _CLOUD_CACHE[fingerprint_db] = cached
+
+        cloud = cached[1].get(max_points)
+        if cloud is None:
+            cloud = self._decimate_points(positions, max_points)
+            cached[1][max_points] = cloud
+        return cloud
+
+    def _context_specs(self, fingerprint_db, use_3d: bool, fingerprint_marker: dict, ap_marker: dict,
+                       show_fingerprints: bool = True, downsample_factor: int = 10) -> List[dict]:
+        """
+        构建指纹点和AP位置的trace描述（定位结果图与轨迹图共用）
+
+        Args:
+            fingerprint_db: FingerprintDatabase对象，为None时返回空列表
+            use_3d: 是否为3D图形
+            fingerprint_marker: 指纹点的marker样式
+            ap_marker: AP的marker样式
+            show_fingerprints: 是否显示指纹点
+            downsample_factor: 3D指纹点云下采样因子
+
+        Returns:
+            trace属性字典列表
+        """
+        specs = []
+        if not fingerprint_db:
+            return specs
+
+        if show_fingerprints:
+            if use_3d:
+                # 3D点云体素下采样
+                positions = self._fingerprint_cloud(fingerprint_db, downsample_factor)
+            else:
+                positions, _ = _get_fingerprints(fingerprint_db)
+            specs.append(self._points_spec(positions, use_3d, mode='markers', marker=fingerprint_marker,
+                                           name='Fingerprint Points', hoverinfo='skip'))
+
+        if hasattr(fingerprint_db, 'ap_positions'):
+            ap_positions = fingerprint_db.ap_positions
+            if use_3d:
+                hover = dict(text=np.char.add('AP ', np.arange(len(ap_positions)).astype(str)), hoverinfo='text')
+            else:
+                hover = dict(hoverinfo='name')
+            specs.append(self._points_spec(ap_positions, use_3d, mode='markers', marker=ap_marker,
+                                           name='Access Points', **hover))
+        return specs
+
+    @classmethod
+    def _cloud_budget(cls, num_points: int, downsample_factor: int) -> int:
+        """
+        3D指纹点云的目标点数：约 1/downsample_factor，且不超过 MAX_CLOUD_POINTS
+
+        Args:
+            num_points: 原始点数
+            downsample_factor: 下采样因子
+
+        Returns:
+            目标点数
+        """
+        return max(1, min(cls.MAX_CLOUD_POINTS, -(-num_points // max(1, downsample_factor))))
+
+    @staticmethod
+    def _bucket_minmax(points: np.ndarray, n_buckets: int) -> np.ndarray:
+        """
+        M4/MinMax分桶降采样：按顺序分为约 n_buckets 个等长桶，每个桶保留首尾点及各坐标分量的最小/最大值点
+
+        Args:
+            points: 按时间顺序排列的点 shape=(N, D)
+            n_buckets: 桶数
+
+        Returns:
+            保留点的下标（递增、无重复）
+        """
+        n = len(points)
+        size = -(-n // n_buckets)
+        num_blocks = -(-n // size)
+
+        # 末尾不足一桶时以末点补齐，整理为 (桶, 桶内点, 坐标) 后按桶求极值
+        pad = num_blocks * size - n
+        if pad:
+            points = np.concatenate([points, np.repeat(points[-1:], pad, axis=0)])
+        blocks = points.reshape(num_blocks, size, -1)
+        base = np.arange(num_blocks) * size
+
+        keep = np.concatenate([
+            base,
+            base + size - 1,
+            (base[:, None] + blocks.argmin(axis=1)).ravel(),
+            (base[:, None] + blocks.argmax(axis=1)).ravel(),
+        ])
+        # 落在补齐部分的下标与末点取值相同，归到末点
+        return np.unique(np.minimum(keep, n - 1))
+
+    @classmethod
+    def _reduce_trajectory(cls, trajectory: np.ndarray, use_3d: bool) -> np.ndarray:
+        """
+        长轨迹绘制前的分桶降采样（点数不超过 2*TRAJECTORY_BUCKETS 时原样返回）
+
+        Args:
+            trajectory: 轨迹 shape=(N, 3)
+            use_3d: 是否按三个坐标分量保留极值点（否则只看X, Y）
+
+        Returns:
+            降采样后的轨迹
+        """
+        if len(trajectory) <= 2 * cls.TRAJECTORY_BUCKETS:
+            return trajectory
+        dims = 3 if use_3d else 2
+        return trajectory[cls._bucket_minmax(trajectory[:, :dims], cls.TRAJECTORY_BUCKETS)]
+
+    @staticmethod
+    def _decimate_points(positions: np.ndarray, max_points: int) -> np.ndarray:
+        """
+        体素网格下采样：每个被占据的体素保留一个代表点
+
+        与 positions[::k] 的等间隔抽取不同，结果在空间上均匀覆盖整个点云范围。
+
+        Args:
+            positions: 点坐标 shape=(N, 3)
+            max_points: 目标点数上限
+
+        Returns:
+            下采样后的点（保持原有顺序），点数不超过 max_points
+        """
+        n = len(positions)
+        if n <= max_points:
+            return positions
+
+        mins = positions.min(axis=0)
+        extent = np.ptp(positions, axis=0)
+        # 以包围盒体积估计初始体素边长，扁平方向（如单层指纹）按1个体素处理
+        active = extent > 0
+        cell = (np.prod(extent[active]) / max_points) ** (1.0 / max(1, active.sum()))
+
+        for _ in range(8):
+            voxel = np.floor_divide(positions - mins, cell).astype(np.int64)
+            # 三维体素下标展平为一维键，一维 unique 比按行 unique 快得多
+            dims = voxel.max(axis=0) + 1
+            keys = (voxel[:, 0] * dims[1] + voxel[:, 1]) * dims[2] + voxel[:, 2]
+            _, first = np.unique(keys, return_index=True)
+            if len(first) <= max_points:
+                break
+            # 占据体素过多时按比例放大体素
+            cell *= (len(first) / max_points) ** (1.0 / max(1, active.sum())) * 1.05
+
+        if len(first) > max_points:
+            first = first[:max_points]
+        first.sort()
+        return positions[first]
+
+    @staticmethod
+    def _clean_mesh(mesh) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        去掉重复和退化的面片，减少半透明渲染时的重叠绘制
+
+        同一组顶点上的重复面片（如双面导出的正反两面）只保留一份，
+        退化（零面积）面片不可见，直接去掉；其余面片原样保留
+
+        Args:
+            mesh: trimesh.Trimesh对象
+
+        Returns:
+            (vertices, faces): 顶点 shape=(V, 3), 保留的面片 shape=(F, 3)
+        """
+        skin = mesh.copy()
+        skin.merge_vertices()
+        faces = skin.faces
+
+        # 不区分朝向地比较面片，每组重复面片保留第一次出现的那个
+        _, first = np.unique(np.sort(faces, axis=1), axis=0, return_index=True)
+        keep = np.zeros(len(faces), dtype=bool)
+        keep[first] = True
+        keep &= skin.nondegenerate_faces()
+        if keep.all():
+            return skin.vertices, faces
+
+        skin.update_faces(keep)
+        skin.remove_unreferenced_vertices()
+        print(f"模型可视化去除重复/退化面片: {len(faces)} -> {len(skin.faces)}")
+        return skin.vertices, skin.faces
+
+    def _model_trace(self):
+        """
+        获取3D模型的网格trace（同一网格只构建一次）
+
+        Returns:
+            go.Mesh3d对象，未加载模型或构建失败时返回None
         """
         if self.model is None or self.model.mesh is None:
-            return
+            return None
+
+        go = _get_go()
 
         try:
-            # 提取模型的所有三角面片
-            # IndoorModel.mesh 是 trimesh.Trimesh 对象
-            vertices = self.model.mesh.vertices
-            faces = self.model.mesh.faces
-
-            # 创建3D网格
-            fig.add_trace(go.Mesh3d(
-                x=vertices[:, 0],
-                y=vertices[:, 1],
-                z=vertices[:, 2],
-                i=faces[:, 0],
-                j=faces[:, 1],
-                k=faces[:, 2],
-                color='lightblue',
-                opacity=0.3,
-                name='室内模型',
-                hoverinfo='skip',
-                showlegend=True
-            ))
+            mesh = self.model.mesh
+            if self._mesh_trace_cache is None or self._mesh_trace_cache[0] is not mesh:
+                # 提取模型的三角面片（去掉重复和退化面片）
+                # IndoorModel.mesh 是 trimesh.Trimesh 对象
+                vertices, faces = self._clean_mesh(mesh)
+                vertices = _xyz(vertices)
+                faces = np.ascontiguousarray(np.asarray(faces, dtype=np.int32).T)
+
+                # 创建3D网格（按列拆分前先转置为连续行，避免逐列切片产生跨步视图）
+                trace = go.Mesh3d(
+                    x=vertices[0],
+                    y=vertices[1],
+                    z=vertices[2],
+                    i=faces[0],
+                    j=faces[1],
+                    k=faces[2],
+                    color='lightblue',
+                    opacity=0.3,
+                    name='室内模型',
+                    hoverinfo='skip',
+                    showlegend=True
+                )
+                self._mesh_trace_cache = (mesh, trace)
 
             print("已添加3D模型到可视化")
+            return self._mesh_trace_cache[1]
         except Exception as e:
             print(f"添加模型失败: {e}")
+            return None
+
+    def _add_model_to_figure(self, fig):
+        """
+        将3D模型添加到图形中
+
+        Args:
+            fig: plotly Figure对象
+        """
+        trace = self._model_trace()
+        if trace is not None:
+            fig.add_trace(trace)
 
     def plot_signal_heatmap(self, fingerprint_db, ap_index: int = 0, save_path: str = None):
         """
@@ -65,43 +532,37 @@ class VisualizerPlotly:
             fingerprint_db: FingerprintDatabase对象
             ap_index: AP索引
             save_path: 保存路径
+
+        Returns:
+            plotly Figure对象，可再用 save() 保存
         """
-        positions, rssi_matrix = fingerprint_db.get_all_fingerprints()
-
-        # 提取X, Y坐标和RSSI值
-        x = positions[:, 0]
-        y = positions[:, 1]
-        rssi = rssi_matrix[:, ap_index]
-
-        # 创建2D热图
-        fig = go.Figure(data=go.Scatter(
-            x=x,
-            y=y,
-            mode='markers',
-            marker=dict(
-                size=8,
-                color=rssi,
-                colorscale='Viridis',
-                showscale=True,
-                colorbar=dict(title="RSSI (dBm)"),
-                line=dict(width=0)
-            ),
-            text=[f'RSSI: {r:.1f} dBm' for r in rssi],
-            hoverinfo='text+x+y'
-        ))
+        go = _get_go()
+        x_centers, y_centers, grids = _get_heatmap_grids(fingerprint_db, self.HEATMAP_BINS)
+
+        # 创建2D热图：所有AP的分箱热图一次算好并缓存，这里只取当前AP
+        traces = [dict(
+            type='heatmap',
+            x=x_centers,
+            y=y_centers,
+            z=grids[ap_index],
+            colorscale='Viridis',
+            colorbar=dict(title="RSSI (dBm)"),
+            # 悬停文字由浏览器端按需格式化，不再为每个点生成Python字符串
+            hovertemplate='RSSI: %{z:.1f} dBm<br>X: %{x:.2f}<br>Y: %{y:.2f}<extra></extra>'
+        )]
 
         # 标记AP位置
         if hasattr(fingerprint_db, 'ap_positions'):
-            ap_pos = fingerprint_db.ap_positions[ap_index]
-            fig.add_trace(go.Scatter(
-                x=[ap_pos[0]],
-                y=[ap_pos[1]],
+            traces.append(self._points_spec(
+                fingerprint_db.ap_positions[ap_index:ap_index + 1], False,
                 mode='markers',
                 marker=dict(size=20, color='red', symbol='star', line=dict(width=2, color='black')),
                 name=f'AP {ap_index}',
                 hoverinfo='name'
             ))
 
+        fig = go.Figure(data=traces)
+
         fig.update_layout(
             title=f'AP {ap_index} Signal Strength Heatmap',
             xaxis_title='X (m)',
@@ -115,11 +576,12 @@ class VisualizerPlotly:
         fig.update_xaxes(scaleanchor="y", scaleratio=1)
 
         if save_path:
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            fig.write_html(save_path)
-            print(f"热图已保存到: {save_path}")
+            self.save(fig, save_path, '热图')
+
+        if self.auto_show and not save_path:
+            fig.show()
 
-        fig.show()
+        return fig
 
     def plot_all_aps_heatmap(self, fingerprint_db, save_path: str = None):
         """
@@ -128,9 +590,16 @@ class VisualizerPlotly:
         Args:
             fingerprint_db: FingerprintDatabase对象
             save_path: 保存路径
+
+        Returns:
+            plotly Figure对象，可再用 save() 保存
         """
-        positions, rssi_matrix = fingerprint_db.get_all_fingerprints()
-        num_aps = rssi_matrix.shape[1]
+        go = _get_go()
+        from plotly.subplots import make_subplots
+
+        # 每个AP的分箱热图（与单AP热图共用缓存）
+        x_centers, y_centers, grids = _get_heatmap_grids(fingerprint_db, self.HEATMAP_BINS)
+        num_aps = len(grids)
 
         # 创建子图
         cols = 2
@@ -147,23 +616,13 @@ class VisualizerPlotly:
             row = ap_idx // cols + 1
             col = ap_idx % cols + 1
 
-            x = positions[:, 0]
-            y = positions[:, 1]
-            rssi = rssi_matrix[:, ap_idx]
-
             fig.add_trace(
-                go.Scatter(
-                    x=x,
-                    y=y,
-                    mode='markers',
-                    marker=dict(
-                        size=6,
-                        color=rssi,
-                        colorscale='Viridis',
-                        showscale=False,
-                        line=dict(width=0)
-                    ),
-                    showlegend=False,
+                go.Heatmap(
+                    x=x_centers,
+                    y=y_centers,
+                    z=grids[ap_idx],
+                    colorscale='Viridis',
+                    showscale=False,
                     hoverinfo='skip'
                 ),
                 row=row, col=col
@@ -191,11 +650,12 @@ class VisualizerPlotly:
         )
 
         if save_path:
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            fig.write_html(save_path)
-            print(f"所有AP热图已保存到: {save_path}")
+            self.save(fig, save_path, '所有AP热图')
 
-        fig.show()
+        if self.auto_show and not save_path:
+            fig.show()
+
+        return fig
 
     def plot_localization_result(self, true_position: np.ndarray, estimated_position: np.ndarray,
                                   fingerprint_db=None, save_path: str = None, use_3d: bool = True,
@@ -211,71 +671,37 @@ class VisualizerPlotly:
             use_3d: 是否使用3D可视化 (默认True)
             show_fingerprints: 是否显示指纹点 (默认True)
             downsample_factor: 指纹点下采样因子 (默认10)
+
+        Returns:
+            plotly Figure对象，可再用 save() 保存
         """
         if use_3d:
-            self._plot_localization_result_3d(true_position, estimated_position, fingerprint_db,
+            return self._plot_localization_result_3d(true_position, estimated_position, fingerprint_db,
                                              save_path, show_fingerprints, downsample_factor)
         else:
-            self._plot_localization_result_2d(true_position, estimated_position, fingerprint_db, save_path)
+            return self._plot_localization_result_2d(true_position, estimated_position, fingerprint_db, save_path)
 
     def _plot_localization_result_2d(self, true_position: np.ndarray, estimated_position: np.ndarray,
                                       fingerprint_db=None, save_path: str = None):
         """绘制2D定位结果"""
-        fig = go.Figure()
-
-        # 绘制指纹点
-        if fingerprint_db:
-            positions, _ = fingerprint_db.get_all_fingerprints()
-            fig.add_trace(go.Scatter(
-                x=positions[:, 0],
-                y=positions[:, 1],
-                mode='markers',
-                marker=dict(size=3, color='lightgray', opacity=0.5),
-                name='Fingerprint Points',
-                hoverinfo='skip'
-            ))
-
-            # 绘制AP位置
-            if hasattr(fingerprint_db, 'ap_positions'):
-                ap_positions = np.array(fingerprint_db.ap_positions)
-                fig.add_trace(go.Scatter(
-                    x=ap_positions[:, 0],
-                    y=ap_positions[:, 1],
-                    mode='markers',
-                    marker=dict(size=15, color='red', symbol='triangle-up', line=dict(width=2, color='black')),
-                    name='Access Points',
-                    hoverinfo='name'
-                ))
-
-        # 绘制真实位置
-        fig.add_trace(go.Scatter(
-            x=[true_position[0]],
-            y=[true_position[1]],
-            mode='markers',
-            marker=dict(size=15, color='green', symbol='circle', line=dict(width=2, color='black')),
-            name='True Position',
-            hoverinfo='name'
-        ))
-
-        # 绘制估计位置
-        fig.add_trace(go.Scatter(
-            x=[estimated_position[0]],
-            y=[estimated_position[1]],
-            mode='markers',
-            marker=dict(size=15, color='blue', symbol='square', line=dict(width=2, color='black')),
-            name='Estimated Position',
-            hoverinfo='name'
-        ))
-
-        # 绘制误差线
-        fig.add_trace(go.Scatter(
-            x=[true_position[0], estimated_position[0]],
-            y=[true_position[1], estimated_position[1]],
-            mode='lines',
-            line=dict(color='black', width=2, dash='dash'),
-            name='Location Error',
-            hoverinfo='skip'
-        ))
+        go = _get_go()
+        marker_line = dict(width=2, color='black')
+
+        # 指纹点、AP位置、真实/估计位置、误差线
+        traces = self._context_specs(
+            fingerprint_db, False,
+            fingerprint_marker=dict(size=3, color='lightgray', opacity=0.5),
+            ap_marker=dict(size=15, color='red', symbol='triangle-up', line=marker_line)
+        )
+        traces += [
+            self._points_spec([true_position], False, mode='markers', name='True Position', hoverinfo='name',
+                              marker=dict(size=15, color='green', symbol='circle', line=marker_line)),
+            self._points_spec([estimated_position], False, mode='markers', name='Estimated Position', hoverinfo='name',
+                              marker=dict(size=15, color='blue', symbol='square', line=marker_line)),
+            self._points_spec([true_position, estimated_position], False, mode='lines', name='Location Error',
+                              hoverinfo='skip', line=dict(color='black', width=2, dash='dash')),
+        ]
+        fig = go.Figure(data=traces)
 
         # 计算误差
         error = np.linalg.norm(true_position[:2] - estimated_position[:2])
@@ -293,11 +719,12 @@ class VisualizerPlotly:
         fig.update_xaxes(scaleanchor="y", scaleratio=1)
 
         if save_path:
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            fig.write_html(save_path)
-            print(f"定位结果图已保存到: {save_path}")
+            self.save(fig, save_path, '定位结果图')
+
+        if self.auto_show and not save_path:
+            fig.show()
 
-        fig.show()
+        return fig
 
     def _plot_localization_result_3d(self, true_position: np.ndarray, estimated_position: np.ndarray,
                                       fingerprint_db=None, save_path: str = None,
@@ -307,105 +734,92 @@ class VisualizerPlotly:
 
         使用Plotly的WebGL渲染，可以流畅处理大量数据点
         """
-        fig = go.Figure()
+        # 静态内容（模型、指纹点、AP）只取决于这些参数，persistent模式下参数不变时复用图形；
+        # 指纹库修改计数(version)和AP位置也计入，指纹库更新后重新构建
+        ap_positions = getattr(fingerprint_db, 'ap_positions', None)
+        ap_key = None if ap_positions is None else np.asarray(ap_positions, dtype=np.float64).tobytes()
+        key = (self.model, fingerprint_db, getattr(fingerprint_db, 'version', None), ap_key,
+               show_fingerprints, downsample_factor)
+        if self.persistent and self._fig is not None and self._fig_key == key:
+            fig = self._fig
+        else:
+            fig = self._build_localization_figure_3d(fingerprint_db, show_fingerprints, downsample_factor)
+            if self.persistent:
+                self._fig, self._fig_key = fig, key
 
-        # 添加3D模型
-        self._add_model_to_figure(fig)
+        # 计算误差
+        error_3d = np.linalg.norm(true_position - estimated_position)
+        error_2d = np.linalg.norm(true_position[:2] - estimated_position[:2])
 
-        # 绘制指纹点 (使用WebGL加速)
-        if fingerprint_db and show_fingerprints:
-            positions, _ = fingerprint_db.get_all_fingerprints()
-            # 下采样
-            if len(positions) > 100:
-                positions = positions[::downsample_factor]
+        # 只更新随每次定位变化的trace和标题
+        with fig.batch_update():
+            fig.update_traces(
+                x=[true_position[0]], y=[true_position[1]], z=[true_position[2]],
+                text=f'True: ({true_position[0]:.2f}, {true_position[1]:.2f}, {true_position[2]:.2f})',
+                selector=dict(name='True Position')
+            )
+            fig.update_traces(
+                x=[estimated_position[0]], y=[estimated_position[1]], z=[estimated_position[2]],
+                text=f'Estimated: ({estimated_position[0]:.2f}, {estimated_position[1]:.2f}, {estimated_position[2]:.2f})',
+                selector=dict(name='Estimated Position')
+            )
+            fig.update_traces(
+                x=[true_position[0], estimated_position[0]],
+                y=[true_position[1], estimated_position[1]],
+                z=[true_position[2], estimated_position[2]],
+                selector=dict(name='Location Error')
+            )
+            fig.update_layout(
+                title=f'3D Indoor Localization Result<br>3D Error: {error_3d:.2f} m | 2D Error: {error_2d:.2f} m | ΔZ: {abs(true_position[2] - estimated_position[2]):.2f} m'
+            )
 
-            fig.add_trace(go.Scatter3d(
-                x=positions[:, 0],
-                y=positions[:, 1],
-                z=positions[:, 2],
-                mode='markers',
-                marker=dict(
-                    size=2,
-                    color='lightgray',
-                    opacity=0.2,
-                    line=dict(width=0)
-                ),
-                name='Fingerprint Points',
-                hoverinfo='skip',
-                showlegend=True
-            ))
+        if save_path:
+            self.save(fig, save_path, '定位结果图')
 
-        # 绘制AP位置
-        if fingerprint_db and hasattr(fingerprint_db, 'ap_positions'):
-            ap_positions = np.array(fingerprint_db.ap_positions)
-            fig.add_trace(go.Scatter3d(
-                x=ap_positions[:, 0],
-                y=ap_positions[:, 1],
-                z=ap_positions[:, 2],
-                mode='markers',
-                marker=dict(
-                    size=10,
-                    color='red',
-                    symbol='diamond',
-                    line=dict(width=2, color='black')
-                ),
-                name='Access Points',
-                text=[f'AP {i}' for i in range(len(ap_positions))],
-                hoverinfo='text'
-            ))
+        if self.auto_show and not save_path:
+            fig.show()
 
-        # 绘制真实位置
-        fig.add_trace(go.Scatter3d(
-            x=[true_position[0]],
-            y=[true_position[1]],
-            z=[true_position[2]],
-            mode='markers',
-            marker=dict(
-                size=10,
-                color='green',
-                symbol='circle',
-                line=dict(width=2, color='black')
-            ),
-            name='True Position',
-            text=f'True: ({true_position[0]:.2f}, {true_position[1]:.2f}, {true_position[2]:.2f})',
-            hoverinfo='text'
-        ))
+        return fig
 
-        # 绘制估计位置
-        fig.add_trace(go.Scatter3d(
-            x=[estimated_position[0]],
-            y=[estimated_position[1]],
-            z=[estimated_position[2]],
-            mode='markers',
-            marker=dict(
-                size=10,
-                color='blue',
-                symbol='square',
-                line=dict(width=2, color='black')
-            ),
-            name='Estimated Position',
-            text=f'Estimated: ({estimated_position[0]:.2f}, {estimated_position[1]:.2f}, {estimated_position[2]:.2f})',
-            hoverinfo='text'
-        ))
+    def _build_localization_figure_3d(self, fingerprint_db=None, show_fingerprints: bool = True,
+                                      downsample_factor: int = 10):
+        """
+        构建3D定位结果图形的静态部分，真实/估计位置与误差线的坐标由调用方填入
 
-        # 绘制误差线
-        fig.add_trace(go.Scatter3d(
-            x=[true_position[0], estimated_position[0]],
-            y=[true_position[1], estimated_position[1]],
-            z=[true_position[2], estimated_position[2]],
-            mode='lines',
-            line=dict(color='black', width=4, dash='dash'),
-            name='Location Error',
-            hoverinfo='skip'
-        ))
+        Args:
+            fingerprint_db: FingerprintDatabase对象
+            show_fingerprints: 是否显示指纹点
+            downsample_factor: 指纹点下采样因子
 
-        # 计算误差
-        error_3d = np.linalg.norm(true_position - estimated_position)
-        error_2d = np.linalg.norm(true_position[:2] - estimated_position[:2])
+        Returns:
+            plotly Figure对象
+        """
+        go = _get_go()
+        marker_line = dict(width=2, color='black')
+
+        # 3D模型、指纹点 (使用WebGL加速)、AP位置
+        model_trace = self._model_trace()
+        traces = [model_trace] if model_trace is not None else []
+        traces += self._context_specs(
+            fingerprint_db, True,
+            fingerprint_marker=dict(size=2, color='lightgray', opacity=0.2, line=dict(width=0)),
+            ap_marker=dict(size=10, color='red', symbol='diamond', line=marker_line),
+            show_fingerprints=show_fingerprints, downsample_factor=downsample_factor
+        )
+
+        # 真实/估计位置与误差线，坐标在每次绘图时填入
+        traces += [
+            dict(type='scatter3d', mode='markers', name='True Position', hoverinfo='text',
+                 marker=dict(size=10, color='green', symbol='circle', line=marker_line)),
+            dict(type='scatter3d', mode='markers', name='Estimated Position', hoverinfo='text',
+                 marker=dict(size=10, color='blue', symbol='square', line=marker_line)),
+            dict(type='scatter3d', mode='lines', name='Location Error', hoverinfo='skip',
+                 line=dict(color='black', width=4, dash='dash')),
+        ]
+        fig = go.Figure(data=traces)
 
         # 设置布局
         fig.update_layout(
-            title=f'3D Indoor Localization Result<br>3D Error: {error_3d:.2f} m | 2D Error: {error_2d:.2f} m | ΔZ: {abs(true_position[2] - estimated_position[2]):.2f} m',
             scene=dict(
                 xaxis_title='X (m)',
                 yaxis_title='Y (m)',
@@ -421,12 +835,7 @@ class VisualizerPlotly:
             height=900
         )
 
-        if save_path:
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            fig.write_html(save_path)
-            print(f"定位结果图已保存到: {save_path}")
-
-        fig.show()
+        return fig
 
     def plot_trajectory(self, true_trajectory: np.ndarray, estimated_trajectory: np.ndarray,
                         fingerprint_db=None, save_path: str = None, use_3d: bool = True,
@@ -442,86 +851,45 @@ class VisualizerPlotly:
             use_3d: 是否使用3D可视化 (默认True)
             show_fingerprints: 是否显示指纹点
             downsample_factor: 指纹点下采样因子
+
+        Returns:
+            plotly Figure对象，可再用 save() 保存
         """
         if use_3d:
-            self._plot_trajectory_3d(true_trajectory, estimated_trajectory, fingerprint_db,
+            return self._plot_trajectory_3d(true_trajectory, estimated_trajectory, fingerprint_db,
                                     save_path, show_fingerprints, downsample_factor)
         else:
-            self._plot_trajectory_2d(true_trajectory, estimated_trajectory, fingerprint_db, save_path)
+            return self._plot_trajectory_2d(true_trajectory, estimated_trajectory, fingerprint_db, save_path)
 
     def _plot_trajectory_2d(self, true_trajectory: np.ndarray, estimated_trajectory: np.ndarray,
                             fingerprint_db=None, save_path: str = None):
         """绘制2D轨迹"""
-        fig = go.Figure()
-
-        # 绘制指纹点
-        if fingerprint_db:
-            positions, _ = fingerprint_db.get_all_fingerprints()
-            fig.add_trace(go.Scatter(
-                x=positions[:, 0],
-                y=positions[:, 1],
-                mode='markers',
-                marker=dict(size=2, color='lightgray', opacity=0.3),
-                name='Fingerprint Points',
-                hoverinfo='skip'
-            ))
-
-            # 绘制AP位置
-            if hasattr(fingerprint_db, 'ap_positions'):
-                ap_positions = np.array(fingerprint_db.ap_positions)
-                fig.add_trace(go.Scatter(
-                    x=ap_positions[:, 0],
-                    y=ap_positions[:, 1],
-                    mode='markers',
-                    marker=dict(size=12, color='red', symbol='triangle-up'),
-                    name='Access Points',
-                    hoverinfo='name'
-                ))
-
-        # 绘制真实轨迹
-        fig.add_trace(go.Scatter(
-            x=true_trajectory[:, 0],
-            y=true_trajectory[:, 1],
-            mode='lines+markers',
-            line=dict(color='green', width=3),
-            marker=dict(size=6, color='green'),
-            name='True Trajectory',
-            hoverinfo='x+y'
-        ))
-
-        # 绘制估计轨迹
-        fig.add_trace(go.Scatter(
-            x=estimated_trajectory[:, 0],
-            y=estimated_trajectory[:, 1],
-            mode='lines+markers',
-            line=dict(color='blue', width=3),
-            marker=dict(size=6, color='blue', symbol='square'),
-            name='Estimated Trajectory',
-            hoverinfo='x+y'
-        ))
-
-        # 标记起点和终点
-        fig.add_trace(go.Scatter(
-            x=[true_trajectory[0, 0]],
-            y=[true_trajectory[0, 1]],
-            mode='markers',
-            marker=dict(size=20, color='green', symbol='star'),
-            name='Start Point',
-            hoverinfo='name'
-        ))
+        go = _get_go()
 
-        fig.add_trace(go.Scatter(
-            x=[true_trajectory[-1, 0]],
-            y=[true_trajectory[-1, 1]],
-            mode='markers',
-            marker=dict(size=20, color='red', symbol='star'),
-            name='End Point',
-            hoverinfo='name'
-        ))
+        # 指纹点、AP位置、真实/估计轨迹（长轨迹分桶降采样）、起点和终点
+        traces = self._context_specs(
+            fingerprint_db, False,
+            fingerprint_marker=dict(size=2, color='lightgray', opacity=0.3),
+            ap_marker=dict(size=12, color='red', symbol='triangle-up')
+        )
+        traces += [
+            self._points_spec(self._reduce_trajectory(true_trajectory, False), False, mode='lines+markers',
+                              name='True Trajectory', hoverinfo='x+y',
+                              line=dict(color='green', width=3), marker=dict(size=6, color='green')),
+            self._points_spec(self._reduce_trajectory(estimated_trajectory, False), False, mode='lines+markers',
+                              name='Estimated Trajectory',
+                              hoverinfo='x+y', line=dict(color='blue', width=3),
+                              marker=dict(size=6, color='blue', symbol='square')),
+            self._points_spec(true_trajectory[:1], False, mode='markers', name='Start Point', hoverinfo='name',
+                              marker=dict(size=20, color='green', symbol='star')),
+            self._points_spec(true_trajectory[-1:], False, mode='markers', name='End Point', hoverinfo='name',
+                              marker=dict(size=20, color='red', symbol='star')),
+        ]
+        fig = go.Figure(data=traces)
 
         # 计算平均误差
-        errors = np.linalg.norm(true_trajectory[:, :2] - estimated_trajectory[:, :2], axis=1)
-        mean_error = np.mean(errors)
+        diff = true_trajectory[:, :2] - estimated_trajectory[:, :2]
+        mean_error = np.mean(np.sqrt(np.einsum('ij,ij->i', diff, diff)))
 
         fig.update_layout(
             title=f'Indoor Localization Trajectory<br>Mean Location Error: {mean_error:.2f} m',
@@ -536,103 +904,53 @@ class VisualizerPlotly:
         fig.update_xaxes(scaleanchor="y", scaleratio=1)
 
         if save_path:
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            fig.write_html(save_path)
-            print(f"轨迹图已保存到: {save_path}")
+            self.save(fig, save_path, '轨迹图')
+
+        if self.auto_show and not save_path:
+            fig.show()
 
-        fig.show()
+        return fig
 
     def _plot_trajectory_3d(self, true_trajectory: np.ndarray, estimated_trajectory: np.ndarray,
                             fingerprint_db=None, save_path: str = None,
                             show_fingerprints: bool = True, downsample_factor: int = 10):
         """绘制3D轨迹 (高性能版本)"""
-        fig = go.Figure()
-
-        # 添加3D模型
-        self._add_model_to_figure(fig)
-
-        # 绘制指纹点
-        if fingerprint_db and show_fingerprints:
-            positions, _ = fingerprint_db.get_all_fingerprints()
-            if len(positions) > 100:
-                positions = positions[::downsample_factor]
-
-            fig.add_trace(go.Scatter3d(
-                x=positions[:, 0],
-                y=positions[:, 1],
-                z=positions[:, 2],
-                mode='markers',
-                marker=dict(size=1.5, color='lightgray', opacity=0.15, line=dict(width=0)),
-                name='Fingerprint Points',
-                hoverinfo='skip'
-            ))
-
-        # 绘制AP位置
-        if fingerprint_db and hasattr(fingerprint_db, 'ap_positions'):
-            ap_positions = np.array(fingerprint_db.ap_positions)
-            fig.add_trace(go.Scatter3d(
-                x=ap_positions[:, 0],
-                y=ap_positions[:, 1],
-                z=ap_positions[:, 2],
-                mode='markers',
-                marker=dict(size=8, color='red', symbol='diamond', line=dict(width=2, color='black')),
-                name='Access Points',
-                text=[f'AP {i}' for i in range(len(ap_positions))],
-                hoverinfo='text'
-            ))
-
-        # 绘制真实轨迹
-        fig.add_trace(go.Scatter3d(
-            x=true_trajectory[:, 0],
-            y=true_trajectory[:, 1],
-            z=true_trajectory[:, 2],
-            mode='lines+markers',
-            line=dict(color='green', width=4),
-            marker=dict(size=4, color='green'),
-            name='True Trajectory',
-            hoverinfo='x+y+z'
-        ))
-
-        # 绘制估计轨迹
-        fig.add_trace(go.Scatter3d(
-            x=estimated_trajectory[:, 0],
-            y=estimated_trajectory[:, 1],
-            z=estimated_trajectory[:, 2],
-            mode='lines+markers',
-            line=dict(color='blue', width=4),
-            marker=dict(size=4, color='blue', symbol='square'),
-            name='Estimated Trajectory',
-            hoverinfo='x+y+z'
-        ))
-
-        # 标记起点和终点
-        fig.add_trace(go.Scatter3d(
-            x=[true_trajectory[0, 0]],
-            y=[true_trajectory[0, 1]],
-            z=[true_trajectory[0, 2]],
-            mode='markers',
-            marker=dict(size=12, color='green', symbol='diamond', line=dict(width=2, color='black')),
-            name='Start Point',
-            text='Start',
-            hoverinfo='text'
-        ))
-
-        fig.add_trace(go.Scatter3d(
-            x=[true_trajectory[-1, 0]],
-            y=[true_trajectory[-1, 1]],
-            z=[true_trajectory[-1, 2]],
-            mode='markers',
-            marker=dict(size=12, color='red', symbol='diamond', line=dict(width=2, color='black')),
-            name='End Point',
-            text='End',
-            hoverinfo='text'
-        ))
+        go = _get_go()
+        marker_line = dict(width=2, color='black')
+
+        # 3D模型、指纹点、AP位置
+        model_trace = self._model_trace()
+        traces = [model_trace] if model_trace is not None else []
+        traces += self._context_specs(
+            fingerprint_db, True,
+            fingerprint_marker=dict(size=1.5, color='lightgray', opacity=0.15, line=dict(width=0)),
+            ap_marker=dict(size=8, color='red', symbol='diamond', line=marker_line),
+            show_fingerprints=show_fingerprints, downsample_factor=downsample_factor
+        )
 
-        # 计算误差
-        errors_3d = np.linalg.norm(true_trajectory - estimated_trajectory, axis=1)
-        errors_2d = np.linalg.norm(true_trajectory[:, :2] - estimated_trajectory[:, :2], axis=1)
-        mean_error_3d = np.mean(errors_3d)
-        mean_error_2d = np.mean(errors_2d)
+        # 真实/估计轨迹（长轨迹分桶降采样）、起点和终点
+        traces += [
+            self._points_spec(self._reduce_trajectory(true_trajectory, True), True, mode='lines+markers',
+                              name='True Trajectory',
+                              hoverinfo='x+y+z', line=dict(color='green', width=4),
+                              marker=dict(size=4, color='green')),
+            self._points_spec(self._reduce_trajectory(estimated_trajectory, True), True, mode='lines+markers',
+                              name='Estimated Trajectory',
+                              hoverinfo='x+y+z', line=dict(color='blue', width=4),
+                              marker=dict(size=4, color='blue', symbol='square')),
+            self._points_spec(true_trajectory[:1], True, mode='markers', name='Start Point', text='Start',
+                              hoverinfo='text', marker=dict(size=12, color='green', symbol='diamond', line=marker_line)),
+            self._points_spec(true_trajectory[-1:], True, mode='markers', name='End Point', text='End',
+                              hoverinfo='text', marker=dict(size=12, color='red', symbol='diamond', line=marker_line)),
+        ]
+        fig = go.Figure(data=traces)
+
+        # 计算误差：差值只求一次，水平平方和在2D/3D误差间共用
+        diff = true_trajectory - estimated_trajectory
+        sq = diff * diff
+        s2 = sq[:, 0] + sq[:, 1]
+        mean_error_2d = np.mean(np.sqrt(s2))
+        mean_error_3d = np.mean(np.sqrt(s2 + sq[:, 2]))
 
         fig.update_layout(
             title=f'3D Indoor Localization Trajectory<br>Mean 3D Error: {mean_error_3d:.2f} m | Mean 2D Error: {mean_error_2d:.2f} m',
@@ -650,75 +968,85 @@ class VisualizerPlotly:
         )
 
         if save_path:
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            fig.write_html(save_path)
-            print(f"轨迹图已保存到: {save_path}")
+            self.save(fig, save_path, '轨迹图')
+
+        if self.auto_show and not save_path:
+            fig.show()
 
-        fig.show()
+        return fig
 
-    def plot_error_cdf(self, errors: np.ndarray, save_path: str = None):
+    def plot_error_cdf(self, errors: np.ndarray, save_path: str = None, n_samples: int = 1000):
         """
         绘制定位误差CDF曲线
 
         Args:
             errors: 误差数组
             save_path: 保存路径
+            n_samples: CDF曲线的最大绘制点数，误差数超过该值时按LTTB降采样（百分位仍按全部误差计算）
+
+        Returns:
+            plotly Figure对象，可再用 save() 保存
         """
+        go = _get_go()
+
         # 排序误差
         sorted_errors = np.sort(errors)
         cdf = np.arange(1, len(sorted_errors) + 1) / len(sorted_errors)
 
+        # 曲线降采样：绘制点数与HTML大小不再随误差数增长
+        curve_x, curve_y = sorted_errors, cdf
+        if len(sorted_errors) > n_samples:
+            if MinMaxLTTBDownsampler is not None:
+                keep = MinMaxLTTBDownsampler().downsample(curve_x, curve_y, n_out=n_samples)
+            else:
+                keep = _lttb_indices(curve_x, curve_y, n_samples)
+            curve_x, curve_y = curve_x[keep], curve_y[keep]
+
         fig = go.Figure()
 
-        # 绘制CDF曲线
-        fig.add_trace(go.Scatter(
-            x=sorted_errors,
-            y=cdf,
+        # 绘制CDF曲线：降采样后仍可达 n_samples 个点，与散点一样按点数切换WebGL
+        fig.add_trace(dict(
+            type=self._scatter_type(len(curve_x)),
+            x=curve_x,
+            y=curve_y,
             mode='lines',
             line=dict(color='blue', width=3),
             name='CDF',
             hoverinfo='x+y'
         ))
 
-        # 标记关键百分位
-        percentiles = [50, 75, 90, 95]
+        # 标记关键百分位：辅助线合并为一条以None分隔的折线，标注合并为一个trace
+        percentiles = np.array([50, 75, 90, 95])
         colors = ['green', 'orange', 'red', 'darkred']
+        probs = percentiles / 100
+        errors_at_p = np.percentile(sorted_errors, percentiles)
 
-        for p, color in zip(percentiles, colors):
-            idx = int(len(sorted_errors) * p / 100)
-            error_at_p = sorted_errors[idx]
-
-            # 垂直线
-            fig.add_trace(go.Scatter(
-                x=[error_at_p, error_at_p],
-                y=[0, p/100],
-                mode='lines',
-                line=dict(color=color, width=1, dash='dash'),
-                showlegend=False,
-                hoverinfo='skip'
-            ))
+        # 每个百分位一段折线 (e,0)->(e,p)->(0,p)，段间以None断开
+        n = len(percentiles)
+        line_x = np.empty((n, 4), dtype=object)
+        line_y = np.empty((n, 4), dtype=object)
+        line_x[:, 0], line_x[:, 1], line_x[:, 2], line_x[:, 3] = errors_at_p, errors_at_p, 0.0, None
+        line_y[:, 0], line_y[:, 1], line_y[:, 2], line_y[:, 3] = 0.0, probs, probs, None
 
-            # 水平线
-            fig.add_trace(go.Scatter(
-                x=[0, error_at_p],
-                y=[p/100, p/100],
-                mode='lines',
-                line=dict(color=color, width=1, dash='dash'),
-                showlegend=False,
-                hoverinfo='skip'
-            ))
+        fig.add_trace(go.Scatter(
+            x=line_x.ravel(),
+            y=line_y.ravel(),
+            mode='lines',
+            line=dict(color='gray', width=1, dash='dash'),
+            showlegend=False,
+            hoverinfo='skip'
+        ))
 
-            # 标注点
-            fig.add_trace(go.Scatter(
-                x=[error_at_p],
-                y=[p/100],
-                mode='markers+text',
-                marker=dict(size=8, color=color),
-                text=f'{p}%: {error_at_p:.2f}m',
-                textposition='top right',
-                showlegend=False,
-                hoverinfo='text'
-            ))
+        fig.add_trace(go.Scatter(
+            x=errors_at_p,
+            y=probs,
+            mode='markers+text',
+            marker=dict(size=8, color=colors),
+            text=[f'{p}%: {e:.2f}m' for p, e in zip(percentiles, errors_at_p)],
+            textposition='top right',
+            showlegend=False,
+            hoverinfo='text'
+        ))
 
         fig.update_layout(
             title='Localization Error Cumulative Distribution Function (CDF)',
@@ -732,11 +1060,12 @@ class VisualizerPlotly:
         )
 
         if save_path:
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            fig.write_html(save_path)
-            print(f"CDF图已保存到: {save_path}")
+            self.save(fig, save_path, 'CDF图')
+
+        if self.auto_show and not save_path:
+            fig.show()
 
-        fig.show()
+        return fig
 
 
 if __name__ == "__main__":
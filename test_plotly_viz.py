@@ -3,15 +3,23 @@
 演示新旧可视化系统的性能对比
 """
 
+import io
+import os
 import numpy as np
 import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from scipy.spatial.distance import cdist
 from src.utils import VisualizerPlotly
 from src.fingerprint import FingerprintDatabase
 
-def create_test_data():
-    """创建测试数据"""
-    print("生成测试数据...")
+def create_test_data(seed=None):
+    """
+    创建测试数据
 
+    Args:
+        seed: RSSI噪声的随机种子
+    """
     # 创建模拟指纹库
     db = FingerprintDatabase()
 
@@ -28,104 +36,129 @@ def create_test_data():
     y = np.linspace(0, 4, 20)
     z = np.linspace(0, 3, 15)
 
-    xx, yy, zz = np.meshgrid(x, y, z)
-    positions = np.stack([xx.flatten(), yy.flatten(), zz.flatten()], axis=1)
+    # 稀疏网格广播后直接写入 (N, 3) 数组，不生成三个稠密的中间网格
+    grids = np.meshgrid(x, y, z, indexing='ij', sparse=True)
+    positions = np.stack(np.broadcast_arrays(*grids), axis=-1).reshape(-1, 3)
 
-    print(f"指纹点数量: {len(positions)}")
+    # 为所有位置一次性生成模拟RSSI值：基于距离的简单路径损耗模型
+    rng = np.random.default_rng(seed)
+    distances = cdist(positions, np.array(db.ap_positions))  # (N, A)
+    rssi_matrix = -30 - 20 * np.log10(distances) + rng.normal(0, 2, size=distances.shape)
 
-    # 为每个位置生成模拟RSSI值
-    for pos in positions:
-        rssi_values = []
-        for ap_pos in db.ap_positions:
-            # 基于距离的简单路径损耗模型
-            distance = np.linalg.norm(np.array(pos) - np.array(ap_pos))
-            rssi = -30 - 20 * np.log10(distance) + np.random.normal(0, 2)
-            rssi_values.append(rssi)
-
-        db.add_fingerprint(tuple(pos), np.array(rssi_values))
+    db.add_fingerprints_bulk(positions, rssi_matrix)
 
     return db
 
-def test_3d_visualization():
-    """测试3D可视化性能"""
-    print("\n" + "="*60)
-    print("测试 Plotly 高性能3D可视化")
-    print("="*60)
+@lru_cache(maxsize=1)
+def get_test_db():
+    """获取各测试共用的指纹库（固定随机种子，只生成一次）"""
+    return create_test_data(seed=0)
+
+def warm_up():
+    """
+    预先完成第三方库的一次性初始化，避免计入第一张图的构建时间
+
+    plotly.graph_objects 在首次绘图时才导入，各trace类型的属性校验器在首次创建时加载，
+    热图分箱用到的 scipy.stats 也在首次调用时导入，这些都只在每个进程中发生一次
+    """
+    import plotly.graph_objects as go
+    import scipy.stats  # noqa: F401
+
+    trace_types = ('scatter', 'scattergl', 'scatter3d', 'heatmap', 'mesh3d')
+    go.Figure(data=[dict(type=t) for t in trace_types]).write_html(io.StringIO())
+
+def render_and_save(label, viz, plot, save_path, *args, **kwargs):
+    """
+    分别计时图形构建、HTML序列化和写盘
+
+    Args:
+        label: 结果中显示的图形名称
+        viz: VisualizerPlotly对象（auto_show=False）
+        plot: viz 的 plot_* 方法
+        save_path: HTML保存路径
+        *args, **kwargs: 传给 plot 的参数
+
+    Returns:
+        (label, save_path, 构建耗时, 序列化耗时, 写盘耗时)，耗时单位为秒
+    """
+    start = time.perf_counter()
+    fig = plot(*args, **kwargs)
+    build = time.perf_counter() - start
+
+    # 先序列化到内存缓冲区，不受磁盘和系统缓存影响
+    start = time.perf_counter()
+    buffer = io.StringIO()
+    viz.save(fig, buffer)
+    serialize = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(save_path, 'w', encoding='utf-8') as f:
+        f.write(buffer.getvalue())
+    write = time.perf_counter() - start
+
+    return label, save_path, build, serialize, write
 
+def test_3d_visualization():
+    """测试3D可视化性能，返回各图形的计时结果"""
     # 创建测试数据
-    db = create_test_data()
+    db = get_test_db()
 
     # 测试位置
     true_pos = np.array([2.0, 2.0, 1.5])
     est_pos = np.array([2.3, 1.8, 1.7])
 
     # 创建可视化器
-    viz = VisualizerPlotly()
+    viz = VisualizerPlotly(auto_show=False)
 
     # 测试1: 完整渲染
-    print("\n[测试1] 完整3D可视化（显示所有指纹点）")
-    start = time.time()
-    viz.plot_localization_result(
+    results = [render_and_save(
+        "[测试1] 完整3D可视化（显示所有指纹点）", viz, viz.plot_localization_result, 'data/results/test_full.html',
         true_pos, est_pos, db,
-        save_path='data/results/test_full.html',
         use_3d=True,
         show_fingerprints=True,
         downsample_factor=1
-    )
-    elapsed = time.time() - start
-    print(f"  ✓ 渲染时间: {elapsed:.2f} 秒")
+    )]
 
     # 测试2: 下采样渲染
-    print("\n[测试2] 优化3D可视化（下采样因子=5）")
-    start = time.time()
-    viz.plot_localization_result(
+    results.append(render_and_save(
+        "[测试2] 优化3D可视化（下采样因子=5）", viz, viz.plot_localization_result, 'data/results/test_downsampled.html',
         true_pos, est_pos, db,
-        save_path='data/results/test_downsampled.html',
         use_3d=True,
         show_fingerprints=True,
         downsample_factor=5
-    )
-    elapsed = time.time() - start
-    print(f"  ✓ 渲染时间: {elapsed:.2f} 秒")
+    ))
 
     # 测试3: 隐藏指纹点
-    print("\n[测试3] 最小化3D可视化（隐藏指纹点）")
-    start = time.time()
-    viz.plot_localization_result(
+    results.append(render_and_save(
+        "[测试3] 最小化3D可视化（隐藏指纹点）", viz, viz.plot_localization_result, 'data/results/test_minimal.html',
         true_pos, est_pos, db,
-        save_path='data/results/test_minimal.html',
         use_3d=True,
         show_fingerprints=False
-    )
-    elapsed = time.time() - start
-    print(f"  ✓ 渲染时间: {elapsed:.2f} 秒")
+    ))
+    return results
 
 def test_heatmap():
-    """测试信号强度热图"""
-    print("\n" + "="*60)
-    print("测试信号强度热图")
-    print("="*60)
+    """测试信号强度热图，返回各图形的计时结果"""
+    db = get_test_db()
+    viz = VisualizerPlotly(auto_show=False)
 
-    db = create_test_data()
-    viz = VisualizerPlotly()
+    return [render_and_save(
+        "单个AP热图", viz, viz.plot_signal_heatmap, 'data/results/test_heatmap_single.html',
+        db, ap_index=0
+    )]
 
-    print("\n生成单个AP热图...")
-    start = time.time()
-    viz.plot_signal_heatmap(
-        db, ap_index=0,
-        save_path='data/results/test_heatmap_single.html'
-    )
-    elapsed = time.time() - start
-    print(f"  ✓ 渲染时间: {elapsed:.2f} 秒")
+def test_trajectory(seed=1):
+    """
+    测试轨迹可视化
 
-def test_trajectory():
-    """测试轨迹可视化"""
-    print("\n" + "="*60)
-    print("测试3D轨迹可视化")
-    print("="*60)
+    Args:
+        seed: 轨迹误差的随机种子
 
-    db = create_test_data()
-    viz = VisualizerPlotly()
+    Returns:
+        各图形的计时结果
+    """
+    db = get_test_db()
+    viz = VisualizerPlotly(auto_show=False)
 
     # 生成模拟轨迹
     t = np.linspace(0, 2*np.pi, 30)
@@ -135,40 +168,38 @@ def test_trajectory():
         1.5 + 0.3*np.sin(2*t)
     ])
 
-    # 添加一些误差
-    estimated_trajectory = true_trajectory + np.random.normal(0, 0.2, true_trajectory.shape)
+    # 添加一些误差（独立种子，并行运行时结果保持确定）
+    rng = np.random.default_rng(seed)
+    estimated_trajectory = true_trajectory + rng.normal(0, 0.2, true_trajectory.shape)
 
-    print("\n生成3D轨迹...")
-    start = time.time()
-    viz.plot_trajectory(
+    return [render_and_save(
+        "3D轨迹", viz, viz.plot_trajectory, 'data/results/test_trajectory.html',
         true_trajectory, estimated_trajectory, db,
-        save_path='data/results/test_trajectory.html',
         use_3d=True,
         show_fingerprints=True,
         downsample_factor=5
-    )
-    elapsed = time.time() - start
-    print(f"  ✓ 渲染时间: {elapsed:.2f} 秒")
+    )]
 
-def test_cdf():
-    """测试误差CDF"""
-    print("\n" + "="*60)
-    print("测试误差CDF曲线")
-    print("="*60)
+def test_cdf(seed=2):
+    """
+    测试误差CDF
+
+    Args:
+        seed: 误差样本的随机种子
 
-    viz = VisualizerPlotly()
+    Returns:
+        各图形的计时结果
+    """
+    viz = VisualizerPlotly(auto_show=False)
 
     # 生成模拟误差数据
-    errors = np.random.rayleigh(1.5, 500)
+    rng = np.random.default_rng(seed)
+    errors = rng.rayleigh(1.5, 500)
 
-    print("\n生成CDF曲线...")
-    start = time.time()
-    viz.plot_error_cdf(
-        errors,
-        save_path='data/results/test_cdf.html'
-    )
-    elapsed = time.time() - start
-    print(f"  ✓ 渲染时间: {elapsed:.2f} 秒")
+    return [render_and_save(
+        "CDF曲线", viz, viz.plot_error_cdf, 'data/results/test_cdf.html',
+        errors
+    )]
 
 def main():
     """主测试函数"""
@@ -176,12 +207,33 @@ def main():
     print("Plotly 高性能可视化测试套件")
     print("="*60)
 
+    # 预先创建输出目录，避免多个进程同时创建
+    os.makedirs('data/results', exist_ok=True)
+
     try:
-        # 运行所有测试
-        test_3d_visualization()
-        test_heatmap()
-        test_trajectory()
-        test_cdf()
+        print("\n生成测试数据...")
+        print(f"指纹点数量: {get_test_db().num_fingerprints}")
+
+        tests = [
+            ("测试 Plotly 高性能3D可视化", test_3d_visualization),
+            ("测试信号强度热图", test_heatmap),
+            ("测试3D轨迹可视化", test_trajectory),
+            ("测试误差CDF曲线", test_cdf),
+        ]
+
+        # 各测试互相独立、输出不同文件，放入进程池并行运行；工作进程只返回计时结果，
+        # 由主进程按测试顺序统一打印，避免输出交错。进程数不超过CPU核数，避免互相争抢影响计时
+        max_workers = min(len(tests), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=warm_up) as executor:
+            futures = [executor.submit(test) for _, test in tests]
+            for (title, _), future in zip(tests, futures):
+                print("\n" + "="*60)
+                print(title)
+                print("="*60)
+                for label, save_path, build, serialize, write in future.result():
+                    print(f"\n{label}")
+                    print(f"  ✓ 构建: {build:.3f} 秒 | 序列化: {serialize:.3f} 秒 | 写盘: {write:.3f} 秒")
+                    print(f"  已保存到: {save_path}")
 
         print("\n" + "="*60)
         print("所有测试完成！")